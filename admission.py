@@ -0,0 +1,155 @@
+import os, time, heapq, asyncio, itertools, threading, contextlib
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+# requests in flight at once per upstream API, per stream worker
+OPENAI_CHAT_CONCURRENCY = int(os.getenv("OPENAI_CHAT_CONCURRENCY", 24))
+OPENAI_TTS_CONCURRENCY = int(os.getenv("OPENAI_TTS_CONCURRENCY", 24))
+DEEPGRAM_CONCURRENCY = int(os.getenv("DEEPGRAM_CONCURRENCY", 16))     # batch STT requests; live sockets are one per call
+PROVIDER_MAX_WAITING = int(os.getenv("PROVIDER_MAX_WAITING", 32))     # queued requests per API before new ones are shed
+# calls the whole deployment takes at once; /voice turns away the rest (0 = no limit)
+MAX_CONCURRENT_CALLS = int(os.getenv("MAX_CONCURRENT_CALLS", 0))
+ADMISSION_GRACE_SECONDS = float(os.getenv("ADMISSION_GRACE_SECONDS", 30))   # admitted call counted until its stream shows up
+
+# lower runs first: a caller waiting on a reply beats a speculative reply beats reports and summaries
+LIVE, SPECULATIVE, BACKGROUND = 0, 1, 2
+
+
+class Overloaded(Exception):
+    """An upstream API's queue is full, or a request waited longer than it was allowed to."""
+
+
+# ===== PER-PROVIDER LIMIT =====
+class ProviderLimit:
+    """
+    Concurrency limit for one upstream API, shared by every call on the worker.
+
+    Waiting requests are served by priority, then arrival, so live turns
+    overtake queued reports. At most max_waiting requests queue: when full, a
+    new request pushes out the lowest-priority waiter if it outranks it, and
+    otherwise fails at once with Overloaded rather than joining a backlog that
+    would answer callers long after they moved on.
+    """
+
+    def __init__(self, name: str, limit: int, max_waiting: int = PROVIDER_MAX_WAITING):
+        self.name = name
+        self.limit = limit
+        self.max_waiting = max_waiting
+        self.active = 0
+        self.waiters = []            # heap of [priority, seq, future]
+        self.seq = itertools.count()
+        self.shed = 0
+
+    def waiting(self) -> int:
+        return len(self.waiters)
+
+    def busy(self) -> bool:
+        return self.active >= self.limit
+
+    async def acquire(self, priority: int = LIVE, timeout: float = None):
+        if self.active < self.limit and not self.waiters:
+            self.active += 1
+            return
+        if len(self.waiters) >= self.max_waiting:
+            worst = max(self.waiters)
+            if worst[0] <= priority:
+                self.shed += 1
+                raise Overloaded(f"{self.name}: {len(self.waiters)} requests already waiting")
+            self.waiters.remove(worst)
+            heapq.heapify(self.waiters)
+            self.shed += 1
+            worst[2].set_exception(Overloaded(f"{self.name}: pushed out by a higher-priority request"))
+
+        fut = asyncio.get_running_loop().create_future()
+        entry = [priority, next(self.seq), fut]
+        heapq.heappush(self.waiters, entry)
+        try:
+            await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            self._forget(entry)
+            raise Overloaded(f"{self.name}: no free slot after {timeout:g}s") from None
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled() and fut.exception() is None:
+                self.release()       # the slot was handed over just as this request was abandoned
+            else:
+                self._forget(entry)
+            raise
+
+    def _forget(self, entry):
+        if entry in self.waiters:
+            self.waiters.remove(entry)
+            heapq.heapify(self.waiters)
+
+    def release(self):
+        self.active -= 1
+        while self.waiters and self.active < self.limit:
+            _, _, fut = heapq.heappop(self.waiters)
+            if not fut.done():
+                self.active += 1
+                fut.set_result(None)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = LIVE, timeout: float = None):
+        await self.acquire(priority, timeout)
+        try:
+            yield
+        finally:
+            self.release()
+
+
+# ===== CALL ADMISSION =====
+class CallAdmission:
+    """
+    Deployment-wide call count for the /voice webhook.
+
+    Every stream worker reports the calls it is carrying (and whether its
+    upstream APIs are shedding work); calls admitted here but whose media
+    stream hasn't reached a worker yet count for grace seconds. admit()
+    refuses a call once the total reaches max_calls or any worker is
+    overloaded.
+    """
+
+    def __init__(self, max_calls: int = MAX_CONCURRENT_CALLS, grace: float = ADMISSION_GRACE_SECONDS):
+        self.max_calls = max_calls
+        self.grace = grace
+        self.workers = {}          # source -> (set of call sids, overloaded)
+        self.admitted = {}         # call sid -> admitted at
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def report(self, source: str, calls, overloaded: bool = False):
+        with self.lock:
+            self.workers[source] = (set(calls), overloaded)
+
+    def forget(self, source: str):
+        """A worker disconnected; its calls are no longer known to be running."""
+        with self.lock:
+            self.workers.pop(source, None)
+
+    def active(self) -> int:
+        with self.lock:
+            return len(self._calls())
+
+    def calls(self) -> list:
+        with self.lock:
+            return sorted(self._calls())
+
+    def _calls(self) -> set:
+        now = time.time()
+        self.admitted = {sid: t for sid, t in self.admitted.items() if now - t < self.grace}
+        calls = set(self.admitted)
+        for sids, _ in self.workers.values():
+            calls |= sids
+        return calls
+
+    def admit(self, call_sid: str) -> bool:
+        with self.lock:
+            calls = self._calls()
+            overloaded = any(o for _, o in self.workers.values())
+            if call_sid not in calls and (overloaded or (self.max_calls and len(calls) >= self.max_calls)):
+                self.rejected += 1
+                return False
+            self.admitted[call_sid] = time.time()
+            return True
@@ -1,16 +1,27 @@
 import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "gevent" serves every browser socket from one process without a thread each; "threading" needs no extra package
+SOCKETIO_ASYNC_MODE = os.getenv("SOCKETIO_ASYNC_MODE", "gevent").lower()
+if SOCKETIO_ASYNC_MODE == "gevent":
+    try:
+        from gevent import monkey
+        monkey.patch_all()
+    except ImportError:
+        print("⚠ gevent not installed, falling back to threading Socket.IO mode")
+        SOCKETIO_ASYNC_MODE = "threading"
+
 from flask import Flask, request, Response, render_template, jsonify
-from flask_socketio import SocketIO
+from flask_socketio import SocketIO, join_room, leave_room, disconnect, emit
 from twilio.twiml.voice_response import VoiceResponse
 from twilio.jwt.access_token import AccessToken
 from twilio.jwt.access_token.grants import VoiceGrant
-from dotenv import load_dotenv
-
-# ===== Load Environment =====
-load_dotenv()
+from admission import CallAdmission
 
 app = Flask(__name__, static_folder="static", template_folder="templates")
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode="threading")
+socketio = SocketIO(app, cors_allowed_origins="*", async_mode=SOCKETIO_ASYNC_MODE)
 
 # ===== Environment Variables =====
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
@@ -23,6 +34,16 @@ STREAM_SERVER_URL = os.getenv("STREAM_SERVER_URL")
 BROWSER_IDENTITY = os.getenv("BROWSER_IDENTITY", "agent")
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
 STATUS_CALLBACK_URL = os.getenv("STATUS_CALLBACK_URL", f"{PUBLIC_BASE_URL}/status")
+# Must match the stream server: "stream" (<Connect><Stream>) or "redirect" (<Start><Stream> + /play_tts)
+PLAYBACK_MODE = os.getenv("PLAYBACK_MODE", "stream").lower()
+# shared secret the stream server presents on the /ingest namespace (empty = no check)
+DASHBOARD_INGEST_TOKEN = os.getenv("DASHBOARD_INGEST_TOKEN", "")
+# per-call events go to the call's room; call lifecycle announcements go to everyone
+LIVE_EVENTS = {"update", "interim", "call_report", "call_recording"}
+# said to callers turned away at /voice when MAX_CONCURRENT_CALLS is reached or the stream workers are shedding work
+BUSY_MESSAGE = os.getenv("BUSY_MESSAGE", "Sorry, all of our lines are busy right now. Please call back in a few minutes.")
+# live call counts reported by the stream workers over /ingest
+ADMISSION = CallAdmission()
 
 # Make sure tts folder exists for generated AI voice responses
 os.makedirs(os.path.join(app.static_folder, "tts"), exist_ok=True)
@@ -39,19 +60,47 @@ def voice():
     from_number = request.form.get("From")
     call_sid = request.form.get("CallSid")
 
+    vr = VoiceResponse()
+    if not ADMISSION.admit(call_sid):
+        # turned away before a stream is opened, so no worker spends anything on it
+        print(f"🚦 Turned away {call_sid}: {ADMISSION.active()} call(s) in progress")
+        vr.say(BUSY_MESSAGE)
+        vr.hangup()
+        return Response(str(vr), mimetype="text/xml")
+
     socketio.emit("call_incoming", {"from": from_number, "callSid": call_sid})
 
-    vr = VoiceResponse()
     # Play greeting message
     vr.play(f"{PUBLIC_BASE_URL}/static/tts/greeting.mp3")
+    return stream_response(vr)
+
+# ---- Outbound campaign call answered (dialer.py) ----
+@app.route("/outbound", methods=["GET", "POST"])
+def outbound():
+    """Same media stream as an inbound call; the AI opens with the campaign's line instead of the greeting."""
+    call_sid = request.values.get("CallSid")
+    socketio.emit("call_incoming", {"from": request.values.get("To"), "callSid": call_sid, "outbound": True})
+    return stream_response(VoiceResponse(), greeting=request.args.get("greeting", ""))
+
+def stream_response(vr, greeting=""):
+    if PLAYBACK_MODE == "stream":
+        # Bidirectional stream: the AI speaks back over the same WebSocket
+        connect = vr.connect()
+        stream = connect.stream(url=STREAM_SERVER_URL)
+        if greeting:
+            stream.parameter(name="greeting", value=greeting)
+        return Response(str(vr), mimetype="text/xml")
+
     # Stream caller audio to your AI stream server
     start = vr.start()
-    start.stream(url=STREAM_SERVER_URL, track="inbound_track")
+    stream = start.stream(url=STREAM_SERVER_URL, track="inbound_track")
+    if greeting:
+        stream.parameter(name="greeting", value=greeting)
 
     # AI greets caller automatically
     # vr.say("Hello, this is the AI assistant. How can I help you today?")
     vr.redirect("/hold")
-    
+
     return Response(str(vr), mimetype="text/xml")
 
 @app.route("/hold", methods=["GET", "POST"])
@@ -81,18 +130,65 @@ def token():
     jwt_token = raw.decode("utf-8") if hasattr(raw, "decode") else raw
     return jsonify({"identity": identity, "token": jwt_token})
 
-# ---- Live AI updates ----
+# ---- Dashboard viewers: one room per call ----
+@socketio.on("connect")
+def viewer_connect(auth=None):
+    """A dashboard opened mid-call missed call_incoming; tell it which calls are in progress."""
+    emit("active_calls", {"calls": ADMISSION.calls()})
+
+@socketio.on("watch")
+def watch(data):
+    """A browser follows one call; it only receives that call's live events."""
+    call_sid = (data or {}).get("callSid")
+    previous = (data or {}).get("previous")
+    if previous:
+        leave_room(previous)
+    if call_sid:
+        join_room(call_sid)
+
+# ---- Stream server event channel ----
+@socketio.on("connect", namespace="/ingest")
+def ingest_connect(auth):
+    if DASHBOARD_INGEST_TOKEN and (auth or {}).get("token") != DASHBOARD_INGEST_TOKEN:
+        disconnect()
+        return False
+    print("📡 Stream server connected")
+
+@socketio.on("disconnect", namespace="/ingest")
+def ingest_disconnect(*args):
+    ADMISSION.forget(request.sid)
+
+@socketio.on("events", namespace="/ingest")
+def ingest_events(events):
+    """A batch of events from the stream server, each delivered to its call's room."""
+    for ev in events or []:
+        if ev.get("event") == "load":
+            # each stream worker has its own connection, so the socket id identifies the worker
+            data = ev.get("data") or {}
+            ADMISSION.report(request.sid, data.get("calls") or [], data.get("overloaded", False))
+        elif ev.get("event") in LIVE_EVENTS and ev.get("callSid"):
+            socketio.emit(ev["event"], ev.get("data") or {}, to=ev["callSid"])
+
+# ---- Live AI updates (HTTP fallback for tools that can't hold a socket) ----
 @app.route("/update", methods=["POST"])
 def update_route():
-    data = request.json
-    socketio.emit("update", data)
+    data = request.json or {}
+    socketio.emit("update", data, to=data.get("callSid"))
     return jsonify({"status": "ok"})
 
 # ---- Final report ----
 @app.route("/report", methods=["POST"])
 def report_route():
-    report = (request.json or {}).get("report", "")
-    socketio.emit("call_report", {"report": report})
+    data = request.json or {}
+    socketio.emit("call_report", {"callSid": data.get("callSid"), "report": data.get("report", ""),
+                                  "scores": data.get("scores")}, to=data.get("callSid"))
+    return jsonify({"status": "received"})
+
+# ---- Merged call recording is ready ----
+@app.route("/recording", methods=["POST"])
+def recording_route():
+    data = request.json or {}
+    socketio.emit("call_recording", {"callSid": data.get("callSid"), "url": data.get("url")}, to=data.get("callSid"))
     return jsonify({"status": "received"})
 
 # ---- Twilio status callback ----
@@ -103,7 +199,8 @@ def status_callback():
     print(f"[STATUS CALLBACK] {call_sid} → {call_status}")
 
     if call_status in ["completed", "failed", "canceled", "busy", "no-answer"]:
-        socketio.emit("call_ended", {"status": call_status})
+        # a lifecycle announcement like call_incoming: every dashboard, watching this call or not
+        socketio.emit("call_ended", {"status": call_status, "callSid": call_sid})
         print("🔔 Emitted call_ended to dashboard")
 
     return Response("OK", 200)
@@ -0,0 +1,50 @@
+# ===== AUDIO RING BUFFER =====
+class AudioRingBuffer:
+    """
+    Preallocated byte buffer for one call's inbound audio.
+
+    append() copies each frame in once; take() hands the buffered utterance
+    out as a memoryview into the same storage, so nothing grows or gets
+    re-copied as the utterance gets longer. Every utterance is kept
+    contiguous: when one would run off the end, its bytes so far are moved
+    back to the front. A view returned by take() stays valid until roughly
+    another capacity's worth of audio has been appended, so consumers should
+    convert it before then (transcribe_audio does so immediately).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._view = memoryview(self._buf)
+        self.start = 0
+        self.end = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __bool__(self):
+        return self.end > self.start
+
+    def append(self, data):
+        n = len(data)
+        if n > self.capacity:
+            data, n = data[-self.capacity:], self.capacity
+        if self.end + n > self.capacity:
+            size = self.end - self.start
+            if size + n > self.capacity:
+                # overflow: keep only the newest half so the move below stays rare
+                keep = min(size, self.capacity // 2, self.capacity - n)
+                self.start, size = self.end - keep, keep
+            self._buf[0:size] = self._view[self.start:self.end]
+            self.start, self.end = 0, size
+        self._view[self.end:self.end + n] = data
+        self.end += n
+
+    def take(self) -> memoryview:
+        """Return the buffered audio without copying and start a new utterance."""
+        chunk = self._view[self.start:self.end]
+        self.start = self.end
+        return chunk
+
+    def clear(self):
+        self.start = self.end = 0
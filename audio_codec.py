@@ -0,0 +1,117 @@
+"""
+Vectorized telephony audio codec (no audioop, which Python 3.13 removed).
+
+Inbound:  8 kHz mulaw -> 16 kHz 16-bit WAV for Deepgram, in one buffer.
+Outbound: 24 kHz 16-bit PCM from OpenAI TTS -> 8 kHz mulaw for Twilio.
+
+mulaw is table-driven in both directions and matches audioop's G.711
+bit-for-bit; resampling uses short polyphase windowed-sinc filters that only
+compute the output samples actually kept.
+"""
+import struct
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+INBOUND_GAIN = 0.95        # small headroom so interpolation overshoot doesn't clip
+UPSAMPLE_TAPS = 16         # taps for the interpolated phase of the 8k -> 16k filter
+DOWNSAMPLE_TAPS = 31       # anti-alias filter for 24k -> 8k
+WAV_HEADER_BYTES = 44
+
+
+# ===== MULAW TABLES =====
+def _ulaw_table() -> np.ndarray:
+    u = ~np.arange(256, dtype=np.uint8)
+    exponent = (u >> 4) & 0x07
+    mantissa = (u & 0x0F).astype(np.int32)
+    magnitude = ((mantissa << 3) + 0x84) << exponent
+    sample = magnitude - 0x84
+    return np.where(u & 0x80, -sample, sample).astype(np.int16)
+
+
+def _linear_table() -> np.ndarray:
+    """G.711 encode for every 14-bit input (int16 >> 2), as in audioop.lin2ulaw."""
+    v = np.arange(-8192, 8192, dtype=np.int32)
+    mask = np.where(v < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(v), 8159) + (0x84 >> 2)
+    segment = np.searchsorted(np.array([0x3F, 0x7F, 0xFF, 0x1FF, 0x3FF, 0x7FF, 0xFFF, 0x1FFF]), magnitude)
+    code = (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F)
+    return np.where(segment >= 8, 0x7F ^ mask, code ^ mask).astype(np.uint8)
+
+
+ULAW_TO_LINEAR = _ulaw_table()      # mulaw byte -> int16
+LINEAR_TO_ULAW = _linear_table()    # (int16 >> 2) + 8192 -> mulaw byte
+
+
+def ulaw_decode(mulaw) -> np.ndarray:
+    return ULAW_TO_LINEAR[np.frombuffer(mulaw, dtype=np.uint8)]
+
+
+def ulaw_encode(samples: np.ndarray) -> bytes:
+    """int16 (or float, clipped to int16 range) samples -> mulaw bytes."""
+    s = np.clip(samples, -32768, 32767).astype(np.int32)
+    return LINEAR_TO_ULAW[(s >> 2) + 8192].tobytes()
+
+
+# ===== RESAMPLING FILTERS =====
+def _sinc_lowpass(n_taps: int, cutoff: float, offset: float = 0.0) -> np.ndarray:
+    """Kaiser-windowed sinc with cutoff as a fraction of the sample rate, normalized to unity gain."""
+    t = np.arange(n_taps) - (n_taps - 1) / 2 + offset
+    h = 2 * cutoff * np.sinc(2 * cutoff * t) * np.kaiser(n_taps, 8.0)
+    return (h / h.sum()).astype(np.float32)
+
+
+# the even 16 kHz samples are the input samples themselves; this filter makes the odd ones,
+# halfway between x[n] and x[n+1] (a half-band interpolator evaluated at t = k + 0.5)
+_UPSAMPLE_ODD = _sinc_lowpass(UPSAMPLE_TAPS, 0.5)
+# 24 kHz -> 8 kHz: pass up to 3.6 kHz, stop before the 4 kHz Nyquist of the output
+_DOWNSAMPLE_3 = _sinc_lowpass(DOWNSAMPLE_TAPS, 3600 / 24000)
+
+
+def _interpolate_odd(x: np.ndarray) -> np.ndarray:
+    half = UPSAMPLE_TAPS // 2
+    padded = np.pad(x, (half - 1, half), mode="edge")
+    return sliding_window_view(padded, UPSAMPLE_TAPS) @ _UPSAMPLE_ODD
+
+
+def decimate_3(x: np.ndarray) -> np.ndarray:
+    """Low-pass and keep every third sample; only the kept outputs are computed."""
+    half = DOWNSAMPLE_TAPS // 2
+    padded = np.pad(x, (half, half), mode="edge")
+    return sliding_window_view(padded, DOWNSAMPLE_TAPS)[::3] @ _DOWNSAMPLE_3
+
+
+# ===== WAV =====
+def _wav_buffer(n_samples: int, rate: int):
+    """A ready-to-send mono 16-bit WAV buffer and an int16 view of its sample area."""
+    data_bytes = 2 * n_samples
+    buf = bytearray(WAV_HEADER_BYTES + data_bytes)
+    struct.pack_into("<4sI4s4sIHHIIHH4sI", buf, 0,
+                     b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16,
+                     b"data", data_bytes)
+    return buf, np.frombuffer(buf, dtype="<i2", offset=WAV_HEADER_BYTES)
+
+
+def pcm16_to_wav(pcm, rate: int) -> bytearray:
+    n = len(pcm) // 2
+    buf, out = _wav_buffer(n, rate)
+    out[:] = np.frombuffer(pcm, dtype="<i2", count=n)
+    return buf
+
+
+# ===== INBOUND / OUTBOUND =====
+def mulaw_to_wav16k(mulaw, gain: float = INBOUND_GAIN) -> bytearray:
+    """Caller audio for STT: decode, upsample 2x and apply gain straight into a 16 kHz WAV."""
+    x = ulaw_decode(mulaw).astype(np.float32)
+    buf, out = _wav_buffer(2 * len(x), 16000)
+    if len(x):
+        out[0::2] = np.clip(x * gain, -32768, 32767)
+        out[1::2] = np.clip(_interpolate_odd(x) * gain, -32768, 32767)
+    return buf
+
+
+def pcm24k_to_mulaw8k(pcm) -> bytes:
+    """TTS audio for Twilio: 24 kHz 16-bit PCM -> 8 kHz mulaw."""
+    x = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2).astype(np.float32)
+    if not len(x):
+        return b""
+    return ulaw_encode(np.rint(decimate_3(x)))
@@ -0,0 +1,111 @@
+import os, struct, asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from dotenv import load_dotenv
+from audio_codec import ulaw_decode
+
+load_dotenv()
+
+# ===== SETTINGS =====
+SAMPLE_RATE = 8000
+RECORDER_FLUSH_SECONDS = float(os.getenv("RECORDER_FLUSH_SECONDS", 2))   # audio held in memory between writes
+
+# file I/O for every recording on the worker; one thread keeps each file's writes in order, off the event loop
+WRITER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="recorder")
+
+
+def _wav_header(data_bytes: int) -> bytes:
+    """16-bit stereo PCM header; written with 0 first and patched in place as the file grows."""
+    return struct.pack("<4sI4s4sIHHIIHH4sI",
+                       b"RIFF", 36 + data_bytes, b"WAVE", b"fmt ", 16, 1, 2,
+                       SAMPLE_RATE, SAMPLE_RATE * 4, 4, 16, b"data", data_bytes)
+
+
+# ===== STEREO CALL RECORDER =====
+class CallRecorder:
+    """
+    Records a call straight from the media stream: caller on the left channel,
+    AI on the right, as a WAV that is valid on disk at every flush.
+
+    Inbound frames are the clock, since Twilio sends them continuously in real
+    time. AI audio is queued from the moment it is handed to Twilio and mixed
+    in sample-for-sample as the matching inbound frames arrive, so both
+    channels stay aligned the way the caller heard them.
+
+    lead_in is mulaw AI audio the caller heard before the media stream opened
+    (the greeting <Play>); it starts the recording with the caller side silent.
+    Writes happen on the WRITER thread; close() waits for the last of them.
+    """
+
+    def __init__(self, path: str, flush_seconds: float = RECORDER_FLUSH_SECONDS, lead_in: bytes = b""):
+        self.path = path
+        self.file = None                           # opened by the first write, on the writer thread
+        self.closed = False
+        self.frames = 0                            # stereo sample frames recorded so far
+        self.pending_out = np.zeros(0, np.int16)   # AI samples still to be played, from self.frames on
+        self.chunks = []
+        self.buffered = 0
+        self.flush_frames = int(flush_seconds * SAMPLE_RATE)
+        if lead_in:
+            right = ulaw_decode(lead_in)
+            stereo = np.zeros((len(right), 2), dtype="<i2")
+            stereo[:, 1] = right
+            self.chunks.append(stereo.tobytes())
+            self.frames = self.buffered = len(right)
+
+    def inbound(self, mulaw: bytes):
+        left = ulaw_decode(mulaw)
+        n = len(left)
+        right = self.pending_out[:n]
+        self.pending_out = self.pending_out[n:]
+        stereo = np.zeros((n, 2), dtype="<i2")
+        stereo[:, 0] = left
+        stereo[:len(right), 1] = right
+        self.chunks.append(stereo.tobytes())
+        self.frames += n
+        self.buffered += n
+        if self.buffered >= self.flush_frames:
+            self.flush()
+
+    def outbound(self, mulaw: bytes):
+        """AI audio just sent to Twilio; it plays right after whatever is still queued."""
+        self.pending_out = np.concatenate([self.pending_out, ulaw_decode(mulaw)])
+
+    def clear_outbound(self):
+        """Twilio was told to drop queued audio (barge-in), so the caller never hears the rest."""
+        self.pending_out = np.zeros(0, np.int16)
+
+    def flush(self):
+        """Hand the buffered audio to the writer thread; returns at once."""
+        if self.closed or not self.chunks:
+            return
+        data, self.chunks, self.buffered = b"".join(self.chunks), [], 0
+        WRITER.submit(self._write, data, self.frames)
+
+    def _write(self, data: bytes, frames: int):
+        if self.file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self.file = open(self.path, "wb")
+            self.file.write(_wav_header(0))
+        self.file.write(data)
+        end = self.file.tell()
+        self.file.seek(0)
+        self.file.write(_wav_header(frames * 4))
+        self.file.seek(end)
+        self.file.flush()
+
+    def _close(self):
+        if self.file is None:
+            self._write(b"", 0)      # a call with no audio still leaves a valid (empty) WAV
+        self.file.close()
+
+    async def close(self) -> str:
+        if not self.closed:
+            self.flush()
+            self.closed = True
+            await asyncio.wrap_future(WRITER.submit(self._close))
+        return self.path
+
+    @property
+    def duration(self) -> float:
+        return self.frames / SAMPLE_RATE
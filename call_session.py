@@ -0,0 +1,103 @@
+import os, asyncio, time
+from dotenv import load_dotenv
+from vad import Endpointer, VAD_PREROLL_MS
+from audio_buffer import AudioRingBuffer
+from transcript_store import Transcript
+from conversation import ConversationContext
+from contact_extractor import ContactExtractor
+
+load_dotenv()
+
+# ===== SETTINGS =====
+SAMPLE_RATE = 8000
+MAX_UTTERANCE_SECONDS = float(os.getenv("MAX_UTTERANCE_SECONDS", 15))
+MAX_UTTERANCE_BYTES = int(SAMPLE_RATE * MAX_UTTERANCE_SECONDS)   # mulaw is one byte per sample
+# room for two full utterances plus pre-roll, so a handed-off chunk isn't overwritten mid-use
+AUDIO_BUFFER_BYTES = 2 * MAX_UTTERANCE_BYTES + SAMPLE_RATE * VAD_PREROLL_MS // 1000
+
+
+# ===== CALL SESSION =====
+class CallSession:
+    """
+    All state that belongs to one Twilio media stream: audio buffer, LLM history,
+    transcript log and the asyncio tasks working on its behalf.
+    """
+
+    def __init__(self, stream_sid: str, call_sid: str):
+        self.stream_sid = stream_sid
+        self.call_sid = call_sid
+        self.started_at = time.time()
+
+        # audio ingest
+        self.audio_buffer = AudioRingBuffer(AUDIO_BUFFER_BYTES)
+        self.vad = Endpointer()
+        self.last_processing = None  # task answering the latest caller turn
+        self.heard = None            # batch STT of the latest utterance; each one waits for the one before
+
+        # streaming STT (None when the call uses batch STT)
+        self.stt = None
+        self.speculator = None       # Speculator when SPECULATIVE_LLM is on
+
+        # LLM history (token-budgeted, older turns folded into a summary)
+        self.context = ConversationContext()
+        # email/phone assembled across caller turns, handed to the LLM as a structured slot
+        self.contacts = ContactExtractor()
+
+        # transcript; turn counts caller utterances so spans can be grouped per turn
+        self.transcript = Transcript(call_sid, stream_sid)
+        self.turn = 0
+
+        # ordered AI speech output (set up by the stream server)
+        self.ws = None
+        self.playback = None
+        self.mark_seq = 0
+        self.pending_marks = set()   # marks sent to Twilio whose audio hasn't finished playing
+        self.recorder = None         # local stereo CallRecorder when RECORDING_MODE=local
+
+        # in-flight work
+        self.tasks = set()
+        self.closed = False
+
+    # ---- tasks ----
+    def spawn(self, coro):
+        """Run a coroutine owned by this call; it is cancelled when the call closes."""
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        current = asyncio.current_task()
+        pending = [t for t in self.tasks if t is not current and not t.done()]
+        for t in pending:
+            t.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if self.stt:
+            await self.stt.close()
+            self.stt = None
+        if self.playback:
+            await self.playback.close()
+        if self.recorder:
+            await self.recorder.close()
+            self.recorder = None
+        self.audio_buffer.clear()
+        self.context.clear()
+
+
+# ===== SESSION REGISTRY =====
+SESSIONS = {}
+
+
+def open_session(stream_sid: str, call_sid: str) -> CallSession:
+    session = CallSession(stream_sid, call_sid)
+    SESSIONS[stream_sid] = session
+    return session
+
+
+async def close_session(session: CallSession):
+    SESSIONS.pop(session.stream_sid, None)
+    await session.close()
@@ -0,0 +1,92 @@
+import os, aiohttp
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+TWILIO_API_BASE_URL = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_PER_HOST = int(os.getenv("HTTP_MAX_PER_HOST", 20))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", 60))
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", 30))
+
+# ===== SHARED CLIENTS =====
+# One pooled, keep-alive client per transport for the whole process, so TLS
+# handshakes are paid once rather than per request. All of them are lazy: the
+# aiohttp session has to be created inside the running loop, and the openai and
+# twilio packages take most of the server's import time, so they are only
+# imported when first used (the stream server does that during warm-up).
+_http = None
+_twilio = None
+_openai = None
+
+
+def openai_client():
+    """AsyncOpenAI shared by every call, with idle connections kept as long as the aiohttp pool's."""
+    global _openai
+    if _openai is None:
+        import httpx
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+        _openai = AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=HTTP_TIMEOUT_SECONDS,
+            # httpx drops idle connections after 5 s by default, which would make every new call reconnect
+            http_client=DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_PER_HOST,
+                keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+            )),
+        )
+    return _openai
+
+
+def http_session() -> aiohttp.ClientSession:
+    """Process-wide aiohttp session used for Deepgram, the dashboard and Twilio."""
+    global _http
+    if _http is None or _http.closed:
+        _http = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=HTTP_MAX_CONNECTIONS,
+                limit_per_host=HTTP_MAX_PER_HOST,
+                keepalive_timeout=HTTP_KEEPALIVE_SECONDS,
+                ttl_dns_cache=300,
+            ),
+            timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT_SECONDS),
+        )
+    return _http
+
+
+def twilio():
+    """Twilio REST client whose *_async methods go through the shared aiohttp pool."""
+    global _twilio
+    if _twilio is None:
+        from twilio.rest import Client as TwilioClient
+        from twilio.http.async_http_client import AsyncTwilioHttpClient
+
+        class TimedTwilioHttpClient(AsyncTwilioHttpClient):
+            # the stock client ignores its own timeout and passes None to aiohttp, which means "never time out"
+            async def request(self, *args, timeout=None, **kwargs):
+                return await super().request(*args, timeout=timeout or self.timeout, **kwargs)
+
+        http_client = TimedTwilioHttpClient(pool_connections=False, timeout=HTTP_TIMEOUT_SECONDS)
+        http_client.session = http_session()
+        _twilio = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN, http_client=http_client)
+        _twilio.api.base_url = TWILIO_API_BASE_URL
+    elif _twilio.http_client.session.closed:
+        _twilio.http_client.session = http_session()
+    return _twilio
+
+
+async def close_clients():
+    global _http, _twilio, _openai
+    if _http is not None and not _http.closed:
+        await _http.close()
+    _http = None
+    _twilio = None
+    if _openai is not None:
+        await _openai.close()
+    _openai = None
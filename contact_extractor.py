@@ -0,0 +1,362 @@
+import re
+from dataclasses import dataclass
+
+# ===== VOCABULARY =====
+DIGIT_WORDS = {"zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+               "six": "6", "seven": "7", "eight": "8", "nine": "9"}
+NATO = {"alpha": "a", "alfa": "a", "bravo": "b", "charlie": "c", "delta": "d", "echo": "e", "foxtrot": "f",
+        "golf": "g", "hotel": "h", "india": "i", "juliet": "j", "juliett": "j", "kilo": "k", "lima": "l",
+        "mike": "m", "november": "n", "oscar": "o", "papa": "p", "quebec": "q", "romeo": "r", "sierra": "s",
+        "tango": "t", "uniform": "u", "victor": "v", "whiskey": "w", "xray": "x", "yankee": "y", "zulu": "z"}
+SYMBOL_WORDS = {"at": "@", "dot": ".", "period": ".", "underscore": "_", "dash": "-", "hyphen": "-", "plus": "+"}
+REPEAT_WORDS = {"double": 2, "triple": 3}
+# words around a spelled address that are not part of it
+FILLER_WORDS = {"my", "email", "mail", "address", "is", "its", "it", "thats", "the", "and", "phone", "number",
+                "mobile", "cell", "yes", "yeah", "name", "please", "then", "okay", "ok", "so", "again", "here"}
+# hesitations change nothing, not even which part of the address is being spelled
+SKIP_WORDS = {"uh", "um", "er", "hmm", "like", "capital", "small", "letter", "lowercase", "uppercase"}
+# words that say an email or a phone number is being given, by the caller or in the AI's question
+CUE_WORDS = {"email": "email", "mail": "email", "address": "email",
+             "phone": "phone", "number": "phone", "mobile": "phone", "cell": "phone"}
+KNOWN_TLDS = {"com", "net", "org", "edu", "gov", "io", "co", "us", "uk", "ca", "info", "biz", "me", "ai", "in", "au"}
+COMMON_DOMAINS = {"gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "icloud.com", "aol.com", "live.com"}
+
+# ===== PATTERNS (compiled once) =====
+EMAIL_RE = re.compile(r"[a-z0-9._%+-]+@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.[a-z]{2,}")
+VALID_EMAIL_RE = re.compile(r"^[a-z0-9](?:[a-z0-9._%+-]*[a-z0-9])?@[a-z0-9-]+(?:\.[a-z0-9-]+)*\.([a-z]{2,})$")
+SPELLED_RE = re.compile(r"\b([a-z])\s+(?:as\s+in|for)\s+[a-z]+\b")          # "b as in boy" -> "b"
+HYPHEN_SPELLED_RE = re.compile(r"\b(?:[a-z0-9]-)+[a-z0-9]\b")                # "j-o-h-n" as STT writes spelling
+INNER_DOT_RE = re.compile(r"\.(?=[a-z0-9])")                                  # "john.doe", not a full stop
+SENTENCE_END_RE = re.compile(r"(?<=[a-z0-9]{2})\.(?![a-z0-9])")              # "Sure." ends whatever came before
+STOP_RE = re.compile(r"\.(?![a-z0-9])")                                       # the rest: "J. O. H. N." spelling
+# "7:45", "7 p.m.", "10/24": times and dates, never part of a phone number
+WHEN_RE = re.compile(r"\b\d{1,2}:\d{2}(?:\s*[ap]\.?m\b\.?)?|\b\d{1,2}\s*[ap]\.?m\b\.?|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b")
+CORRECTION_RE = re.compile(r"\b(?:sorry|oops|i mean|no wait|correction|actually)\b")
+RESET_RE = re.compile(r"\b(?:start over|scratch that|start again|from the beginning)\b")
+WORD_RE = re.compile(r"[a-z]+")
+TOKEN_RE = re.compile(r"<fix>|<reset>|<when>|<stop>|[a-z]+|\d|[@._+]")
+
+
+@dataclass
+class Capture:
+    kind: str            # "email" or "phone"
+    value: str
+    confidence: float
+    chunks: int          # transcript chunks the value was assembled from
+    corrections: int
+
+    def spoken(self) -> str:
+        if self.kind == "phone" and len(self.value) == 10:
+            return f"{self.value[:3]}-{self.value[3:6]}-{self.value[6:]}"
+        return self.value
+
+
+class _Builder:
+    """Characters of one value being spelled, plus how it was assembled."""
+
+    def __init__(self):
+        self.chars = []
+        self.chunks = set()
+        self.corrections = 0
+        self.spelled = False     # contains letters spelled one by one (deliberate, survives filler words)
+        self.cued = False        # started while the caller or the AI was talking about this kind of value
+
+    def add(self, s: str, chunk: int):
+        self.chars.append(s)
+        self.chunks.add(chunk)
+
+    def undo(self):
+        if self.chars:
+            self.chars.pop()
+            self.corrections += 1
+
+    @property
+    def text(self) -> str:
+        return "".join(self.chars)
+
+
+# ===== EXTRACTOR =====
+class ContactExtractor:
+    """
+    Per-call state machine that assembles an email address and a phone number
+    from spoken fragments across transcript chunks: spelled letters (also
+    NATO words and "b as in boy"), digit words ("double five"), "at"/"dot"/
+    "underscore" and corrections ("sorry", "scratch that").
+
+    feed() takes one raw transcript chunk and returns the values it completed;
+    the latest validated value of each kind is kept in slots for the prompt.
+    asked() takes each AI line: asking for an email or phone number is the cue
+    that lets ordinary words ("john at gmail dot com") or loose digits count,
+    as is the caller saying "email" or "number" in the same or previous chunk.
+    """
+
+    def __init__(self):
+        self.slots = {}          # kind -> Capture
+        self.chunk = 0
+        self.found = []
+        self.spelling = False    # the last chunk was nothing but spelled characters
+        self.asked_for = set()   # kinds the AI's last line asked for
+        self.mentioned = set()   # kinds the caller's previous chunk mentioned
+        self.cues = set()
+        self._reset_email()
+        self.phone = _Builder()
+        self.target = None       # builder the last character went to; corrections apply there
+
+    def _reset_email(self):
+        self.local = _Builder()
+        self.domain = None       # _Builder once "at" has been heard
+        self.email_open = False  # the previous token continued the address
+
+    def asked(self, text: str):
+        """The AI's latest line; what it asks for is a cue for the caller's next answers."""
+        words = WORD_RE.findall(text.lower().replace("e-mail", "email"))
+        self.asked_for = {CUE_WORDS[w] for w in words if w in CUE_WORDS}
+
+    # ---- tokenizing ----
+    def _tokens(self, text: str):
+        t = text.lower().replace("'", "").replace("e-mail", "email")
+        t = WHEN_RE.sub(" <when> ", t)
+        t = SPELLED_RE.sub(r"\1", t)
+        t = HYPHEN_SPELLED_RE.sub(lambda m: m.group(0).replace("-", " "), t)
+        # punctuation; a spoken "dot" comes through as the word
+        t = SENTENCE_END_RE.sub(" <stop> ", t)
+        t = STOP_RE.sub(" ", t)
+        t = INNER_DOT_RE.sub(" . ", t)
+        t = RESET_RE.sub(" <reset> ", t)
+        t = CORRECTION_RE.sub(" <fix> ", t)
+        words = TOKEN_RE.findall(t)
+
+        tokens, repeat = [], 1
+        for i, w in enumerate(words):
+            if w in REPEAT_WORDS:
+                repeat = REPEAT_WORDS[w]
+                continue
+            if w == "<fix>":
+                tokens.append(("fix", None))
+            elif w == "<reset>":
+                tokens.append(("reset", None))
+            elif w == "<when>":
+                tokens.append(("when", None))
+            elif w == "<stop>":
+                tokens.append(("stop", None))
+            elif w.isdigit() or w in DIGIT_WORDS:
+                tokens.append(("digit", DIGIT_WORDS.get(w, w) * repeat))
+            elif w == "oh" and i and (words[i - 1].isdigit() or words[i - 1] in DIGIT_WORDS):
+                tokens.append(("digit", "0" * repeat))
+            elif len(w) == 1 and w.isalpha():
+                tokens.append(("letter", w * repeat))
+            elif w in NATO:
+                tokens.append(("letter", NATO[w] * repeat))
+            elif w in SYMBOL_WORDS or w in "@._+":
+                tokens.append(("symbol", SYMBOL_WORDS.get(w, w)))
+            elif w in SKIP_WORDS:
+                continue
+            elif w in FILLER_WORDS:
+                tokens.append(("filler", w))
+            else:
+                tokens.append(("word", w))
+            repeat = 1
+
+        # a lone letter between ordinary words is just "a" or "I", not spelling
+        spelling = ("letter", "digit", "symbol")
+        for i, (kind, value) in enumerate(tokens):
+            if kind == "letter" and len(tokens) > 1:
+                before = tokens[i - 1][0] if i else None
+                after = tokens[i + 1][0] if i + 1 < len(tokens) else None
+                if before not in spelling and after not in spelling:
+                    tokens[i] = ("word", value)
+        return tokens
+
+    # ---- feeding ----
+    def feed(self, text: str) -> list:
+        """Consume one transcript chunk; returns the Captures it completed."""
+        self.chunk += 1
+        self.found = []
+        # STT sometimes formats a whole address itself
+        for m in EMAIL_RE.finditer(text.lower()):
+            self._emit("email", m.group(0), 0.9, chunks=1, corrections=0)
+            self._reset_email()
+
+        tokens = self._tokens(text)
+        self._expire(tokens)
+        chars = [k for k, _ in tokens if k != "stop"]
+        self.spelling = bool(chars) and all(k in ("letter", "digit", "symbol", "fix") for k in chars)
+        if self.spelling:
+            # a chunk of nothing but characters is deliberate; its partial values survive ordinary words
+            self.phone.spelled = self.phone.spelled or "digit" in chars
+        mentioned = {CUE_WORDS[v] for k, v in tokens if k in ("filler", "word") and v in CUE_WORDS}
+        self.cues = self.asked_for | self.mentioned | mentioned
+        self.mentioned = mentioned
+        for kind, value in tokens:
+            self._step(kind, value)
+        if "phone" in self.cues and self.phone.chars:
+            self.phone.cued = True
+        self._check_email()
+        self._check_phone(final=True)
+        return self.found
+
+    def _expire(self, tokens):
+        """A partial value survives only into a chunk that goes on spelling it."""
+        kinds = {k for k, _ in tokens}
+        email_partial = self.local.chars or self.domain is not None
+        email_digits = "digit" in kinds and self.email_open and self.local.spelled
+        if email_partial and not ({"letter", "symbol"} & kinds or email_digits):
+            self._reset_email()
+        if self.phone.chars and "digit" not in kinds:
+            self.phone = _Builder()
+        if self.target not in (self.local, self.domain, self.phone):
+            self.target = None
+
+    def _step(self, kind, value):
+        if kind == "reset":
+            if self.target is self.phone:
+                self.phone = _Builder()
+            else:
+                self._reset_email()
+            self.target = None
+        elif kind == "fix":
+            if self.target is not None:
+                self.target.undo()
+        elif kind in ("filler", "stop"):
+            self._filler()
+        elif kind == "when":
+            self._filler()
+            if not self.phone.spelled:
+                self.phone = _Builder()      # "for 2 people at 7:45": the 2 was a party size
+        elif kind == "symbol":
+            self._symbol(value)
+        elif kind == "digit" and not (self.email_open and self.local.spelled):
+            if self.domain is not None:
+                self._reset_email()          # "at 7": a time, not an address
+            self.email_open = False
+            self.phone.add(value, self.chunk)
+            self.target = self.phone
+            self._check_phone(final=False)
+        elif kind == "word":
+            if not self.phone.spelled:
+                # an ordinary word ends a number said in passing ("table for four tonight")
+                self.phone = _Builder()
+            self._email_word(value)
+        else:
+            self._email_char(value, spelled=kind == "letter")
+
+    def _email_char(self, s, spelled):
+        part = self.domain if self.domain is not None else self.local
+        part.add(s, self.chunk)
+        part.spelled = part.spelled or spelled
+        self.target = part
+        self.email_open = True
+
+    def _email_word(self, w):
+        if self.domain is not None and not self.domain.spelled and self.domain.chars[-1:] not in ([], ["."], ["-"]):
+            # spoken domains alternate label and "dot"; two words in a row mean this wasn't an address
+            self._reset_email()
+        if self.domain is not None or self.local.spelled:
+            # only continues an address that is still being said ("j o h n smith", "at gmail")
+            if self.email_open:
+                self._email_char(w, spelled=False)
+            return
+        # unspelled words before "at": only the last few can belong to the address
+        if len([c for c in self.local.chars if c not in "._-+"]) >= 3:
+            self.local.chars.pop(0)
+        self._email_char(w, spelled=False)
+
+    def _symbol(self, s):
+        if s == "@":
+            if not (self.local.spelled or "email" in self.cues):
+                # "sure at gmail", "four at seven": without a cue, "at" after a plain word is just "at"
+                self.local = _Builder()
+                self.email_open = False
+            elif self.local.chars and self.domain is None and self.email_open:
+                self.domain = _Builder()
+                self.target = self.domain
+                self.email_open = True
+        elif s == "+" and not self.email_open:
+            if not self.phone.chars:
+                self.phone.add("+", self.chunk)
+                self.target = self.phone
+        elif self.email_open:
+            # "dot" and "underscore" join parts of an address but don't make ordinary words into one
+            self._email_char(s, spelled=False)
+
+    def _filler(self):
+        self.email_open = False
+        if self.domain is not None and not VALID_EMAIL_RE.match(self._email_text()):
+            self._reset_email()          # "at seven tonight" was not an address
+        elif self.domain is None and not self.local.spelled:
+            self.local = _Builder()
+
+    def _email_text(self) -> str:
+        return f"{self.local.text.strip('.')}@{self.domain.text.strip('.')}" if self.domain else ""
+
+    # ---- validation ----
+    def _check_email(self):
+        if self.domain is None:
+            return
+        email = self._email_text()
+        m = VALID_EMAIL_RE.match(email)
+        if not (m and m.group(1) in KNOWN_TLDS):
+            return
+        chunks = len(self.local.chunks | self.domain.chunks)
+        corrections = self.local.corrections + self.domain.corrections
+        confidence = 0.85 - 0.1 * corrections - 0.05 * max(0, chunks - 2)
+        if email.split("@", 1)[1] in COMMON_DOMAINS:
+            confidence += 0.05
+        self._emit("email", email, confidence, chunks, corrections)
+        self._reset_email()
+        self.target = None
+
+    def _check_phone(self, final: bool):
+        """
+        A North American number is taken as soon as it is complete (10 digits,
+        or 11 after a leading 1), so words after it can't discard it; numbers
+        with a "+" can be any length, so they are only taken at the end of a chunk.
+        """
+        digits = self.phone.text
+        plus = digits.startswith("+")
+        n = len(digits.lstrip("+"))
+        if not plus and n > 11:
+            # more digits than a number holds: the caller started again, keep the latest ten
+            self.phone.chars = list(digits[-10:])
+            self.phone.corrections += 1
+            digits, n = digits[-10:], 10
+        if plus:
+            complete = final and 11 <= n <= 15
+        else:
+            complete = n == 11 if digits[:1] == "1" else n == 10
+        if not complete:
+            return
+        value = digits if plus else digits[-10:]
+        confidence = 0.9 - 0.1 * self.phone.corrections
+        if not plus and value[0] in "01":
+            confidence -= 0.2             # no North American area code starts with 0 or 1
+        self._emit("phone", value, confidence, len(self.phone.chunks), self.phone.corrections)
+        self.phone = _Builder()
+        self.target = None
+
+    def _emit(self, kind, value, confidence, chunks, corrections):
+        current = self.slots.get(kind)
+        if current and current.value == value:
+            return
+        capture = Capture(kind, value, round(min(0.99, max(0.3, confidence)), 2), chunks, corrections)
+        self.slots[kind] = capture
+        self.found.append(capture)
+
+    # ---- prompt ----
+    def in_progress(self) -> dict:
+        """Values being spelled but not yet valid."""
+        partial = {}
+        if (self.local.spelled and len(self.local.chars) >= 2) or self.domain is not None:
+            partial["email"] = self._email_text() or self.local.text
+        # loose digits are a party size or a time unless the caller is spelling or giving a number
+        if len(self.phone.chars) >= 3 and (self.phone.spelled or self.phone.cued):
+            partial["phone"] = self.phone.text
+        return partial
+
+    def prompt_note(self) -> str:
+        """Structured slot for the LLM, or "" when nothing has been heard yet."""
+        lines = [f"- {c.kind}: {c.spoken()} (confidence {c.confidence:.2f})" for c in self.slots.values()]
+        lines += [f"- {kind} still being spelled, heard so far: {value}" for kind, value in self.in_progress().items()]
+        if not lines:
+            return ""
+        return "Contact details assembled from the caller's speech:\n" + "\n".join(lines)
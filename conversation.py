@@ -0,0 +1,101 @@
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", 1200))   # history size that triggers a summary
+CONTEXT_TOKEN_LIMIT = int(os.getenv("CONTEXT_TOKEN_LIMIT", 2000))     # history never sent above this
+CONTEXT_KEEP_RECENT = int(os.getenv("CONTEXT_KEEP_RECENT", 6))        # turns always kept verbatim
+MAX_CONTEXT_MESSAGES = int(os.getenv("MAX_CONTEXT_MESSAGES", 50))     # memory cap if summaries keep failing
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English); good enough for budgeting."""
+    return (len(text) + 3) // 4
+
+
+def message_tokens(message: dict) -> int:
+    return count_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+# ===== CONVERSATION CONTEXT =====
+class ConversationContext:
+    """
+    Per-call LLM history kept under a token budget.
+
+    The system prompt is always sent first and unchanged, so the provider can
+    reuse its prompt cache across turns and calls. Older turns are folded into
+    a running summary (sent right after the prompt) by compact(), which the
+    stream server runs in the background after a reply, never on the hot path.
+    """
+
+    def __init__(self, budget=CONTEXT_TOKEN_BUDGET, limit=CONTEXT_TOKEN_LIMIT, keep_recent=CONTEXT_KEEP_RECENT):
+        self.budget = budget
+        self.limit = limit
+        self.keep_recent = keep_recent
+        self.turns = []
+        self.summary = ""
+        self.compacting = False
+
+    def __len__(self):
+        return len(self.turns)
+
+    def __iter__(self):
+        return iter(self.turns)
+
+    def append(self, message: dict):
+        self.turns.append(message)
+        if len(self.turns) > MAX_CONTEXT_MESSAGES:
+            del self.turns[0]
+
+    def clear(self):
+        self.turns.clear()
+        self.summary = ""
+
+    def history_tokens(self) -> int:
+        return sum(message_tokens(m) for m in self.turns) + (count_tokens(self.summary) if self.summary else 0)
+
+    def messages(self, system_prompt: str, note: str = ""):
+        """
+        Prompt for the next completion: fixed prefix, summary, an optional
+        per-turn note (e.g. captured contact details), then as many recent
+        turns as fit the limit.
+        """
+        prefix = [{"role": "system", "content": system_prompt}]
+        if self.summary:
+            prefix.append({"role": "system", "content": f"Summary of the call so far:\n{self.summary}"})
+        if note:
+            prefix.append({"role": "system", "content": note})
+
+        budget = self.limit - (count_tokens(self.summary) if self.summary else 0)
+        recent = []
+        for m in reversed(self.turns):
+            budget -= message_tokens(m)
+            if budget < 0 and recent:
+                break
+            recent.append(m)
+        return prefix + recent[::-1]
+
+    def needs_compaction(self) -> bool:
+        return not self.compacting and len(self.turns) > self.keep_recent and self.history_tokens() > self.budget
+
+    async def compact(self, summarize):
+        """Fold everything but the most recent turns into the summary via summarize(summary, turns)."""
+        if not self.needs_compaction():
+            return
+        self.compacting = True
+        try:
+            old = self.turns[: len(self.turns) - self.keep_recent]
+            summary = await summarize(self.summary, old)
+            if summary:
+                self.summary = summary.strip()
+                # append() may have added turns or trimmed the oldest meanwhile; drop up to the last
+                # summarized turn itself (by identity: equal messages can repeat), nothing after it
+                last = next((i for i, m in enumerate(self.turns) if m is old[-1]), -1)
+                del self.turns[: last + 1]
+        except Exception as e:
+            print("⚠ Context summary failed:", e)
+        finally:
+            self.compacting = False
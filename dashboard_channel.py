@@ -0,0 +1,96 @@
+import os, asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+# base URL of app.py; the stream server keeps one Socket.IO connection to its /ingest namespace
+DASHBOARD_URL = os.getenv("DASHBOARD_URL") or (os.getenv("FLASK_SOCKET_URL") or "").rsplit("/update", 1)[0]
+DASHBOARD_INGEST_TOKEN = os.getenv("DASHBOARD_INGEST_TOKEN", "")
+DASHBOARD_FLUSH_MS = int(os.getenv("DASHBOARD_FLUSH_MS", 20))       # events arriving this close together share a batch
+DASHBOARD_MAX_PENDING = int(os.getenv("DASHBOARD_MAX_PENDING", 5000))
+INGEST_NAMESPACE = "/ingest"
+
+
+class DashboardChannel:
+    """
+    One persistent connection from the stream server to the dashboard app.
+
+    send() only queues; a single sender emits everything queued since its last
+    emit as one "events" batch, so a burst across many calls costs one message.
+    Events given a coalesce key (interim transcripts) replace any queued event
+    with the same call and key, so only the latest text is ever sent. While the
+    dashboard is unreachable events are held, oldest dropped past max_pending.
+    """
+
+    def __init__(self, url=DASHBOARD_URL, token=DASHBOARD_INGEST_TOKEN,
+                 flush_ms=DASHBOARD_FLUSH_MS, max_pending=DASHBOARD_MAX_PENDING):
+        self.url = url
+        self.token = token
+        self.flush_seconds = flush_ms / 1000
+        self.max_pending = max_pending
+        self.client = None         # created on first use; socketio's client pulls in requests
+        self.pending = {}          # (call sid, coalesce key or sequence) -> event, in arrival order
+        self.seq = 0
+        self.dropped = 0
+        self.wake = None
+        self.task = None
+
+    def send(self, event: str, call_sid: str, data: dict, coalesce: str = None):
+        if self.task is None:
+            self.wake = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+        self.seq += 1
+        key = (call_sid, coalesce if coalesce else self.seq)
+        self.pending.pop(key, None)   # a coalesced event moves to the back with its new contents
+        self.pending[key] = {"event": event, "callSid": call_sid, "data": data}
+        if len(self.pending) > self.max_pending:
+            self.pending.pop(next(iter(self.pending)))
+            self.dropped += 1
+        self.wake.set()
+
+    @property
+    def connected(self) -> bool:
+        return self.client is not None and self.client.connected
+
+    async def _connect(self):
+        if self.client is None:
+            import socketio
+            self.client = socketio.AsyncClient(reconnection=True, logger=False, engineio_logger=False)
+        delay = 0.5
+        while not self.client.connected:
+            try:
+                await self.client.connect(self.url, namespaces=[INGEST_NAMESPACE], auth={"token": self.token},
+                                          transports=["websocket"], wait_timeout=5)
+                print(f"📡 Dashboard channel connected: {self.url}")
+            except Exception as e:
+                print(f"⚠ Dashboard channel unavailable ({e}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 10)
+
+    async def _run(self):
+        while True:
+            await self.wake.wait()
+            if not self.connected:
+                await self._connect()
+            self.wake.clear()
+            sent, self.pending = self.pending, {}
+            try:
+                await self.client.emit("events", list(sent.values()), namespace=INGEST_NAMESPACE)
+            except Exception as e:
+                print("⚠ Dashboard batch failed:", e)
+                # put them back ahead of anything queued meanwhile, under their own keys so an
+                # interim queued since still replaces the stale one instead of following it
+                self.pending = {k: ev for k, ev in sent.items() if k not in self.pending} | self.pending
+                self.wake.set()
+            # let events that arrive right after an emit accumulate into the next batch
+            await asyncio.sleep(self.flush_seconds)
+
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        if self.connected:
+            if self.pending:
+                await self.client.emit("events", list(self.pending.values()), namespace=INGEST_NAMESPACE)
+            await self.client.disconnect()
@@ -0,0 +1,314 @@
+"""
+Outbound call campaigns (reservation confirmations, reminders).
+
+    python dialer.py campaign.csv --name reminders-friday
+
+Each CSV row is a phone number and, optionally, the line the AI opens with
+("Hi, this is Mia from The Restaurant confirming your table for four at
+seven tonight..."). Answered calls fetch app.py's /outbound TwiML, which opens
+the same media stream as inbound calls, so the stream server handles them
+like any other call. Twilio's status callbacks come back to this process's
+/status route (DIALER_PUBLIC_URL must reach DIALER_PORT).
+"""
+import os, csv, json, time, asyncio, argparse
+from dataclasses import dataclass, asdict
+from urllib.parse import urlencode
+from aiohttp import web
+from dotenv import load_dotenv
+from clients import twilio, http_session, close_clients
+
+load_dotenv()
+
+# ===== SETTINGS =====
+TWILIO_NUMBER = os.getenv("TWILIO_NUMBER")
+PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")                          # app.py, serves /outbound TwiML
+DIALER_PORT = int(os.getenv("DIALER_PORT", 5050))
+DIALER_PUBLIC_URL = os.getenv("DIALER_PUBLIC_URL", f"http://127.0.0.1:{DIALER_PORT}")
+# app.py's /status, told about campaign calls too so the dashboard sees them end (empty = don't forward)
+STATUS_CALLBACK_URL = os.getenv("STATUS_CALLBACK_URL", "")
+CAMPAIGN_DIR = os.getenv("CAMPAIGN_DIR", os.path.join("logs", "campaigns"))
+
+DIAL_CALLS_PER_SECOND = float(os.getenv("DIAL_CALLS_PER_SECOND", 1))     # Twilio's default outbound CPS per account
+DIAL_BURST = int(os.getenv("DIAL_BURST", 1))                              # calls that may start back to back
+DIAL_PACING = float(os.getenv("DIAL_PACING", 0.9))        # share of the CPS actually used; jitter eats the rest
+DIAL_MAX_CONCURRENT = int(os.getenv("DIAL_MAX_CONCURRENT", 10))          # campaign calls ringing or connected at once
+DIAL_RING_SECONDS = int(os.getenv("DIAL_RING_SECONDS", 30))              # then Twilio reports no-answer
+DIAL_MAX_CALL_SECONDS = int(os.getenv("DIAL_MAX_CALL_SECONDS", 600))     # Twilio hangs up after this long
+DIAL_ATTEMPTS = int(os.getenv("DIAL_ATTEMPTS", 4))                       # tries when Twilio refuses the request
+DIAL_RETRY_SECONDS = float(os.getenv("DIAL_RETRY_SECONDS", 2))           # doubles after each refusal
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+TERMINAL = {"completed", "busy", "failed", "no-answer", "canceled"}
+
+
+# ===== PACING =====
+class TokenBucket:
+    """rate tokens per second, at most burst saved up; take() waits for one."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    async def take(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+@dataclass
+class Dial:
+    number: str
+    greeting: str = ""
+    queued_at: float = 0.0
+    placed_at: float = None        # Twilio accepted the call
+    request_ms: float = None       # how long the create request took
+    call_sid: str = None
+    status: str = "queued"
+    attempts: int = 0
+    answered_at: float = None
+    ended_at: float = None
+    duration: int = 0
+    error: str = None
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else None
+
+
+# ===== CAMPAIGN =====
+class Campaign:
+    """
+    Dials a list of numbers within two budgets: a token bucket paces call
+    creation just under calls_per_second (Twilio refuses faster ones with
+    429, counting by when requests reach it, not when they were sent), and
+    at most max_concurrent campaign calls are ringing or connected at once. A
+    call's slot is freed by its terminal status callback, or after its ring
+    and call time limits if that callback never arrives.
+
+    place(dial) -> call sid creates the call. Finished calls are appended to
+    CAMPAIGN_DIR/<name>.jsonl; numbers already there are skipped, so a
+    campaign that was interrupted can be started again.
+    """
+
+    def __init__(self, name: str, dials, place, calls_per_second=DIAL_CALLS_PER_SECOND, burst=DIAL_BURST,
+                 max_concurrent=DIAL_MAX_CONCURRENT, pacing=DIAL_PACING, attempts=DIAL_ATTEMPTS,
+                 retry_seconds=DIAL_RETRY_SECONDS, call_timeout=DIAL_RING_SECONDS + DIAL_MAX_CALL_SECONDS + 60,
+                 path=CAMPAIGN_DIR):
+        self.name = name
+        self.place = place
+        self.bucket = TokenBucket(calls_per_second * pacing, burst)
+        self.max_concurrent = max_concurrent
+        self.attempts = attempts
+        self.retry_seconds = retry_seconds
+        self.call_timeout = call_timeout
+        self.results_path = os.path.join(path, f"{name}.jsonl")
+        finished = self._finished_numbers()
+        self.dials = [d for d in dials if d.number not in finished]
+        self.skipped = len(dials) - len(self.dials)
+        self.by_sid = {}
+        self.ended = {}            # call sid -> Event set by its terminal status
+        self.early = {}            # statuses that arrived before the create request returned
+        self.active = 0
+        self.peak = 0
+        self.refused = 0           # create requests Twilio turned down for rate (429)
+        self.started_at = None
+        self.finished_at = None
+
+    def _finished_numbers(self) -> set:
+        if not os.path.exists(self.results_path):
+            return set()
+        with open(self.results_path, encoding="utf-8") as f:
+            return {json.loads(line)["number"] for line in f if line.strip()}
+
+    def _write_result(self, dial: Dial):
+        os.makedirs(os.path.dirname(self.results_path) or ".", exist_ok=True)
+        with open(self.results_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(asdict(dial)) + "\n")
+
+    async def run(self):
+        self.started_at = time.time()
+        for dial in self.dials:
+            dial.queued_at = self.started_at
+        slots = asyncio.Semaphore(self.max_concurrent)
+        calls = []
+        for dial in self.dials:
+            await slots.acquire()
+            await self.bucket.take()
+            calls.append(asyncio.create_task(self._call(dial, slots)))
+        await asyncio.gather(*calls)
+        self.finished_at = time.time()
+
+    async def _call(self, dial: Dial, slots: asyncio.Semaphore):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            if not await self._create(dial):
+                return
+            ended = self.ended[dial.call_sid] = asyncio.Event()
+            self.by_sid[dial.call_sid] = dial
+            for status, duration in self.early.pop(dial.call_sid, []):
+                self.status(dial.call_sid, status, duration)
+            try:
+                await asyncio.wait_for(ended.wait(), self.call_timeout)
+            except asyncio.TimeoutError:
+                dial.status, dial.error = "unknown", "no final status callback"
+        finally:
+            self.active -= 1
+            slots.release()
+            self.ended.pop(dial.call_sid, None)
+            await asyncio.get_running_loop().run_in_executor(None, self._write_result, dial)
+
+    async def _create(self, dial: Dial) -> bool:
+        for attempt in range(1, self.attempts + 1):
+            dial.attempts = attempt
+            t0 = time.time()
+            try:
+                dial.call_sid = await self.place(dial)
+                dial.placed_at = time.time()
+                dial.request_ms = round((dial.placed_at - t0) * 1000, 1)
+                dial.status = "initiated"
+                return True
+            except Exception as e:
+                status = getattr(e, "status", None)
+                dial.error = str(e)
+                if status not in RETRY_STATUSES or attempt == self.attempts:
+                    print(f"⚠ Could not call {dial.number}: {e}")
+                    dial.status = "failed"
+                    return False
+                self.refused += status == 429
+                await asyncio.sleep(self.retry_seconds * 2 ** (attempt - 1))
+                await self.bucket.take()    # a retry is a new call attempt as far as Twilio's CPS is concerned
+        return False
+
+    def status(self, call_sid: str, status: str, duration=None):
+        """One Twilio status callback for a campaign call."""
+        dial = self.by_sid.get(call_sid)
+        if dial is None:
+            self.early.setdefault(call_sid, []).append((status, duration))
+            return
+        if dial.status in TERMINAL:
+            return      # callbacks can arrive out of order; the terminal one wins
+        dial.status = status
+        if status == "in-progress" and dial.answered_at is None:
+            dial.answered_at = time.time()
+        if status in TERMINAL:
+            dial.ended_at = time.time()
+            dial.duration = int(duration or 0)
+            if call_sid in self.ended:
+                self.ended[call_sid].set()
+
+    def report(self) -> dict:
+        """Throughput and outcome summary of the campaign so far."""
+        placed = [d for d in self.dials if d.placed_at]
+        outcomes = {}
+        for d in self.dials:
+            outcomes[d.status] = outcomes.get(d.status, 0) + 1
+        span = (max(d.placed_at for d in placed) - min(d.placed_at for d in placed)) if len(placed) > 1 else 0
+        waits = [d.placed_at - d.queued_at for d in placed]
+        requests = [d.request_ms for d in placed]
+        return {
+            "campaign": self.name,
+            "numbers": len(self.dials),
+            "skipped": self.skipped,
+            "placed": len(placed),
+            "outcomes": outcomes,
+            "calls_per_min": round((len(placed) - 1) / span * 60, 1) if span else None,
+            "target_calls_per_min": round(self.bucket.rate * 60, 1),
+            "queue_wait_p50_s": round(_percentile(waits, 0.5), 2) if waits else None,
+            "queue_wait_max_s": round(max(waits), 2) if waits else None,
+            "create_p95_ms": _percentile(requests, 0.95),
+            "peak_concurrent": self.peak,
+            "refused_429": self.refused,
+            "elapsed_s": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else None,
+        }
+
+
+# ===== TWILIO =====
+async def place_call(dial: Dial) -> str:
+    """Create one outbound call whose TwiML (app.py /outbound) connects it to the stream server."""
+    query = urlencode({"greeting": dial.greeting}) if dial.greeting else ""
+    call = await twilio().calls.create_async(
+        to=dial.number,
+        from_=TWILIO_NUMBER,
+        url=f"{PUBLIC_BASE_URL}/outbound" + (f"?{query}" if query else ""),
+        status_callback=f"{DIALER_PUBLIC_URL}/status",
+        status_callback_event=["initiated", "ringing", "answered", "completed"],
+        status_callback_method="POST",
+        timeout=DIAL_RING_SECONDS,
+        time_limit=DIAL_MAX_CALL_SECONDS,
+    )
+    return call.sid
+
+
+async def serve_status(campaign: Campaign, port: int = DIALER_PORT) -> web.AppRunner:
+    """Twilio status callbacks for campaign calls; GET /campaign returns report()."""
+    async def status(request):
+        form = await request.post()
+        call_status = form.get("CallStatus")
+        campaign.status(form.get("CallSid"), call_status, form.get("CallDuration"))
+        if STATUS_CALLBACK_URL and call_status in TERMINAL:
+            asyncio.create_task(forward_status(dict(form)))
+        return web.Response(text="OK")
+
+    async def report(request):
+        return web.json_response(campaign.report())
+
+    app = web.Application()
+    app.router.add_post("/status", status)
+    app.router.add_get("/campaign", report)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
+
+
+async def forward_status(form: dict):
+    try:
+        async with http_session().post(STATUS_CALLBACK_URL, data=form) as r:
+            await r.read()
+    except Exception as e:
+        print("⚠ Could not forward call status to app.py:", e)
+
+
+def load_numbers(path: str):
+    """CSV rows of number[,greeting]; a header row and blank lines are skipped."""
+    dials = []
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].strip().lower() in ("number", "phone", "to"):
+                continue
+            dials.append(Dial(row[0].strip(), row[1].strip() if len(row) > 1 else ""))
+    return dials
+
+
+async def main(args):
+    campaign = Campaign(args.name, load_numbers(args.numbers), place_call, calls_per_second=args.cps,
+                        burst=args.burst, max_concurrent=args.max_concurrent)
+    runner = await serve_status(campaign, args.port)
+    print(f"📣 Campaign {args.name}: {len(campaign.dials)} number(s) to call "
+          f"({campaign.skipped} already done), {args.cps:g}/s, {args.max_concurrent} at once")
+    try:
+        await campaign.run()
+    finally:
+        await runner.cleanup()
+        await close_clients()
+    print(json.dumps(campaign.report(), indent=2))
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("numbers", help="CSV of number[,greeting]")
+    ap.add_argument("--name", default=time.strftime("campaign-%Y%m%d-%H%M%S"))
+    ap.add_argument("--cps", type=float, default=DIAL_CALLS_PER_SECOND, help="calls started per second")
+    ap.add_argument("--burst", type=int, default=DIAL_BURST)
+    ap.add_argument("--max-concurrent", type=int, default=DIAL_MAX_CONCURRENT)
+    ap.add_argument("--port", type=int, default=DIALER_PORT, help="port for Twilio's status callbacks")
+    asyncio.run(main(ap.parse_args()))
@@ -0,0 +1,161 @@
+import os, re, threading
+from collections import defaultdict
+from dataclasses import dataclass
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+FAQ_MIN_SCORE = float(os.getenv("FAQ_MIN_SCORE", 1.0))    # keyword weight needed for a canned answer
+FAQ_MARGIN = float(os.getenv("FAQ_MARGIN", 0.5))          # ...and how far ahead of the runner-up it must be
+FAQ_MAX_WORDS = int(os.getenv("FAQ_MAX_WORDS", 14))       # longer turns usually carry more than one question
+
+WORD = re.compile(r"[a-z']+")
+
+# words that mean the caller is doing more than asking a fact, so GPT has to handle the turn
+FALLBACK_WORDS = {
+    "book", "booking", "reservation", "reserve", "table", "party", "people", "guests", "cancel", "change",
+    "my", "name", "email", "vegetarian", "vegan", "gluten", "allergy", "allergic", "price", "cost",
+    "much", "cheap", "expensive", "but", "also", "recommend", "best", "special", "specials",
+    "parking", "park", "branch", "branches", "other", "kitchen",
+}
+# RESTAURANT_INFO gives one set of timings; which days or holidays they cover is GPT's to say it doesn't know
+DAY_WORDS = {
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "mondays", "tuesdays", "wednesdays", "thursdays", "fridays", "saturdays", "sundays",
+    "weekend", "weekends", "weekday", "weekdays", "holiday", "holidays", "christmas", "easter",
+    "thanksgiving", "eve", "year's", "years", "july",
+}
+
+
+@dataclass
+class FAQ:
+    intent: str
+    answer: str
+    keywords: dict    # word -> weight
+
+
+def parse_info(info: str) -> dict:
+    """Split the RESTAURANT_INFO block into its fields; list sections become lists/dicts."""
+    fields, section = {}, None
+    for line in info.strip().splitlines():
+        item = line.strip()
+        if item.startswith("- "):
+            item = item[2:]
+            if ":" in item:
+                key, value = item.split(":", 1)
+                fields.setdefault(section, {})[key.strip()] = [v.strip() for v in value.split(",")]
+            else:
+                fields.setdefault(section, []).append(item.rstrip("."))
+        elif ":" in item:
+            key, value = item.split(":", 1)
+            section = key.strip()
+            if value.strip():
+                fields[section] = value.strip()
+    return fields
+
+
+def _join(items) -> str:
+    return items[0] if len(items) == 1 else ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def build_faqs(info: str) -> list:
+    """Canned answers for the questions RESTAURANT_INFO fully covers, worded for speech."""
+    f = parse_info(info)
+    menu = f.get("Menu Highlights", {})
+    policies = " ".join(f.get("Policies", [])).lower()
+    opens, _, closes = (f.get("Timings") or "").replace("–", "-").partition("-")
+    faqs = [
+        FAQ("hours", f"Our timings are {opens.strip()} to {closes.strip()}.",
+            {"open": 1.0, "opening": 1.0, "close": 0.8, "closing": 1.0, "closed": 1.0, "hours": 1.0,
+             "timings": 1.0, "time": 0.4, "when": 0.4}),
+        FAQ("location", f"We're located at {f.get('Location')}.",
+            # "location" alone also comes up in "a location in Dallas" or "parking near your location"
+            {"where": 1.0, "address": 1.0, "directions": 1.0, "located": 0.6, "location": 0.4}),
+        FAQ("contact", f"You can reach us at {f.get('Contact')}.",
+            {"phone": 1.0, "contact": 1.0, "number": 0.6, "call": 0.4}),
+        FAQ("menu", f"We serve {f.get('Cuisine')} food. Some favourites are "
+                    f"{_join([dishes[0] for dishes in menu.values()])}.",
+            {"menu": 1.0, "cuisine": 1.0, "food": 0.8, "serve": 0.8, "dishes": 0.8}),
+    ]
+    if "delivery" in policies:
+        takeout = "takeout and curbside pickup are available" if "takeout" in policies else "pickup is available"
+        answer = (f"Sorry, we don't offer home delivery, but {takeout}." if "no home delivery" in policies
+                  else f"Yes, we deliver, and {takeout}.")
+        faqs.append(FAQ("delivery", answer, {"deliver": 1.0, "delivery": 1.0, "deliveries": 1.0,
+                                             "takeout": 1.0, "pickup": 1.0, "curbside": 1.0}))
+    courses = {
+        "Starters": ("starters", {"starter": 1.0, "starters": 1.0, "appetizer": 1.0, "appetizers": 1.0}),
+        "Desserts": ("desserts", {"dessert": 1.0, "desserts": 1.0, "sweet": 0.8, "sweets": 0.8}),
+        "Beverages": ("drinks", {"drink": 1.0, "drinks": 1.0, "beverages": 1.0, "beverage": 1.0}),
+        "Main Course": ("mains", {"main": 1.0, "mains": 1.0, "entree": 1.0, "entrees": 1.0}),
+    }
+    for section, (intent, keywords) in courses.items():
+        if section in menu:
+            faqs.append(FAQ(intent, f"For {section.lower()} we have {_join(menu[section])}.", keywords))
+    return faqs
+
+
+# ===== INTENT INDEX =====
+class FAQIndex:
+    """
+    Keyword index over the canned answers. match() only returns an answer for
+    short, single-question turns whose best intent clearly beats the others;
+    anything ambiguous returns None and goes to GPT.
+    """
+
+    def __init__(self, faqs, min_score=FAQ_MIN_SCORE, margin=FAQ_MARGIN, max_words=FAQ_MAX_WORDS):
+        self.faqs = faqs
+        self.min_score = min_score
+        self.margin = margin
+        self.max_words = max_words
+        self.by_intent = {faq.intent: faq for faq in faqs}
+        self.index = defaultdict(list)    # word -> [(intent, weight)]
+        for faq in faqs:
+            for word, weight in faq.keywords.items():
+                self.index[word].append((faq.intent, weight))
+        self.lock = threading.Lock()
+        self.hits = defaultdict(int)
+        self.fallbacks = 0
+
+    def match(self, text: str, record: bool = True):
+        """The FAQ this text asks, or None; record=False checks without counting it in stats()."""
+        words = WORD.findall(text.lower())
+        faq = self._best(words) if words and len(words) <= self.max_words else None
+        if not record:
+            return faq
+        with self.lock:
+            if faq:
+                self.hits[faq.intent] += 1
+            else:
+                self.fallbacks += 1
+        return faq
+
+    def _best(self, words):
+        unique = set(words)
+        if unique & FALLBACK_WORDS or unique & DAY_WORDS:
+            return None
+        scores = defaultdict(float)
+        for word in unique:
+            for intent, weight in self.index.get(word, ()):
+                scores[intent] += weight
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+        best, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        # a second confident intent means two questions in one turn
+        if score < self.min_score or score - runner_up < self.margin or runner_up >= self.min_score:
+            return None
+        return self.by_intent[best]
+
+    def stats(self) -> dict:
+        with self.lock:
+            hits = sum(self.hits.values())
+            total = hits + self.fallbacks
+            return {
+                "hits": hits,
+                "fallbacks": self.fallbacks,
+                "hit_rate": round(hits / total, 3) if total else 0.0,
+                "by_intent": dict(self.hits),
+            }
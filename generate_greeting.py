@@ -1,6 +1,7 @@
 import os
 from openai import OpenAI
 from dotenv import load_dotenv
+from tts_cache import TTSCache
 
 # Load .env environment variables
 load_dotenv()
@@ -26,13 +27,19 @@ output_path = os.path.join(tts_dir, "greeting.mp3")
 
 print("🎤 Generating Nova greeting...")
 
-speech = client.audio.speech.create(
-    model="gpt-4o-mini-tts",
-    voice="nova",
-    input=GREETING_TEXT,
-)
+def synth(text):
+    speech = client.audio.speech.create(
+        model="gpt-4o-mini-tts",
+        voice="nova",
+        input=text,
+    )
+    return speech.read()
+
+# Re-running with unchanged text reuses the cached audio instead of calling the API
+cache = TTSCache()
+audio = cache.get_or_create(GREETING_TEXT, synth, voice="nova", model="gpt-4o-mini-tts", fmt="mp3")
 
 with open(output_path, "wb") as f:
-    f.write(speech.read())
+    f.write(audio)
 
 print("✅ Saved greeting as:", output_path)
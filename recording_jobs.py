@@ -0,0 +1,222 @@
+import os, asyncio
+import aiohttp
+from dotenv import load_dotenv
+from clients import http_session, twilio, TWILIO_API_BASE_URL
+
+load_dotenv()
+
+# ===== SETTINGS =====
+TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
+TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
+
+RECORDINGS_DIR = os.path.join("static", "recordings")
+GREETING_PATH = os.path.join("static", "tts", "greeting.mp3")
+RECORDING_WORKERS = int(os.getenv("RECORDING_WORKERS", 2))
+RECORDING_QUEUE_SIZE = int(os.getenv("RECORDING_QUEUE_SIZE", 100))
+RECORDING_ATTEMPTS = int(os.getenv("RECORDING_ATTEMPTS", 6))
+RECORDING_RETRY_SECONDS = float(os.getenv("RECORDING_RETRY_SECONDS", 5))   # doubles after each try
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+
+
+class NotReady(Exception):
+    """Twilio hasn't finished processing the recording yet; try again later."""
+
+
+# ===== MP3 CONCATENATION (no re-encode) =====
+def _mp3_frames_span(path: str):
+    """(start, end) byte offsets of the MPEG frames, skipping ID3v2 at the front and ID3v1 at the back."""
+    size = os.path.getsize(path)
+    start, end = 0, size
+    with open(path, "rb") as f:
+        head = f.read(10)
+        if len(head) == 10 and head[:3] == b"ID3":
+            # syncsafe tag size: 7 bits per byte; +10 for the header, +10 more if a footer is present
+            start = 10 + ((head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9])
+            if head[5] & 0x10:
+                start += 10
+        if size - start >= 128:
+            f.seek(size - 128)
+            if f.read(3) == b"TAG":
+                end = size - 128
+    return start, end
+
+
+def mp3_format(path: str):
+    """(sample rate, channels) from the first MPEG audio frame header, or None if there is none."""
+    start, end = _mp3_frames_span(path)
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(min(end - start, 4096))
+    for i in range(len(data) - 3):
+        b1, b2, b3, b4 = data[i:i + 4]
+        if b1 != 0xFF or b2 & 0xE0 != 0xE0:
+            continue
+        version, layer, bitrate, rate = (b2 >> 3) & 3, (b2 >> 1) & 3, b3 >> 4, (b3 >> 2) & 3
+        if version == 1 or layer == 0 or bitrate == 15 or rate == 3:
+            continue     # reserved values: not a frame header
+        # MPEG-1 / MPEG-2 / MPEG-2.5 halve the sample rate in turn
+        shift = {3: 0, 2: 1, 0: 2}[version]
+        return (44100, 48000, 32000)[rate] >> shift, 1 if b4 >> 6 == 3 else 2
+    return None
+
+
+def concat_mp3(paths, output_path: str) -> str:
+    """
+    Join MP3 files by copying their frames back to back. MP3 frames are
+    self-contained, so no decode or re-encode is needed; tags are dropped.
+    Players take the format from the first frame, so every file must share
+    its sample rate and channels; ValueError otherwise.
+    """
+    formats = {path: mp3_format(path) for path in paths}
+    if len(set(formats.values())) > 1:
+        raise ValueError(f"MP3 formats differ: {formats}")
+    tmp = output_path + ".part"
+    with open(tmp, "wb") as out:
+        for path in paths:
+            start, end = _mp3_frames_span(path)
+            with open(path, "rb") as f:
+                f.seek(start)
+                remaining = end - start
+                while remaining > 0:
+                    block = f.read(min(DOWNLOAD_CHUNK_BYTES, remaining))
+                    if not block:
+                        break
+                    out.write(block)
+                    remaining -= len(block)
+    os.replace(tmp, output_path)
+    return output_path
+
+
+# ===== JOB QUEUE =====
+class RecordingJobs:
+    """
+    Post-call recording work, off the call path: wait for Twilio to finalize
+    the recording, stream it to disk, prepend the greeting and tell the
+    dashboard. A fixed number of workers bounds concurrent downloads; jobs
+    that find the recording still processing are retried with backoff.
+    """
+
+    def __init__(self, publish, workers=RECORDING_WORKERS, max_queue=RECORDING_QUEUE_SIZE,
+                 attempts=RECORDING_ATTEMPTS, retry_seconds=RECORDING_RETRY_SECONDS):
+        self.publish = publish      # async (call sid, path) -> None, once the merged file is saved
+        self.n_workers = workers
+        self.max_queue = max_queue
+        self.attempts = attempts
+        self.retry_seconds = retry_seconds
+        self.queue = None
+        self.workers = []
+        self.retries = set()
+
+    def submit(self, call_sid: str, attempt: int = 1):
+        if self.queue is None:
+            self.queue = asyncio.Queue(self.max_queue)
+            self.workers = [asyncio.create_task(self._run()) for _ in range(self.n_workers)]
+        try:
+            self.queue.put_nowait((call_sid, attempt))
+        except asyncio.QueueFull:
+            print(f"⚠ Recording queue full, dropping job for {call_sid}")
+
+    async def _run(self):
+        while True:
+            call_sid, attempt = await self.queue.get()
+            try:
+                await self.process(call_sid)
+            except NotReady as e:
+                if attempt < self.attempts:
+                    self._retry_later(call_sid, attempt, e)
+                else:
+                    print(f"⚠ Recording for {call_sid} never became ready: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠ Recording job failed for {call_sid}:", e)
+            finally:
+                self.queue.task_done()
+
+    def _retry_later(self, call_sid, attempt, reason):
+        delay = self.retry_seconds * 2 ** (attempt - 1)
+        print(f"⏳ Recording for {call_sid} not ready ({reason}), retrying in {delay:.1f}s")
+
+        async def later():
+            await asyncio.sleep(delay)
+            self.submit(call_sid, attempt + 1)
+
+        # the wait happens outside the workers so it doesn't hold a download slot
+        task = asyncio.create_task(later())
+        self.retries.add(task)
+        task.add_done_callback(self.retries.discard)
+
+    async def process(self, call_sid: str):
+        recordings = await twilio().recordings.list_async(call_sid=call_sid)
+        if not recordings:
+            raise NotReady("no recording listed yet")
+        rec = recordings[0]
+        if rec.status in ("failed", "absent", "deleted"):
+            print(f"⚠ Twilio recording {rec.sid} is {rec.status}, skipping.")
+            return
+        if rec.status != "completed":
+            raise NotReady(rec.status)
+
+        raw_path = await self.download(rec)
+        final_path = os.path.join(RECORDINGS_DIR, f"final_{call_sid}.mp3")
+        greeting = await self.greeting_for(raw_path)
+        parts = [greeting, raw_path] if greeting else [raw_path]
+        await asyncio.get_running_loop().run_in_executor(None, concat_mp3, parts, final_path)
+        print(f"🎧 Final recording saved: {final_path}")
+        await self.publish(call_sid, final_path)
+
+    async def greeting_for(self, recording: str):
+        """
+        greeting.mp3 in the recording's sample rate and channels, re-encoded
+        with ffmpeg once per format; None if that isn't possible, in which
+        case the recording is saved without the greeting.
+        """
+        if not os.path.exists(GREETING_PATH):
+            return None
+        fmt = mp3_format(recording)
+        if fmt is None:
+            return None
+        if mp3_format(GREETING_PATH) == fmt:
+            return GREETING_PATH
+
+        rate, channels = fmt
+        path = os.path.join(os.path.dirname(GREETING_PATH), f"greeting_{rate}_{channels}.mp3")
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(GREETING_PATH):
+            return path
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "ffmpeg", "-loglevel", "error", "-y", "-i", GREETING_PATH, "-ar", str(rate), "-ac", str(channels),
+                "-f", "mp3", path + ".part", stderr=asyncio.subprocess.PIPE)
+            _, err = await proc.communicate()
+            if proc.returncode:
+                raise RuntimeError(err.decode(errors="replace").strip())
+        except Exception as e:
+            print(f"⚠ Saving the recording without the greeting ({rate} Hz, {channels} ch needed):", repr(e))
+            return None
+        os.replace(path + ".part", path)
+        return path
+
+    async def download(self, rec) -> str:
+        os.makedirs(RECORDINGS_DIR, exist_ok=True)
+        mp3_url = f"{TWILIO_API_BASE_URL}{rec.uri.replace('.json', '.mp3')}"
+        save_path = os.path.join(RECORDINGS_DIR, f"{rec.sid}.mp3")
+        auth = aiohttp.BasicAuth(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+        async with http_session().get(mp3_url, auth=auth) as r:
+            if r.status == 404:
+                raise NotReady("media not available yet")
+            r.raise_for_status()
+            # written as it arrives, so memory use doesn't grow with call length
+            with open(save_path + ".part", "wb") as f:
+                async for block in r.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    f.write(block)
+        os.replace(save_path + ".part", save_path)
+        print(f"📥 Downloaded Twilio recording → {save_path}")
+        return save_path
+
+    async def close(self):
+        for task in list(self.retries) + self.workers:
+            task.cancel()
+        await asyncio.gather(*self.retries, *self.workers, return_exceptions=True)
+        pending = self.queue.qsize() if self.queue else 0
+        if pending:
+            print(f"⚠ {pending} recording job(s) left unfinished at shutdown.")
@@ -0,0 +1,211 @@
+import os, json, time, asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+REPORT_DIR = os.getenv("REPORT_DIR", os.path.join("logs", "reports"))
+REPORT_CONCURRENCY = int(os.getenv("REPORT_CONCURRENCY", 2))            # report requests in flight at once
+REPORT_ATTEMPTS = int(os.getenv("REPORT_ATTEMPTS", 5))
+REPORT_RETRY_SECONDS = float(os.getenv("REPORT_RETRY_SECONDS", 10))     # doubles after each failure
+# batch mode scores several finished calls per request, only inside the off-peak hour window
+REPORT_BATCH_MODE = os.getenv("REPORT_BATCH_MODE", "0") == "1"
+REPORT_BATCH_SIZE = int(os.getenv("REPORT_BATCH_SIZE", 8))
+REPORT_BATCH_HOURS = os.getenv("REPORT_BATCH_HOURS", "0-24")            # local hours, e.g. "1-6"
+
+# ===== REPORT SCHEMA =====
+METRICS = {
+    "greeting_politeness": "Greeting & Politeness",
+    "active_listening": "Active Listening",
+    "clarity_conciseness": "Clarity & Conciseness",
+    "empathy_tone": "Empathy & Tone",
+    "accuracy": "Accuracy of Information",
+}
+LISTS = {"strengths": "Strengths", "improvements": "Areas for Improvement", "recommendations": "AI Recommendations"}
+
+
+def _number(value, high):
+    try:
+        return max(0.0, min(float(high), round(float(value), 1)))
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_report(raw: dict) -> dict:
+    """Coerce a model's JSON into the stored shape: numeric scores in range, lists of strings."""
+    scores = raw.get("scores") or {}
+    report = {
+        "overall_score": _number(raw.get("overall_score"), 100),
+        "scores": {k: _number(scores.get(k), 10) for k in METRICS},
+        "summary": str(raw.get("summary") or "").strip(),
+        "detailed_analysis": str(raw.get("detailed_analysis") or "").strip(),
+    }
+    for key in LISTS:
+        items = raw.get(key) or []
+        report[key] = [str(i).strip() for i in (items if isinstance(items, list) else [items]) if str(i).strip()]
+    return report
+
+
+def report_as_text(report: dict) -> str:
+    """Plain-text rendering in the section layout the dashboard reads."""
+    lines = [] if report["overall_score"] is None else [f"Overall Score: {report['overall_score']:g}/100"]
+    lines.append("Communication Metrics:")
+    lines += [f"- {label}: {report['scores'][k]:g}/10" for k, label in METRICS.items() if report["scores"][k] is not None]
+    lines += ["", f"Summary: {report['summary']}", "", f"Detailed Analysis: {report['detailed_analysis']}"]
+    for key, label in LISTS.items():
+        lines += ["", f"{label}:"] + [f"- {item}" for item in report[key]]
+    return "\n".join(lines)
+
+
+def in_batch_window(now=None, hours=REPORT_BATCH_HOURS) -> bool:
+    start, _, end = hours.partition("-")
+    hour = (now or datetime.now()).hour
+    start, end = int(start), int(end or 24)
+    return start <= hour < end if start <= end else (hour >= start or hour < end)
+
+
+# ===== PERSISTENT QUEUE =====
+class ReportQueue:
+    """
+    Quality reports, generated after the call instead of on its teardown path.
+
+    Each job is a small JSON file under REPORT_DIR/pending until its report is
+    written to REPORT_DIR/<CallSid>.json, so jobs survive a restart; start()
+    picks up whatever an earlier run left (with several stream workers only
+    one of them should recover). Its own workers bound concurrency, failures are
+    retried with backoff, and in batch mode several calls are scored per
+    request during the off-peak window.
+
+    score(text) -> dict and score_batch([text]) -> [dict] produce the raw
+    report JSON; publish(call_sid, report) delivers a finished report.
+    """
+
+    def __init__(self, score, score_batch, publish, path=REPORT_DIR, concurrency=REPORT_CONCURRENCY,
+                 attempts=REPORT_ATTEMPTS, retry_seconds=REPORT_RETRY_SECONDS,
+                 batch_mode=REPORT_BATCH_MODE, batch_size=REPORT_BATCH_SIZE):
+        self.score = score
+        self.score_batch = score_batch
+        self.publish = publish
+        self.path = path
+        self.pending_dir = os.path.join(path, "pending")
+        self.concurrency = concurrency
+        self.attempts = attempts
+        self.retry_seconds = retry_seconds
+        self.batch_mode = batch_mode
+        self.batch_size = batch_size
+        self.queue = None
+        self.workers = []
+        self.retries = set()
+        self.created_at = time.time()   # jobs queued after this belong to this run (or a sibling worker)
+
+    # ---- job files ----
+    def _job_path(self, call_sid):
+        return os.path.join(self.pending_dir, f"{call_sid}.json")
+
+    def _write_json(self, path, data):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _load_pending(self):
+        if not os.path.isdir(self.pending_dir):
+            return []
+        jobs = []
+        for name in sorted(os.listdir(self.pending_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.pending_dir, name), encoding="utf-8") as f:
+                    job = json.load(f)
+                if job.get("queued_at", 0) < self.created_at:
+                    jobs.append(job)
+        return jobs
+
+    async def _io(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, fn, *args)
+
+    # ---- queue ----
+    async def start(self, recover: bool = True):
+        """Start the workers and, with recover, requeue jobs left over from a previous run."""
+        if self.queue is not None:
+            return
+        self.queue = asyncio.Queue()
+        self.workers = [asyncio.create_task(self._run()) for _ in range(self.concurrency)]
+        jobs = await self._io(self._load_pending) if recover else []
+        for job in jobs:
+            self.queue.put_nowait(job)
+        if jobs:
+            print(f"📊 Resuming {len(jobs)} pending report(s).")
+
+    async def submit(self, call_sid: str, transcript: str):
+        await self.start()
+        job = {"call_sid": call_sid, "transcript": transcript, "attempt": 0, "queued_at": time.time()}
+        await self._io(self._write_json, self._job_path(call_sid), job)
+        self.queue.put_nowait(job)
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.batch_mode:
+                while not in_batch_window():
+                    await asyncio.sleep(60)
+                while len(batch) < self.batch_size and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+            try:
+                await self._process(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("⚠ Report generation failed:", e)
+                for job in batch:
+                    await self._failed(job)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _process(self, batch):
+        texts = [job["transcript"] for job in batch]
+        if len(batch) == 1:
+            results = [await self.score(texts[0])]
+        else:
+            results = await self.score_batch(texts)
+        for job, raw in zip(batch, results + [None] * (len(batch) - len(results))):
+            if isinstance(raw, dict):
+                await self._done(job, normalize_report(raw))
+            else:
+                await self._failed(job)
+
+    async def _done(self, job, report):
+        call_sid = job["call_sid"]
+        record = {"call_sid": call_sid, "created_at": time.time(), "report": report}
+        await self._io(self._write_json, os.path.join(self.path, f"{call_sid}.json"), record)
+        await self._io(os.remove, self._job_path(call_sid))
+        await self.publish(call_sid, report)
+
+    async def _failed(self, job):
+        job["attempt"] += 1
+        if job["attempt"] >= self.attempts:
+            print(f"⚠ Giving up on report for {job['call_sid']} after {job['attempt']} attempts.")
+            await self._io(os.replace, self._job_path(job["call_sid"]),
+                           os.path.join(self.path, f"{job['call_sid']}.failed.json"))
+            return
+        await self._io(self._write_json, self._job_path(job["call_sid"]), job)
+        delay = self.retry_seconds * 2 ** (job["attempt"] - 1)
+
+        async def later():
+            await asyncio.sleep(delay)
+            self.queue.put_nowait(job)
+
+        task = asyncio.create_task(later())
+        self.retries.add(task)
+        task.add_done_callback(self.retries.discard)
+
+    def depth(self) -> int:
+        return self.queue.qsize() if self.queue else 0
+
+    async def close(self):
+        """Stop the workers; unfinished jobs stay on disk for the next start()."""
+        for task in list(self.retries) + self.workers:
+            task.cancel()
+        await asyncio.gather(*self.retries, *self.workers, return_exceptions=True)
@@ -0,0 +1,193 @@
+import os, re, math, time, asyncio
+from difflib import SequenceMatcher
+from dotenv import load_dotenv
+from conversation import count_tokens, message_tokens
+
+load_dotenv()
+
+# ===== SETTINGS =====
+SPECULATION_STABLE_MS = int(os.getenv("SPECULATION_STABLE_MS", 200))   # interim unchanged and caller quiet this long -> start GPT
+SPECULATION_MATCH = float(os.getenv("SPECULATION_MATCH", 0.95))        # word similarity the final needs to keep it
+
+WORD = re.compile(r"[a-z0-9']+")
+FILLERS = {"um", "uh", "er", "erm", "hmm", "mm"}
+NUMBER_WORDS = {"zero", "oh", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine", "ten",
+                "eleven", "twelve", "fifteen", "twenty", "thirty", "half", "quarter"}
+
+
+def _words(text: str):
+    return [w for w in WORD.findall(text.lower()) if w not in FILLERS]
+
+
+def same_request(a: str, b: str, tolerance: float = SPECULATION_MATCH) -> bool:
+    """
+    Whether two transcripts of one utterance ask the same thing: case,
+    punctuation and fillers are ignored and a few other words may differ,
+    but numbers must match exactly ("at seven" vs "at eight" is a new request)
+    and so must the last word, since a caller who went on after the interim
+    ("any vegetarian" -> "any vegetarian pasta") changed what they asked.
+    """
+    wa, wb = _words(a), _words(b)
+    if wa == wb:
+        return True
+    if not wa or not wb or wa[-1] != wb[-1]:
+        return False
+    numbers = lambda ws: [w for w in ws if w.isdigit() or w in NUMBER_WORDS]
+    if numbers(wa) != numbers(wb):
+        return False
+    return SequenceMatcher(None, wa, wb, autojunk=False).ratio() >= tolerance
+
+
+# ===== ONE SPECULATIVE REPLY =====
+class Speculation:
+    """
+    A reply started from an interim transcript. Its tokens are buffered, not
+    spoken, until the final transcript either adopts it (replay() then yields
+    the buffered tokens followed by the rest as they arrive) or throws it away.
+    """
+
+    def __init__(self, text: str, messages: list, stream, spawn):
+        self.text = text
+        self.messages = messages
+        self.started_at = time.time()
+        self.first_token_at = None
+        self.items = []             # (token, usage) pairs received so far
+        self.finished = False
+        self.error = None
+        self.changed = asyncio.Event()
+        self.task = spawn(self._run(stream(messages)))
+
+    async def _run(self, items):
+        try:
+            async for token, usage in items:
+                if token and self.first_token_at is None:
+                    self.first_token_at = time.time()
+                self.items.append((token, usage))
+                self.changed.set()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.error = e
+        finally:
+            self.finished = True
+            self.changed.set()
+
+    async def replay(self):
+        i = 0
+        while True:
+            while i < len(self.items):
+                yield self.items[i]
+                i += 1
+            if self.finished:
+                if self.error:
+                    raise self.error
+                return
+            self.changed.clear()
+            await self.changed.wait()
+
+    def head_start(self) -> float:
+        """Seconds of GPT time already behind us when the final transcript arrived."""
+        now = time.time()
+        return max(0.0, min(now, self.first_token_at or now) - self.started_at)
+
+    def spent(self) -> dict:
+        """Tokens this request cost: the reported usage when it finished, else an estimate."""
+        usage = next((u for _, u in reversed(self.items) if u), None)
+        if usage:
+            return {"prompt": usage.prompt_tokens, "completion": usage.completion_tokens}
+        return {"prompt": sum(message_tokens(m) for m in self.messages),
+                "completion": count_tokens("".join(t for t, _ in self.items))}
+
+    def cancel(self):
+        self.task.cancel()
+
+
+# ===== PER-CALL SPECULATOR =====
+class Speculator:
+    """
+    Starts a GPT reply as soon as the caller's interim transcript has stopped
+    changing and the caller has been quiet for stable_ms, instead of waiting
+    for the endpointed final. Interims can sit unchanged while the caller is
+    still talking, so silence() (milliseconds since the last voiced audio)
+    keeps mid-sentence pauses from starting requests that will be thrown away.
+
+    prompt(text) returns the messages the reply would be generated from, or
+    None when that text won't go to GPT anyway (FAQ, contact spelling, noise);
+    stream(messages) yields (token, usage) pairs. When the final arrives,
+    take() keeps the speculation only if it was built from the same prompt and
+    a matching transcript; otherwise it is cancelled. outcome(result,
+    speculation) is told how every speculation ended: "hit", "miss" (the final
+    differed), "diverged" (the interim moved on first) or "unused" (the turn
+    was answered without GPT).
+    """
+
+    def __init__(self, prompt, stream, spawn, outcome=None, silence=None,
+                 stable_ms=SPECULATION_STABLE_MS, tolerance=SPECULATION_MATCH):
+        self.prompt = prompt
+        self.stream = stream
+        self.spawn = spawn
+        self.outcome = outcome or (lambda result, speculation: None)
+        self.silence = silence or (lambda: math.inf)
+        self.stable_seconds = stable_ms / 1000
+        self.tolerance = tolerance
+        self.text = ""
+        self.timer = None
+        self.current = None
+
+    def heard(self, text: str):
+        """Latest interim transcript of the utterance in progress."""
+        text = text.strip()
+        if not text or text == self.text:
+            return
+        self.text = text
+        if self.current and not same_request(self.current.text, text, self.tolerance):
+            self._end("diverged")
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+        if not self.current:
+            self.timer = self.spawn(self._settle(text))
+
+    async def _settle(self, text: str):
+        wait = self.stable_seconds
+        while wait > 0:
+            await asyncio.sleep(wait)
+            wait = self.stable_seconds - self.silence() / 1000
+        self.timer = None
+        messages = self.prompt(text)
+        if messages:
+            self.current = Speculation(text, messages, self.stream, self.spawn)
+
+    def take(self, messages: list):
+        """
+        The final transcript is in; messages is the prompt the reply needs now.
+        Returns the speculation if it was generating exactly that reply, else None.
+        """
+        self._reset()
+        speculation, self.current = self.current, None
+        if speculation is None:
+            return None
+        if (speculation.error is None and speculation.messages[:-1] == messages[:-1]
+                and same_request(speculation.messages[-1]["content"], messages[-1]["content"], self.tolerance)):
+            self.outcome("hit", speculation)
+            return speculation
+        speculation.cancel()
+        self.outcome("miss", speculation)
+        return None
+
+    def discard(self):
+        """The final transcript was handled without GPT."""
+        self._reset()
+        if self.current:
+            self._end("unused")
+
+    def _reset(self):
+        self.text = ""
+        if self.timer:
+            self.timer.cancel()
+            self.timer = None
+
+    def _end(self, result: str):
+        self.current.cancel()
+        self.outcome(result, self.current)
+        self.current = None
@@ -0,0 +1,99 @@
+import os, re, asyncio
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+MIN_SENTENCE_CHARS = int(os.getenv("MIN_SENTENCE_CHARS", 20))   # shorter pieces are merged with the next one
+
+# punctuation followed by whitespace ends a sentence; "john.doe@x.com" and "10.30" stay whole
+SENTENCE_END = re.compile(r"[.!?…]+[\"')\]]*\s+")
+# "7 p.m. tomorrow", "Dr. Smith" don't end a sentence
+ABBREVIATION = re.compile(r"(?:\b[A-Za-z]\.){2,}$|\b(?:Mr|Mrs|Ms|Dr|St|No|approx)\.$", re.IGNORECASE)
+
+
+# ===== SENTENCE SPLITTER =====
+class SentenceSplitter:
+    """Turns a stream of LLM tokens into speakable sentences as soon as each one is complete."""
+
+    def __init__(self, min_chars=MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self.pending = ""
+
+    def feed(self, token: str):
+        self.pending += token
+        sentences = []
+        start = 0
+        for m in SENTENCE_END.finditer(self.pending):
+            if ABBREVIATION.search(self.pending[start:m.end()].rstrip()):
+                continue
+            if m.end() - start >= self.min_chars:
+                sentences.append(self.pending[start:m.end()].strip())
+                start = m.end()
+        self.pending = self.pending[start:]
+        return sentences
+
+    def flush(self):
+        rest, self.pending = self.pending.strip(), ""
+        return [rest] if rest else []
+
+
+# ===== ORDERED PLAYBACK =====
+class PlaybackQueue:
+    """
+    Plays synthesized sentences strictly in order while later ones are still
+    being generated. put() takes an awaitable that resolves to the audio, so
+    synthesis of sentence N+1 overlaps playback of sentence N.
+    """
+
+    def __init__(self, play):
+        self.play = play            # async play(audio, text)
+        self.queue = asyncio.Queue()
+        self.worker = None
+        self.current = None         # audio future of the sentence being synthesized/played
+
+    def busy(self) -> bool:
+        return self.current is not None or not self.queue.empty()
+
+    def put(self, audio_future, text: str):
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self._run())
+        self.queue.put_nowait((audio_future, text))
+
+    async def _run(self):
+        while True:
+            audio_future, text = await self.queue.get()
+            self.current = audio_future
+            try:
+                audio = await audio_future
+                if audio:
+                    await self.play(audio, text)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print("⚠ Playback error:", e)
+            finally:
+                self.current = None
+                self.queue.task_done()
+
+    async def clear(self):
+        """
+        Drop everything queued or playing (caller barge-in). Pending synthesis
+        is cancelled too, so its HTTP request is aborted rather than billed and
+        thrown away. The next put() starts a fresh worker.
+        """
+        pending = [self.current] if self.current else []
+        while not self.queue.empty():
+            audio_future, _ = self.queue.get_nowait()
+            pending.append(audio_future)
+            self.queue.task_done()
+        for audio_future in pending:
+            if isinstance(audio_future, asyncio.Future):
+                audio_future.cancel()
+        if self.worker and not self.worker.done():
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+        self.worker = None
+
+    async def close(self):
+        await self.clear()
@@ -59,11 +59,23 @@
   }
 
   const socket = io();
-  socket.on("connect", () => log("Socket connected", "ok"));
+  let watching = null; // call whose room this dashboard has joined
+  let interimEl = null; // caller's in-progress line, replaced by the final transcript
+  function watchCall(callSid) {
+    if (!callSid || callSid === watching) return;
+    socket.emit("watch", { callSid, previous: watching });
+    watching = callSid;
+  }
+  socket.on("connect", () => {
+    log("Socket connected", "ok");
+    // rooms don't survive a reconnect
+    if (watching) socket.emit("watch", { callSid: watching });
+  });
   socket.on("disconnect", () => log("Socket disconnected", "err"));
 
   socket.on("call_incoming", (data) => {
     chatFeed.innerHTML = "";
+    interimEl = null;
     reportBox.style.display = "block";
     reportBox.textContent = "Report will appear here after the call ends…";
     summaryBox.textContent = "Waiting for summary…";
@@ -71,11 +83,28 @@
     badgeBox.innerHTML = "";
     hideAllSections();
     const from = data && data.from ? data.from : "Unknown number";
+    if (data) watchCall(data.callSid);
     log(`Incoming call from ${from}`, "ok");
     setState("in call");
   });
 
+  socket.on("interim", (data) => {
+    if (!data.text) return;
+    if (!interimEl) {
+      interimEl = document.createElement("div");
+      interimEl.className = "msg caller";
+      interimEl.style.opacity = 0.6;
+      chatFeed.appendChild(interimEl);
+    }
+    interimEl.textContent = `Caller: ${data.text}…`;
+    chatFeed.scrollTop = chatFeed.scrollHeight;
+  });
+
   socket.on("update", (data) => {
+    if (data.caller && interimEl) {
+      interimEl.remove();
+      interimEl = null;
+    }
     if (data.caller) appendMsg("caller", data.caller);
     if (data.suggestion) appendMsg("ai", data.suggestion);
   });
@@ -85,7 +114,7 @@
     const summary = extractSummary(text);
     summaryBox.textContent = summary || "Summary not found in report.";
 
-    const metrics = extractSubScores(text);
+    const metrics = data.scores ? scoresToMetrics(data.scores) : extractSubScores(text);
     renderMetrics(metrics);
     renderBadges(metrics);
 
@@ -97,7 +126,20 @@
     log("Quality report received", "ok");
   });
 
-  socket.on("call_ended", () => {
+  socket.on("call_recording", (data) => {
+    if (data && data.url) log(`Call recording ready: <a href="${data.url}" target="_blank">listen</a>`, "ok");
+  });
+
+  socket.on("active_calls", (data) => {
+    const calls = (data && data.calls) || [];
+    if (watching || !calls.length) return;
+    watchCall(calls[calls.length - 1]);
+    log(`Following call in progress (${calls.length} active)`, "ok");
+    setState("in call");
+  });
+
+  socket.on("call_ended", (data) => {
+    if (data && data.callSid && watching && data.callSid !== watching) return; // another call
     log("Hanging up... (caller disconnected)", "warn");
     reset();
   });
@@ -118,6 +160,25 @@
     return m ? m[1].trim() : "";
   }
 
+  const METRIC_LABELS = {
+    greeting_politeness: "Greeting & Politeness",
+    active_listening: "Active Listening",
+    clarity_conciseness: "Clarity & Conciseness",
+    empathy_tone: "Empathy & Tone",
+    accuracy: "Accuracy of Information",
+  };
+
+  // structured report: sub-scores are already 0-10, overall is 0-100
+  function scoresToMetrics(report) {
+    const metrics = {};
+    Object.entries(METRIC_LABELS).forEach(([key, label]) => {
+      const val = report.scores && report.scores[key];
+      if (typeof val === "number") metrics[label] = val;
+    });
+    if (typeof report.overall_score === "number") metrics["Overall Score"] = report.overall_score / 10;
+    return metrics;
+  }
+
   function extractSubScores(text) {
     const metrics = {};
     const regex = /([A-Za-z& ]{3,40}):\s*(\d{1,3})(?:\s*(?:out\s*of|\/)\s*(\d+))?/gi;
@@ -1,43 +1,108 @@
-import os, io, json, base64, wave, audioop, asyncio, websockets, aiohttp, time, re, glob, requests
+import os, json, base64, asyncio, websockets, aiohttp, time, re, glob, signal, functools, contextlib
+STARTED_AT = time.monotonic()   # cold-start clock, read before the heavier imports below
+from dataclasses import asdict
 from concurrent.futures import ThreadPoolExecutor
-from datetime import datetime
 from dotenv import load_dotenv
-from openai import OpenAI
-from twilio.rest import Client as TwilioClient
-from pydub import AudioSegment 
+from clients import openai_client, http_session, twilio, close_clients, OPENAI_API_KEY
+from call_session import open_session, close_session, SESSIONS, MAX_UTTERANCE_BYTES
+from stt_stream import DeepgramStream
+from speech_pipeline import SentenceSplitter, PlaybackQueue
+from tts_cache import TTSCache
+from transcript_store import TranscriptStore
+from recording_jobs import RecordingJobs, GREETING_PATH
+from dashboard_channel import DashboardChannel
+from report_queue import ReportQueue, report_as_text
+from call_recorder import CallRecorder
+from supervisor import supervise, STREAM_WORKERS, DRAIN_SECONDS
+from telemetry import span, Counter, Gauge, Histogram, serve_metrics, watch_loop_lag, METRICS_PORT
+from faq import FAQIndex, build_faqs
+from contact_extractor import EMAIL_RE
+from speculation import Speculator
+from admission import (ProviderLimit, Overloaded, LIVE, SPECULATIVE, BACKGROUND,
+                       OPENAI_CHAT_CONCURRENCY, OPENAI_TTS_CONCURRENCY, DEEPGRAM_CONCURRENCY)
+from audio_codec import mulaw_to_wav16k, pcm16_to_wav, pcm24k_to_mulaw8k
 
 
 # ===== Load Environment =====
 load_dotenv()
 
 # ===== ENVIRONMENT VARIABLES =====
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PORT = int(os.getenv("STREAM_PORT", 8000))
-FLASK_SOCKET_URL = os.getenv("FLASK_SOCKET_URL")
 PUBLIC_BASE_URL = os.getenv("PUBLIC_BASE_URL")
-FLASK_REPORT_URL = f"{PUBLIC_BASE_URL}/report"
-
-TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
-TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 
 # NEW: Deepgram API key
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
-
-# ===== CLIENTS =====
-client = OpenAI(api_key=OPENAI_API_KEY)
-twilio_client = TwilioClient(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
+# "stream" keeps one live Deepgram socket per call; "batch" POSTs a WAV per buffered chunk
+STT_MODE = os.getenv("STT_MODE", "stream").lower()
+DEEPGRAM_LISTEN_URL = os.getenv("DEEPGRAM_LISTEN_URL", "https://api.deepgram.com/v1/listen")
 
 # ===== SETTINGS =====
 SAMPLE_RATE = 8000
-BYTES_PER_SAMPLE = 2
-POOL = ThreadPoolExecutor(max_workers=8)
-LOG_FILE = "conversation_log.txt"
-CURRENT_CALL_SID = None
+TTS_SAMPLE_RATE = 24000   # OpenAI "pcm" speech output
+TTS_MODEL = "gpt-4o-mini-tts"
+TTS_VOICE = "nova"
+TTS_CACHE = TTSCache()
+TRANSCRIPTS = TranscriptStore()
+DASHBOARD = DashboardChannel()
+POOL = ThreadPoolExecutor(max_workers=8)   # CPU-bound work only; network I/O is async
+Gauge("voice_active_calls", "Calls with an open media stream.", fn=lambda: len(SESSIONS))
+Gauge("voice_dashboard_events_pending", "Dashboard events waiting for the next batch.", fn=lambda: len(DASHBOARD.pending))
+Counter("voice_dashboard_events_dropped_total", "Dashboard events dropped while the dashboard was unreachable.", fn=lambda: DASHBOARD.dropped)
+Gauge("voice_executor_queue_depth", "CPU jobs waiting for a worker thread.", fn=lambda: POOL._work_queue.qsize())
+# stream GPT tokens and speak each sentence as soon as it is complete
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+PLAYBACK_TAIL_MS = int(os.getenv("PLAYBACK_TAIL_MS", 250))   # allowance for Twilio fetching each clip
+# "stream" sends AI audio back over the media stream WebSocket; "redirect" plays WAV files via calls.update
+PLAYBACK_MODE = os.getenv("PLAYBACK_MODE", "stream").lower()
+OUTBOUND_FRAME_BYTES = 160   # 20 ms of 8 kHz mulaw per outbound media message
+# "local" records caller + AI in-process as stereo WAV; "twilio" uses a REST recording fetched after the call
+RECORDING_MODE = os.getenv("RECORDING_MODE", "local").lower()
+# recordings older than this are deleted at startup (0 = keep them all); in local mode they are the only copy
+RECORDING_RETENTION_DAYS = float(os.getenv("RECORDING_RETENTION_DAYS", 0))
+# answer plain hours/location/menu/delivery questions from RESTAURANT_INFO without calling GPT
+FAQ_FAST_PATH = os.getenv("FAQ_FAST_PATH", "1") == "1"
+FAQ_LOOKUPS = Counter("voice_faq_lookups_total", "Caller turns checked against the FAQ index.", ["result"])
+# start GPT from a stable interim transcript and keep the reply if the final matches (streaming STT + LLM only)
+SPECULATIVE_LLM = os.getenv("SPECULATIVE_LLM", "0") == "1"
+SPECULATIONS = Counter("voice_speculations_total", "Speculative GPT replies by outcome (hit, miss, diverged, unused).", ["result"])
+SPECULATION_SAVED = Histogram("voice_speculation_saved_seconds", "GPT time already done when the final transcript adopted a speculative reply.")
+SPECULATION_WASTED_TOKENS = Counter("voice_speculation_wasted_tokens_total", "Tokens spent on speculative replies that were thrown away.", ["kind"])
+# a turn that only spells part of an email/phone waits this long for the rest before GPT is asked
+CONTACT_HOLD_SECONDS = float(os.getenv("CONTACT_HOLD_SECONDS", 1.5))
+CONTACT_CAPTURES = Counter("voice_contact_captures_total", "Validated emails/phone numbers assembled from caller speech.", ["kind"])
+KEEP_WARM_SECONDS = float(os.getenv("KEEP_WARM_SECONDS", 30))   # below HTTP_KEEPALIVE_SECONDS so pooled connections stay open
+KEEP_WARM_PINGS = Counter("voice_keep_warm_pings_total", "Keep-warm requests sent to upstream APIs.", ["target", "result"])
+# one concurrency limit per upstream API; live turns go ahead of speculation, reports and summaries
+CHAT_LIMIT = ProviderLimit("openai_chat", OPENAI_CHAT_CONCURRENCY)
+TTS_LIMIT = ProviderLimit("openai_tts", OPENAI_TTS_CONCURRENCY)
+STT_LIMIT = ProviderLimit("deepgram", DEEPGRAM_CONCURRENCY)
+LIMITS = (CHAT_LIMIT, TTS_LIMIT, STT_LIMIT)
+FILLER_AFTER_MS = int(os.getenv("FILLER_AFTER_MS", 800))        # a turn kept waiting this long for GPT hears FILLER_TEXT
+LIVE_WAIT_SECONDS = float(os.getenv("LIVE_WAIT_SECONDS", 6))    # ...and gets BUSY_TEXT instead of a reply after this long
+LOAD_REPORT_SECONDS = float(os.getenv("LOAD_REPORT_SECONDS", 5))   # how often call counts go to app.py for /voice admission
+FILLER_TEXT = "One moment please."
+# what static/tts/greeting.mp3 says (generate_greeting.py); inbound calls hear it before the stream opens
+GREETING_TEXT = (
+    "Hello! This is Mia from The Restaurant. "
+    "How can I assist you today? Would you like to make a reservation or ask about our menu?"
+)
+BUSY_TEXT = "Sorry, I'm a little slow right now. Could you say that again in a moment?"
+Gauge("voice_provider_in_flight", "Requests running against each upstream API.", ["provider"],
+      fn=lambda: {(l.name,): l.active for l in LIMITS})
+Gauge("voice_provider_waiting", "Requests queued for a slot on each upstream API.", ["provider"],
+      fn=lambda: {(l.name,): l.waiting() for l in LIMITS})
+Counter("voice_provider_shed_total", "Requests refused or pushed out because an API's queue was full.", ["provider"],
+        fn=lambda: {(l.name,): l.shed for l in LIMITS})
+FALLBACK_LINES = Counter("voice_fallback_lines_total", "Pre-rendered lines spoken because a reply was slow or shed.", ["kind"])
+# listening comes first; ready is set once warm-up has finished in the background
+READY = asyncio.Event()
+COLD_START = Gauge("voice_cold_start_seconds", "Seconds from server launch until this worker was listening / warmed up.", ["phase"])
+Gauge("voice_ready", "1 once the worker's warm-up has finished.", fn=lambda: int(READY.is_set()))
 
 # ===== TTS CLEANUP =====
 def cleanup_tts():
     """
-    Delete all temporary TTS files (tts_*.mp3) before a new call starts,
+    Delete all temporary TTS files (tts_*) before a new call starts,
     but preserve permanent audio assets like greeting.mp3 and ai_reply.mp3.
     """
     tts_dir = os.path.join("static", "tts")
@@ -45,7 +110,7 @@ def cleanup_tts():
         if not os.path.exists(tts_dir):
             os.makedirs(tts_dir)
             return
-        files = glob.glob(os.path.join(tts_dir, "*.mp3"))
+        files = glob.glob(os.path.join(tts_dir, "*.*"))
         deleted = 0
         for f in files:
             base = os.path.basename(f).lower()
@@ -53,21 +118,27 @@ def cleanup_tts():
                 os.remove(f)
                 deleted += 1
         print(f"🧹 Cleaned up {deleted} temporary TTS files (permanent files preserved).")
+        TTS_CACHE.evict()
     except Exception as e:
         print(f"⚠️ TTS cleanup failed: {e}")
 
 def cleanup_recordings():
+    """Delete call recordings past RECORDING_RETENTION_DAYS; with no retention set, nothing is deleted."""
     rec_dir = os.path.join("static", "recordings")
     try:
         if not os.path.exists(rec_dir):
             os.makedirs(rec_dir)
             return
-        files = glob.glob(os.path.join(rec_dir, "*.mp3"))
+        if not RECORDING_RETENTION_DAYS:
+            return
+        cutoff = time.time() - RECORDING_RETENTION_DAYS * 86400
+        files = glob.glob(os.path.join(rec_dir, "*.mp3")) + glob.glob(os.path.join(rec_dir, "*.wav"))
         deleted = 0
         for f in files:
-            os.remove(f)
-            deleted += 1
-        print(f"🗑 Deleted {deleted} old call recordings.")
+            if os.path.getmtime(f) < cutoff:
+                os.remove(f)
+                deleted += 1
+        print(f"🗑 Deleted {deleted} call recordings older than {RECORDING_RETENTION_DAYS:g} days.")
     except Exception as e:
         print(f"⚠ Recording cleanup failed: {e}")
 
@@ -88,38 +159,7 @@ Policies:
   - Takeout and curbside pickup available.
   - No home delivery.
 """
-
-# ===== UTILITIES =====
-def _ts(): 
-    return datetime.now().strftime("%H:%M:%S")
-
-def reset_log():
-    open(LOG_FILE, "w", encoding="utf-8").write(f"[{_ts()}] --- Call Started ---\n")
-
-def append_log(role, text):
-    if text:
-        with open(LOG_FILE, "a", encoding="utf-8") as f:
-            f.write(f"[{_ts()}] [{role}] {text}\n")
-
-def read_log():
-    try: 
-        return open(LOG_FILE, "r", encoding="utf-8").read()
-    except FileNotFoundError: 
-        return ""
-
-def mulaw_to_pcm16_16k(b: bytes) -> bytes:
-    pcm8k = audioop.ulaw2lin(b, 2)
-    pcm16k, _ = audioop.ratecv(pcm8k, 2, 1, 8000, 16000, None)
-    return audioop.mul(pcm16k, 2, 0.95)
-
-def pcm16k_to_wav(pcm16k: bytes) -> bytes:
-    buf = io.BytesIO()
-    with wave.open(buf, "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)
-        wf.setframerate(16000)
-        wf.writeframes(pcm16k)
-    return buf.getvalue()
+FAQS = FAQIndex(build_faqs(RESTAURANT_INFO))
 
 # ===== CONTACT NORMALIZER =====
 def normalize_contact_info(text: str) -> str:
@@ -131,9 +171,6 @@ def normalize_contact_info(text: str) -> str:
     t = re.sub(r"\s+", " ", t).strip()
     return t
 
-# ===== AI MEMORY =====
-context = []
-
 def clean_repeated_words(text: str) -> str:
     words = text.split()
     cleaned = [w for i, w in enumerate(words) if i == 0 or w.lower() != words[i - 1].lower()]
@@ -141,37 +178,63 @@ def clean_repeated_words(text: str) -> str:
 
 # ===== MEANINGLESS TEXT FILTER =====
 MEANINGLESS_PATTERNS = [
-    r"^\s*(hi|thanks|thank you.|thank you|okay|ok|yeah|yes|no|hmm|uh|ah|huh|bye|goodbye|you)\s*$"
+    re.compile(r"^\s*(hi|thanks|thank you.|thank you|okay|ok|yeah|yes|no|hmm|uh|ah|huh|bye|goodbye|you)\s*$")
 ]
+LONG_NUMBER_RE = re.compile(r"\b\d{7,15}\b")
+HYPHEN_SPELLING_RE = re.compile(r"([a-zA-Z]-){2,}[a-zA-Z]")
+DIGIT_WORD_RE = re.compile(r"\b(zero|one|two|three|four|five|six|seven|eight|nine)\b")
+EMAIL_OR_DIGIT_RE = re.compile(r"[@\d]")
 
 def is_potential_contact_info(text: str) -> bool:
-    if re.search(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", text): return True
-    if re.search(r"\b\d{7,15}\b", text): return True
-    if re.search(r"([a-zA-Z]-){2,}[a-zA-Z]", text): return True
-    if len(re.findall(r"\b(zero|one|two|three|four|five|six|seven|eight|nine)\b", text.lower())) >= 3: return True
+    if EMAIL_RE.search(text.lower()): return True
+    if LONG_NUMBER_RE.search(text): return True
+    if HYPHEN_SPELLING_RE.search(text): return True
+    if len(DIGIT_WORD_RE.findall(text.lower())) >= 3: return True
     return False
 
 def is_meaningful_text(text: str) -> bool:
     if not text: return False
     if is_potential_contact_info(text): return True
     for pat in MEANINGLESS_PATTERNS:
-        if re.match(pat, text.lower()):
+        if pat.match(text.lower()):
             return False
     words = text.split()
     if len(words) < 2:
-        if re.search(r"[@\d]", text): return True
+        if EMAIL_OR_DIGIT_RE.search(text): return True
         return False
     return True
 
-# ===== TRANSCRIBE + AI RESPONSE (Deepgram instead of Whisper) =====
-def transcribe_and_reply(wav: bytes):
-    global context
+# ===== SYSTEM PROMPT =====
+SYSTEM_PROMPT = (
+    "You are Mia, a polite and professional restaurant receptionist for 'The Restaurant'. "
+    "You handle calls for reservations, timings, and menu questions. "
+    "Keep track of what the caller already said and never ask the same question again. "
+    "And also be sure to only provide information that is in the restaurant info provided. "
+    "Be warm, concise, and conversational. Use short natural English sentences. "
+    "If the caller gives reservation details, confirm clearly, then ask for their name, email and phone "
+    "If they provide contact info, repeat it back to confirm accuracy. If they said its correct or right or anything that means yes, proceed. "
+    "If unclear. Ask them to spell each slowly and confirm what you understood. "
+    "When contact details assembled from the caller's speech are listed for you, read those exact values back once "
+    "instead of asking for them again; ask to repeat only a value still being spelled or with confidence below 0.6. "
+    "Unclear even after spelling out, ask only for that portion to be repeated. Once both are clear, confirm everything, "
+    "then say: 'Thank you! Your reservation is confirmed. We look forward to seeing you.' "
+    f"Here is the restaurant information:\n{RESTAURANT_INFO}"
+)
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a phone call between a caller and Mia, a restaurant receptionist. "
+    "Merge the new conversation into the current summary. Keep every concrete detail verbatim: "
+    "names, party size, dates, times, email addresses, phone numbers, and what has already been confirmed or is still missing. "
+    "Write at most 6 short plain sentences."
+)
 
-    # ---- Deepgram transcription ----
+# ===== TRANSCRIBE + AI RESPONSE (Deepgram instead of Whisper) =====
+async def transcribe_wav(wav: bytes) -> str:
+    """Batch Deepgram transcription of one WAV chunk (fallback when streaming STT is unavailable)."""
     try:
         if not DEEPGRAM_API_KEY:
             print("⚠ Deepgram API key missing (DEEPGRAM_API_KEY).")
-            return "", ""
+            return ""
 
         headers = {
             "Authorization": f"Token {DEEPGRAM_API_KEY}",
@@ -183,353 +246,843 @@ def transcribe_and_reply(wav: bytes):
             "language": "en-US",
         }
 
-        dg_resp = requests.post(
-            "https://api.deepgram.com/v1/listen",
+        async with STT_LIMIT.slot(LIVE, LIVE_WAIT_SECONDS), http_session().post(
+            DEEPGRAM_LISTEN_URL,
             headers=headers,
             params=params,
             data=wav,
-            timeout=10,
-        )
-        dg_resp.raise_for_status()
-        dg_json = dg_resp.json()
+            timeout=aiohttp.ClientTimeout(total=10),
+        ) as dg_resp:
+            dg_resp.raise_for_status()
+            dg_json = await dg_resp.json()
 
         # Deepgram JSON shape: results.channels[0].alternatives[0].transcript
-        text = dg_json.get("results", {}) \
+        return dg_json.get("results", {}) \
                       .get("channels", [{}])[0] \
                       .get("alternatives", [{}])[0] \
                       .get("transcript", "") \
                       .strip()
 
-        text = clean_repeated_words(text)
-        text = normalize_contact_info(text)
-
     except Exception as e:
         print("⚠ Deepgram STT Error:", e)
-        return "", ""
+        return ""
+
+def accept_caller_text(session, text: str, **latency) -> str:
+    """Clean up a transcript and add it to the call history; returns "" for noise."""
+    # the extractor sees the raw words ("at", "dot", "double five") before they are normalized away
+    for capture in session.contacts.feed(text):
+        CONTACT_CAPTURES.inc(kind=capture.kind)
+        session.transcript.contacts[capture.kind] = asdict(capture)
+        print(f"📇 Captured {capture.kind}: {capture.value} (confidence {capture.confidence:.2f})")
 
+    text = normalize_contact_info(clean_repeated_words(text))
     if not text:
-        return "", ""
+        return ""
 
-    if not is_meaningful_text(text):
+    # a lone spelled letter or digit is part of an address, not noise
+    if not is_meaningful_text(text) and not session.contacts.spelling:
         print(f"🪶 Ignored meaningless chunk: '{text}'")
-        return "", ""
+        return ""
 
     # ---- Log + context ----
-    append_log("Caller", text)
-    context.append({"role": "user", "content": text})
-    short_context = context[-50:]
-
-    # ---- GPT reply (unchanged) ----
-    try:
-        comp = client.chat.completions.create(
+    session.transcript.add("Caller", text, **latency)
+    session.context.append({"role": "user", "content": text})
+    return text
+
+def build_messages(session):
+    # SYSTEM_PROMPT is built once, so every request starts with the same cacheable prefix
+    return session.context.messages(SYSTEM_PROMPT, note=session.contacts.prompt_note())
+
+def remember_reply(session, ai_text: str, started_at: float = None, usage=None, **latency):
+    session.transcript.add("AI", ai_text, started_at, usage=usage, **latency)
+    session.context.append({"role": "assistant", "content": ai_text})
+    session.contacts.asked(ai_text)
+    if session.context.needs_compaction():
+        session.spawn(session.context.compact(summarize_history))
+
+def usage_summary(usage):
+    if not usage:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        "completion_tokens": usage.completion_tokens,
+    }
+
+async def summarize_history(summary: str, turns) -> str:
+    """Fold older turns into the running call summary (runs in the background, not on the reply path)."""
+    dialogue = "\n".join(f"{'Caller' if m['role'] == 'user' else 'Mia'}: {m['content']}" for m in turns)
+    async with CHAT_LIMIT.slot(BACKGROUND):
+        resp = await openai_client().chat.completions.create(
             model="gpt-4o-mini",
-            temperature=0.7,
+            temperature=0,
+            max_tokens=250,
             messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "You are Mia, a polite and professional restaurant receptionist for 'The Restaurant'. "
-                        "You handle calls for reservations, timings, and menu questions. "
-                        "Keep track of what the caller already said and never ask the same question again. "
-                        "And also be sure to only provide information that is in the restaurant info provided. "
-                        "Be warm, concise, and conversational. Use short natural English sentences. "
-                        "If the caller gives reservation details, confirm clearly, then ask for their name, email and phone "
-                        "If they provide contact info, repeat it back to confirm accuracy. If they said its correct or right or anything that means yes, proceed. "
-                        "If unclear. Ask them to spell each slowly and confirm what you understood. "
-                        "Unclear even after spelling out, ask only for that portion to be repeated. Once both are clear, confirm everything, "
-                        "then say: 'Thank you! Your reservation is confirmed. We look forward to seeing you.' "
-                        f"Here is the restaurant information:\n{RESTAURANT_INFO}"
-                    ),
-                },
-                *short_context,
+                {"role": "system", "content": SUMMARY_PROMPT},
+                {"role": "user", "content": f"Current summary:\n{summary or '(none)'}\n\nNew conversation:\n{dialogue}"},
             ],
         )
+    return resp.choices[0].message.content
+
+def answer_faq(session, caller: str) -> str:
+    """Canned answer for a plain FAQ question (audio is pre-synthesized), or "" to let GPT answer."""
+    if not FAQ_FAST_PATH:
+        return ""
+    t0 = time.time()
+    faq = FAQS.match(caller)
+    FAQ_LOOKUPS.inc(result=faq.intent if faq else "fallback")
+    if not faq:
+        return ""
+    remember_reply(session, faq.answer, t0, faq_ms=(time.time() - t0) * 1000)
+    print(f"⚡ FAQ answer: {faq.intent}")
+    return faq.answer
+
+@contextlib.asynccontextmanager
+async def live_slot(session, limit):
+    """
+    A provider slot for the caller's turn. If other calls keep it waiting past
+    FILLER_AFTER_MS the caller hears the filler line; after LIVE_WAIT_SECONDS
+    it raises Overloaded.
+    """
+    filler = asyncio.get_running_loop().call_later(FILLER_AFTER_MS / 1000, play_filler, session)
+    try:
+        await limit.acquire(LIVE, LIVE_WAIT_SECONDS)
+    finally:
+        filler.cancel()
+    try:
+        yield
+    finally:
+        limit.release()
+
+def play_filler(session):
+    """Say something rather than leave dead air while the reply is queued behind other calls."""
+    if session.closed or session.playback.busy():
+        return
+    FALLBACK_LINES.inc(kind="filler")
+    speak(session, FILLER_TEXT)
+
+def overloaded_reply(session, error) -> str:
+    """The reply couldn't be generated in time: a pre-rendered line instead, kept in the history as said."""
+    print("🚦 GPT overloaded:", error)
+    FALLBACK_LINES.inc(kind="busy")
+    remember_reply(session, BUSY_TEXT)
+    return BUSY_TEXT
+
+async def reply_to_caller(session) -> str:
+    t0 = time.time()
+    try:
+        with span("llm", session):
+            async with live_slot(session, CHAT_LIMIT):
+                comp = await openai_client().chat.completions.create(
+                    model="gpt-4o-mini",
+                    temperature=0.7,
+                    messages=build_messages(session),
+                )
 
         ai_text = comp.choices[0].message.content.strip()
-        append_log("AI", ai_text)
-        context.append({"role": "assistant", "content": ai_text})
-        return text, ai_text
+        remember_reply(session, ai_text, t0, usage=usage_summary(comp.usage), llm_ms=(time.time() - t0) * 1000)
+        return ai_text
 
+    except Overloaded as e:
+        return overloaded_reply(session, e)
     except Exception as e:
         print("⚠ GPT Error:", e)
-        return text, ""
+        return ""
 
-# ===== DASHBOARD UPDATE =====
-async def update_dashboard(caller, ai):
+async def reply_tokens(messages, session=None, priority=LIVE):
+    """
+    One streamed GPT reply as (token, usage) pairs; usage only comes with the
+    last chunk. The chat slot is held until the stream ends.
+    """
+    async with (live_slot(session, CHAT_LIMIT) if session else CHAT_LIMIT.slot(priority)):
+        stream = await openai_client().chat.completions.create(
+            model="gpt-4o-mini",
+            temperature=0.7,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        async for chunk in stream:
+            if getattr(chunk, "usage", None):
+                yield "", chunk.usage
+            if chunk.choices:
+                yield chunk.choices[0].delta.content or "", None
+
+async def stream_reply(session, on_sentence, speculation=None) -> str:
+    """
+    Stream the GPT reply, handing each finished sentence to on_sentence while
+    the rest is generated. An adopted speculation is replayed instead of
+    starting a new request; its buffered sentences go out immediately.
+    """
+    splitter = SentenceSplitter()
+    parts = []
+    t0 = time.time()
+    first_sentence_ms = None
+    usage = None
+    extra = {"speculation_saved_ms": round(speculation.head_start() * 1000, 1)} if speculation else {}
     try:
-        async with aiohttp.ClientSession() as s:
-            await s.post(FLASK_SOCKET_URL, json={"caller": caller, "suggestion": ai})
+        with span("llm", session, streamed=True, **extra) as sp:
+            tokens = speculation.replay() if speculation else reply_tokens(build_messages(session), session)
+            async for token, chunk_usage in tokens:
+                usage = chunk_usage or usage
+                parts.append(token)
+                for sentence in splitter.feed(token):
+                    if first_sentence_ms is None:
+                        first_sentence_ms = (time.time() - t0) * 1000
+                        sp["first_sentence_ms"] = round(first_sentence_ms, 1)
+                    on_sentence(sentence)
+    except Overloaded as e:
+        on_sentence(overloaded_reply(session, e))
+        return BUSY_TEXT
     except Exception as e:
-        print("⚠ Dashboard update failed:", e)
+        print("⚠ GPT Error:", e)
+    finally:
+        if speculation:
+            speculation.cancel()   # a barge-in mid-replay must not leave it generating
+    for sentence in splitter.flush():
+        on_sentence(sentence)
+
+    ai_text = "".join(parts).strip()
+    if ai_text:
+        llm_ms = (time.time() - t0) * 1000
+        remember_reply(session, ai_text, t0, usage=usage_summary(usage),
+                       llm_ms=llm_ms, llm_first_sentence_ms=first_sentence_ms or llm_ms, **extra)
+    return ai_text
+
+# ===== SPECULATIVE REPLIES =====
+def speculative_prompt(session, text: str):
+    """Messages GPT would get if text were the final transcript; None when the turn won't go to GPT."""
+    text = normalize_contact_info(clean_repeated_words(text))
+    if (not text or not is_meaningful_text(text) or session.contacts.spelling or is_potential_contact_info(text)
+            or (FAQ_FAST_PATH and FAQS.match(text, record=False)) or CHAT_LIMIT.busy()):
+        return None
+    return build_messages(session) + [{"role": "user", "content": text}]
+
+def speculation_outcome(result, speculation):
+    SPECULATIONS.inc(result=result)
+    if result == "hit":
+        SPECULATION_SAVED.observe(speculation.head_start())
+    else:
+        for kind, tokens in speculation.spent().items():
+            SPECULATION_WASTED_TOKENS.inc(tokens, kind=kind)
+
+def drop_speculation(session):
+    if session.speculator:
+        session.speculator.discard()
+
+# ===== DASHBOARD UPDATE =====
+def update_dashboard(session, caller, ai):
+    # queued on the shared dashboard channel; sent with whatever else is pending
+    with span("dashboard", session):
+        DASHBOARD.send("update", session.call_sid, {"callSid": session.call_sid, "caller": caller, "suggestion": ai})
 
 # ===== OPENAI TTS =====
-async def play_tts(ai_text):
-    if not ai_text or not CURRENT_CALL_SID:
-        return
-    filename = f"tts_{int(time.time()*1000)}.mp3"
+async def synthesize_pcm(session, text: str) -> bytes:
+    """Raw 24 kHz 16-bit mono PCM for one piece of reply text; repeated phrases come from the TTS cache."""
+    async def synth(t):
+        # sentences of a live reply go first; pre-rendering (no session) waits its turn
+        async with TTS_LIMIT.slot(LIVE, LIVE_WAIT_SECONDS) if session else TTS_LIMIT.slot(BACKGROUND):
+            speech = await openai_client().audio.speech.create(
+                model=TTS_MODEL,
+                voice=TTS_VOICE,
+                input=t,
+                response_format="pcm",
+            )
+            return await speech.aread()
+    with span("tts", session, chars=len(text)):
+        return await TTS_CACHE.fetch(text, synth, voice=TTS_VOICE, model=TTS_MODEL, fmt="pcm")
+
+async def play_clip(session, pcm: bytes, text: str):
+    """Redirect the call to play one clip, then hold until it has finished so the next one doesn't cut it off."""
+    filename = f"tts_{int(time.time()*1000)}.wav"
     path = os.path.join("static", "tts", filename)
     os.makedirs(os.path.dirname(path), exist_ok=True)
-    try:
-        speech = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="nova",
-            input=ai_text,
-        )
-        with open(path, "wb") as f:
-            f.write(speech.read())
-        twilio_client.calls(CURRENT_CALL_SID).update(
+    with open(path, "wb") as f:
+        f.write(pcm16_to_wav(pcm, TTS_SAMPLE_RATE))
+    with span("playback", session, mode="redirect"):
+        await twilio().calls(session.call_sid).update_async(
             url=f"{PUBLIC_BASE_URL}/play_tts?file={filename}",
             method="POST",
         )
-        print(f"🔊 Played {filename}")
-    except Exception as e:
-        print("⚠ TTS playback error:", e)
+    if session.recorder:
+        session.recorder.outbound(pcm24k_to_mulaw8k(pcm))
+    print(f"🔊 Played {filename}")
+    await asyncio.sleep(len(pcm) / (TTS_SAMPLE_RATE * 2) + PLAYBACK_TAIL_MS / 1000)
+
+async def stream_clip(session, pcm: bytes, text: str):
+    """Send one clip as mulaw media frames on the call's own WebSocket, followed by a mark."""
+    with span("playback", session, mode="stream"):
+        mulaw = pcm24k_to_mulaw8k(pcm)
+        if session.recorder:
+            session.recorder.outbound(mulaw)
+        for i in range(0, len(mulaw), OUTBOUND_FRAME_BYTES):
+            await session.ws.send(json.dumps({
+                "event": "media",
+                "streamSid": session.stream_sid,
+                "media": {"payload": base64.b64encode(mulaw[i:i + OUTBOUND_FRAME_BYTES]).decode()},
+            }))
+    # Twilio echoes the mark back once everything before it has been played
+    session.mark_seq += 1
+    name = f"reply-{session.mark_seq}"
+    session.pending_marks.add(name)
+    await session.ws.send(json.dumps({"event": "mark", "streamSid": session.stream_sid, "mark": {"name": name}}))
+    print(f"🔊 Streamed {len(mulaw) / SAMPLE_RATE:.1f}s of audio ({name})")
+
+def speak(session, text: str):
+    """Start synthesizing text now and queue it to play after anything already queued."""
+    if not text or not session.call_sid:
+        return
+    session.playback.put(session.spawn(synthesize_pcm(session, text)), text)
 
-# ===== STREAM HANDLING =====
-audio_buffer = b""
-last_audio_time = 0
-last_processing = None
-
-async def handle_media_chunk(mulaw_bytes: bytes):
-    global audio_buffer, last_audio_time, last_processing
-    now = time.time()
-    audio_buffer += mulaw_bytes
-    long_enough = len(audio_buffer) >= (SAMPLE_RATE * 4 * BYTES_PER_SAMPLE)
-    silence_gap = now - last_audio_time > 0.25
-    if long_enough or silence_gap:
-        chunk = audio_buffer
-        audio_buffer = b""
-        if last_processing and not last_processing.done():
-            last_processing.cancel()
-        last_processing = asyncio.create_task(process_audio(chunk))
-    last_audio_time = now
-
-async def process_audio(data: bytes):
-    pcm = mulaw_to_pcm16_16k(data)
-    wav = await asyncio.get_running_loop().run_in_executor(POOL, pcm16k_to_wav, pcm)
-    caller, ai = await asyncio.get_running_loop().run_in_executor(POOL, transcribe_and_reply, wav)
-    if caller or ai:
-        await update_dashboard(caller, ai)
-        if ai:
-            asyncio.create_task(play_tts(ai))
+async def barge_in(session):
+    """
+    The caller started talking: abandon the reply being generated and silence
+    the AI. Cancelling the tasks aborts their in-flight OpenAI/Deepgram
+    requests; Twilio drops already-sent audio on "clear".
+    """
+    replying = session.last_processing is not None and not session.last_processing.done()
+    speaking = bool(session.pending_marks) or (session.playback is not None and session.playback.busy())
+    if not (replying or speaking):
+        return
 
-# ===================================================================
-#  RECORDING DOWNLOAD + MERGE (unchanged)
-# ===================================================================
+    with span("barge_in", session, replying=replying, speaking=speaking):
+        if replying:
+            session.last_processing.cancel()
+        if session.playback:
+            await session.playback.clear()
+        if speaking and session.recorder:
+            session.recorder.clear_outbound()
+        if speaking and PLAYBACK_MODE == "stream":
+            await session.ws.send(json.dumps({"event": "clear", "streamSid": session.stream_sid}))
+            session.pending_marks.clear()
+        elif speaking:
+            # redirecting to the silent hold TwiML cuts off the <Play> in progress
+            await twilio().calls(session.call_sid).update_async(url=f"{PUBLIC_BASE_URL}/hold", method="POST")
+    print("✋ Caller barged in, AI reply stopped.")
 
-def download_twilio_recording(call_sid):
-    try:
-        os.makedirs("static/recordings", exist_ok=True)
+# ===== STREAM HANDLING =====
+async def handle_media_chunk(session, mulaw_bytes: bytes):
+    vad = session.vad
+    event = vad.push(mulaw_bytes)
+
+    if event == "start":
+        session.spawn(barge_in(session))
+        session.audio_buffer.append(vad.take_preroll())
+    if not vad.in_speech and event != "end":
+        # caller is silent: keep a little pre-roll, never ship silence to STT
+        vad.remember(mulaw_bytes)
+        return
 
-        recordings = twilio_client.recordings.list(call_sid=call_sid)
-        if not recordings:
-            print("⚠ No recordings found for this call.")
-            return None
+    session.audio_buffer.append(mulaw_bytes)
+    if event == "end" or len(session.audio_buffer) >= MAX_UTTERANCE_BYTES:
+        session.turn += 1
+        with span("buffer_cut", session, bytes=len(session.audio_buffer)):
+            chunk = session.audio_buffer.take()
+        # the transcription is its own task: a barge-in cancels the reply, never the caller's words
+        session.heard = session.spawn(transcribe_audio(session, chunk, session.heard))
+        if session.last_processing and not session.last_processing.done():
+            session.last_processing.cancel()
+        session.last_processing = session.spawn(reply_to_audio(session, session.heard))
+
+# ===== STREAMING STT =====
+async def start_streaming_stt(session):
+    """Open the call's live Deepgram socket; on failure the call falls back to batch STT."""
+    if STT_MODE != "stream" or not DEEPGRAM_API_KEY:
+        return
 
-        rec = recordings[0]
-        mp3_url = f"https://api.twilio.com{rec.uri.replace('.json', '.mp3')}"
-        save_path = f"static/recordings/{rec.sid}.mp3"
+    async def on_final(text):
+        session.turn += 1
+        if session.last_processing and not session.last_processing.done():
+            session.last_processing.cancel()
+        session.last_processing = session.spawn(process_transcript(session, text))
 
-        r = requests.get(mp3_url, auth=(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN))
-        with open(save_path, "wb") as f:
-            f.write(r.content)
+    async def on_interim(text):
+        if session.speculator:
+            session.speculator.heard(text)
+        # rapid interim results collapse to the latest one per call before they are sent
+        DASHBOARD.send("interim", session.call_sid, {"callSid": session.call_sid, "text": text}, coalesce="interim")
 
-        print(f"📥 Downloaded Twilio raw recording → {save_path}")
-        return save_path
+    stt = DeepgramStream(on_final, on_interim)
+    try:
+        await stt.start()
+        session.stt = stt
+        if SPECULATIVE_LLM and LLM_STREAMING:
+            session.speculator = Speculator(functools.partial(speculative_prompt, session),
+                                            functools.partial(reply_tokens, priority=SPECULATIVE),
+                                            session.spawn, speculation_outcome, silence=session.vad.quiet_ms)
+        print("🎧 Streaming STT connected.")
     except Exception as e:
-        print("⚠ Error downloading recording:", e)
-        return None
+        print("⚠ Streaming STT unavailable, using batch STT:", e)
+
+async def forward_media(session, mulaw_bytes: bytes):
+    if session.stt:
+        # Deepgram does the endpointing; local VAD only watches for the caller talking over the AI
+        if session.vad.push(mulaw_bytes) == "start":
+            session.spawn(barge_in(session))
+        try:
+            await session.stt.send(mulaw_bytes)
+            return
+        except Exception as e:
+            print("⚠ Streaming STT dropped, falling back to batch STT:", e)
+            session.stt = None
+    await handle_media_chunk(session, mulaw_bytes)
+
+async def transcribe_audio(session, data, previous=None) -> str:
+    """Batch STT for one utterance, added to the call history after the one before it; returns the caller text."""
+    with span("wav_encode", session):
+        wav = await asyncio.get_running_loop().run_in_executor(POOL, mulaw_to_wav16k, data)
+    t0 = time.time()
+    with span("stt", session):
+        text = await transcribe_wav(wav)
+    stt_ms = (time.time() - t0) * 1000
+    if previous:
+        await asyncio.gather(previous, return_exceptions=True)
+    return accept_caller_text(session, text, stt_ms=stt_ms)
+
+async def reply_to_audio(session, heard):
+    # shielded: cancelling the reply must not cancel the transcription it waits for
+    await respond(session, await asyncio.shield(heard))
+
+async def record_last_words(session, text: str, **latency):
+    """The caller already hung up: keep their last words for the transcript and report, but don't answer."""
+    caller = accept_caller_text(session, text, **latency)
+    if caller:
+        update_dashboard(session, caller, "")
+
+async def process_transcript(session, text: str, **latency):
+    await respond(session, accept_caller_text(session, text, **latency))
+
+async def respond(session, caller: str):
+    """Answer what the caller just said (already in the call history)."""
+    if not caller:
+        drop_speculation(session)
+        return
 
-def merge_recordings(greeting_path, twilio_path, output_path):
-    try:
-        greeting = AudioSegment.from_mp3(greeting_path)
-        call_audio = AudioSegment.from_mp3(twilio_path)
+    shown = caller
+    if session.contacts.spelling and session.contacts.in_progress():
+        drop_speculation(session)
+        # mid-spelling: if the caller goes on, barge-in cancels this turn and the next chunk carries on
+        update_dashboard(session, caller, "")
+        shown = ""
+        await asyncio.sleep(CONTACT_HOLD_SECONDS)
+
+    faq = answer_faq(session, caller)
+    if faq:
+        drop_speculation(session)
+        await deliver_reply(session, shown, faq)
+        return
 
-        final = greeting + call_audio
-        final.export(output_path, format="mp3")
+    if not LLM_STREAMING:
+        ai = await reply_to_caller(session)
+        await deliver_reply(session, shown, ai)
+        return
 
-        print(f"🎧 Final merged recording saved: {output_path}")
-        return output_path
-    except Exception as e:
-        print("⚠ Merge error:", e)
-        return None
+    if shown:
+        update_dashboard(session, shown, "")
+
+    # a reply already started from the interim transcript, if it answers what was finally said
+    speculation = session.speculator.take(build_messages(session)) if session.speculator else None
+    # sentences are synthesized and queued for playback while GPT is still generating
+    ai = await stream_reply(session, functools.partial(speak, session), speculation)
+    if ai:
+        update_dashboard(session, "", ai)
+
+async def deliver_reply(session, caller, ai):
+    if caller or ai:
+        update_dashboard(session, caller, ai)
+        if ai:
+            speak(session, ai)
 
 # ===== REPORT GENERATION =====
-def build_quality_report_sync(conversation_text: str) -> str:
-    if not conversation_text.strip():
-        return "No conversation content available."
-    prompt = (
-        "You are a senior QA evaluator analyzing a restaurant receptionist call between a customer and the AI. "
-        "Provide a clear, structured, business-grade report with the following sections:\n\n"
-        "1. Overall Score (out of 100)\n"
-        "2. Communication Metrics:\n"
-        "   - Greeting & Politeness (out of 10)\n"
-        "   - Active Listening (out of 10)\n"
-        "   - Clarity & Conciseness (out of 10)\n"
-        "   - Empathy & Tone (out of 10)\n"
-        "   - Accuracy of Information (out of 10)\n"
-        "3. Summary (2–3 sentences on how the receptionist performed overall)\n"
-        "4. Detailed Analysis (3–5 sentences explaining major highlights and issues)\n"
-        "5. Strengths (3 short bullet points)\n"
-        "6. Areas for Improvement (3 short bullet points)\n"
-        "7. AI Recommendations (specific actions to improve future interactions)\n\n"
-        "Avoid markdown, tables, or asterisks — just plain clean text."
-    )
-    try:
-        resp = client.chat.completions.create(
+REPORT_PROMPT = (
+    "You are a senior QA evaluator analyzing a restaurant receptionist call between a customer and the AI. "
+    "Score the receptionist and reply with a JSON object with exactly these keys:\n"
+    '  "overall_score": number 0-100,\n'
+    '  "scores": {"greeting_politeness", "active_listening", "clarity_conciseness", "empathy_tone", "accuracy"}, '
+    "each a number 0-10,\n"
+    '  "summary": 2-3 sentences on how the receptionist performed overall,\n'
+    '  "detailed_analysis": 3-5 sentences explaining major highlights and issues,\n'
+    '  "strengths": 3 short strings,\n'
+    '  "improvements": 3 short strings,\n'
+    '  "recommendations": specific actions to improve future interactions, as strings.\n'
+    "Plain text inside the strings: no markdown or asterisks."
+)
+
+async def _report_completion(content: str) -> dict:
+    # behind every live turn; Overloaded sends the job back to the report queue's retry backoff
+    async with CHAT_LIMIT.slot(BACKGROUND):
+        resp = await openai_client().chat.completions.create(
             model="gpt-4o-mini",
+            response_format={"type": "json_object"},
             messages=[
                 {"role": "system", "content": "You are an expert QA reviewer."},
-                {"role": "user", "content": f"{prompt}\n\n---\n{conversation_text}\n---"},
+                {"role": "user", "content": content},
             ],
         )
-        return re.sub(r"\\(.?)\\*", r"\1", resp.choices[0].message.content.strip())
-    except Exception as e:
-        print("⚠ Report generation error:", e)
-        return "Report generation failed."
+    return json.loads(resp.choices[0].message.content)
 
-async def make_report():
-    text = read_log()
-    report = await asyncio.get_running_loop().run_in_executor(POOL, build_quality_report_sync, text)
-    try:
-        async with aiohttp.ClientSession() as s:
-            await s.post(FLASK_REPORT_URL, json={"report": report})
-        print("📊 Report sent to dashboard")
-    except Exception as e:
-        print("⚠ Report post failed:", e)
+async def build_quality_report(conversation_text: str) -> dict:
+    if not conversation_text.strip():
+        return {"summary": "No conversation content available."}
+    return await _report_completion(f"{REPORT_PROMPT}\n\n---\n{conversation_text}\n---")
+
+async def build_quality_reports(conversation_texts) -> list:
+    """Score several calls in one request; returns one report per call, in order."""
+    calls = "\n\n".join(f"=== CALL {i + 1} ===\n{text}" for i, text in enumerate(conversation_texts))
+    data = await _report_completion(
+        f"{REPORT_PROMPT}\n\nYou are given {len(conversation_texts)} separate calls. Reply with "
+        f'{{"reports": [...]}} holding one such object per call, in the same order.\n\n{calls}'
+    )
+    return data.get("reports") or []
+
+async def publish_report(call_sid: str, report: dict):
+    DASHBOARD.send("call_report", call_sid, {"callSid": call_sid, "report": report_as_text(report), "scores": report})
+    print(f"📊 Report for {call_sid} sent to dashboard")
+
+REPORTS = ReportQueue(build_quality_report, build_quality_reports, publish_report)
+
+async def publish_recording(call_sid: str, path: str):
+    url = f"{PUBLIC_BASE_URL}/{path.replace(os.sep, '/')}"
+    DASHBOARD.send("call_recording", call_sid, {"callSid": call_sid, "url": url})
+
+RECORDINGS = RecordingJobs(publish_recording)
+Gauge("voice_report_queue_depth", "Quality reports waiting to be generated.", fn=REPORTS.depth)
+
+async def make_report(session):
+    # queued to disk and generated by the report workers, not on the call's teardown path
+    await REPORTS.submit(session.call_sid, session.transcript.as_text())
 
 # ===== Warm up models (Deepgram + GPT + TTS) =====
+async def warm_deepgram():
+    if not DEEPGRAM_API_KEY:
+        print("⚠ Deepgram warmup skipped: DEEPGRAM_API_KEY not set.")
+        return
+    silent_pcm = b"\x00" * 32000  # 1 sec @ 16k
+    wav = pcm16_to_wav(silent_pcm, 16000)
+    headers = {
+        "Authorization": f"Token {DEEPGRAM_API_KEY}",
+        "Content-Type": "audio/wav",
+    }
+    params = {
+        "model": "nova-3",
+        "language": "en-US",
+    }
+    async with http_session().post(
+        DEEPGRAM_LISTEN_URL,
+        headers=headers,
+        params=params,
+        data=wav,
+        timeout=aiohttp.ClientTimeout(total=10),
+    ):
+        pass
+
+async def warm_gpt():
+    await openai_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": "warmup"}]
+    )
+
+async def warm_tts():
+    speech = await openai_client().audio.speech.create(
+        model="gpt-4o-mini-tts",
+        voice="nova",
+        input="warming up"
+    )
+    await speech.aread()
+
 async def warm_up_models():
+    """Run every warm-up at once; each one failing only costs that upstream a cold first request."""
     print("🔥 Warming up Deepgram, GPT, and TTS...")
+    # openai is imported lazily; do it off the loop so the listener keeps accepting calls meanwhile
+    await asyncio.get_running_loop().run_in_executor(None, openai_client)
+
+    warmups = {"Deepgram": warm_deepgram(), "GPT": warm_gpt(), "TTS": warm_tts()}
+    # FAQ answers are played from the TTS cache; after prepare_shared this only loads them from disk
+    if FAQ_FAST_PATH:
+        warmups["FAQ"] = synthesize_faqs()
+    warmups["fillers"] = synthesize_fillers()
+    if RECORDING_MODE == "local":
+        warmups["greeting"] = load_greeting_audio()
+    results = await asyncio.gather(*warmups.values(), return_exceptions=True)
+    for name, result in zip(warmups, results):
+        if isinstance(result, Exception):
+            print(f"{name} warmup skipped:", result)
 
-    # Deepgram warmup with 1s of silence
-    try:
-        if DEEPGRAM_API_KEY:
-            silent_pcm = b"\x00" * 32000  # 1 sec @ 16k
-            wav = pcm16k_to_wav(silent_pcm)
-            headers = {
-                "Authorization": f"Token {DEEPGRAM_API_KEY}",
-                "Content-Type": "audio/wav",
-            }
-            params = {
-                "model": "nova-3",
-                "language": "en-US",
-            }
-            requests.post(
-                "https://api.deepgram.com/v1/listen",
-                headers=headers,
-                params=params,
-                data=wav,
-                timeout=10,
-            )
-        else:
-            print("⚠ Deepgram warmup skipped: DEEPGRAM_API_KEY not set.")
-    except Exception as e:
-        print("Deepgram warmup skipped:", e)
+    print("🔥 Warmup complete.")
 
-    # GPT warmup
+async def keep_warm(interval=KEEP_WARM_SECONDS):
+    """
+    Cheap authenticated requests to OpenAI and Deepgram between calls, so their
+    pooled connections are still open (and TLS still done) when the next call
+    needs them. The answers don't matter, only that a request went through.
+    Providers without an API key are skipped; they would only answer 401.
+    """
+    deepgram_url = DEEPGRAM_LISTEN_URL.rsplit("/listen", 1)[0] + "/projects"
+
+    async def ping_deepgram():
+        async with http_session().get(deepgram_url, headers={"Authorization": f"Token {DEEPGRAM_API_KEY}"}) as r:
+            await r.read()
+            r.raise_for_status()
+
+    pings = {}
+    if OPENAI_API_KEY:
+        pings["openai"] = lambda: openai_client().models.list()
+    if DEEPGRAM_API_KEY:
+        pings["deepgram"] = ping_deepgram
+    if not pings:
+        return
+    while True:
+        await asyncio.sleep(interval)
+        results = await asyncio.gather(*(ping() for ping in pings.values()), return_exceptions=True)
+        for target, result in zip(pings, results):
+            KEEP_WARM_PINGS.inc(target=target, result="error" if isinstance(result, Exception) else "ok")
+
+async def synthesize_faqs():
+    """Synthesize FAQ answers that aren't in the TTS cache yet."""
+    results = await asyncio.gather(*(synthesize_pcm(None, faq.answer) for faq in FAQS.faqs), return_exceptions=True)
+    failed = sum(1 for r in results if isinstance(r, Exception))
+    print(f"⚡ {len(results) - failed}/{len(results)} FAQ answers ready.")
+
+async def synthesize_fillers():
+    """Pre-render the lines spoken under load; they must play at once, not queue for TTS themselves."""
+    await asyncio.gather(*(synthesize_pcm(None, text) for text in (FILLER_TEXT, BUSY_TEXT)))
+
+GREETING_MULAW = b""   # greeting.mp3 as 8 kHz mulaw, the start of every local recording of an inbound call
+
+async def load_greeting_audio():
+    """Decode greeting.mp3 (the audio the caller actually heard) once per worker, with ffmpeg."""
+    global GREETING_MULAW
     try:
-        client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": "warmup"}]
-        )
+        proc = await asyncio.create_subprocess_exec(
+            "ffmpeg", "-loglevel", "error", "-i", GREETING_PATH, "-f", "mulaw", "-ar", "8000", "-ac", "1", "-",
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+        out, err = await proc.communicate()
+        if proc.returncode:
+            raise RuntimeError(err.decode(errors="replace").strip())
     except Exception as e:
-        print("GPT warmup skipped:", e)
+        print("⚠ Local recordings will start without the greeting:", repr(e))
+        return
+    GREETING_MULAW = out
 
-    # TTS warmup
-    try:
-        speech = client.audio.speech.create(
-            model="gpt-4o-mini-tts",
-            voice="nova",
-            input="warming up"
-        )
-        speech.read()
-    except Exception as e:
-        print("TTS warmup skipped:", e)
+# ===== LOAD REPORTING =====
+def publish_load():
+    """Tell app.py which calls this worker carries, for /voice admission (MAX_CONCURRENT_CALLS)."""
+    overloaded = any(l.waiting() * 2 >= l.max_waiting for l in LIMITS)
+    DASHBOARD.send("load", "", {"calls": [s.call_sid for s in SESSIONS.values()], "overloaded": overloaded},
+                   coalesce="load")
 
-    print("🔥 Warmup complete.")
+async def report_load(interval=LOAD_REPORT_SECONDS):
+    # periodic as well as on every call start/end, so a restarted app.py catches up
+    while True:
+        publish_load()
+        await asyncio.sleep(interval)
 
 # ===== TWILIO STREAM =====
 async def handle_twilio(ws):
-    global CURRENT_CALL_SID
     print("🔗 Twilio connected.")
-    reset_log()
-    buf = b""
+    session = None
     try:
         async for msg in ws:
             data = json.loads(msg)
             evt = data.get("event")
 
             if evt == "start":
-                CURRENT_CALL_SID = data["start"]["callSid"]
-                print(f"📞 Call started: {CURRENT_CALL_SID}")
+                start = data["start"]
+                session = open_session(start.get("streamSid") or data.get("streamSid"), start["callSid"])
+                publish_load()
+                session.ws = ws
+                play = stream_clip if PLAYBACK_MODE == "stream" else play_clip
+                session.playback = PlaybackQueue(functools.partial(play, session))
+                print(f"📞 Call started: {session.call_sid}")
                 # cleanup_tts()
                 # cleanup_recordings()
                 
-                greeting_text = (
-                    "Hello! This is Mia from The Restaurant. "
-                    "How can I assist you today? Would you like to make a reservation or ask about our menu?"
-                )
-                append_log("AI", greeting_text)
-                context.append({"role": "assistant", "content": greeting_text})
-                asyncio.create_task(update_dashboard("", greeting_text))
-
-                # Start Twilio recording via REST API
-                try:
-                    twilio_client.calls(CURRENT_CALL_SID).recordings.create()
-                    print("🎙 Recording started via REST API.")
-                except Exception as e:
-                    print("⚠ Error starting recording:", e)
+                # an outbound campaign call (dialer.py) opens with its own line; inbound callers hear greeting.mp3
+                opening = (start.get("customParameters") or {}).get("greeting")
+                if RECORDING_MODE == "local":
+                    # before any speech is queued, so the opening line is recorded too; the <Play>
+                    # greeting was heard before the stream opened, so the recording starts with it
+                    session.recorder = CallRecorder(os.path.join("static", "recordings", f"call_{session.call_sid}.wav"),
+                                                    lead_in=b"" if opening else GREETING_MULAW)
+                    print("🎙 Recording locally (caller left, AI right).")
+
+                greeting_text = opening or GREETING_TEXT
+                session.transcript.add("AI", greeting_text)
+                session.context.append({"role": "assistant", "content": greeting_text})
+                update_dashboard(session, "", greeting_text)
+                if opening:
+                    speak(session, opening)
+                await start_streaming_stt(session)
+
+                if RECORDING_MODE != "local":
+                    # Start Twilio recording via REST API
+                    try:
+                        await twilio().calls(session.call_sid).recordings.create_async()
+                        print("🎙 Recording started via REST API.")
+                    except Exception as e:
+                        print("⚠ Error starting recording:", e)
 
                 # asyncio.create_task(warm_up_models())
 
             elif evt == "media":
+                if not session:
+                    continue
                 b64 = data["media"].get("payload", "")
                 if b64:
-                    buf += base64.b64decode(b64)
-                    await handle_media_chunk(buf)
-                    buf = b""
+                    mulaw = base64.b64decode(b64)
+                    if session.recorder:
+                        session.recorder.inbound(mulaw)
+                    await forward_media(session, mulaw)
 
             elif evt == "stop":
                 print("🛑 Call ended.")
+                if not session:
+                    break
+
+                if session.stt:
+                    # nobody is left to hear a reply to whatever Deepgram flushes on close
+                    session.stt.on_final = functools.partial(record_last_words, session)
+                    await session.stt.close()
+                    session.stt = None
+                    if session.last_processing:
+                        await asyncio.gather(session.last_processing, return_exceptions=True)
+
+                if session.audio_buffer:
+                    caller = await transcribe_audio(session, session.audio_buffer.take(), session.heard)
+                    if caller:
+                        update_dashboard(session, caller, "")
+
+                await make_report(session)
+                print(f"💾 TTS cache: {TTS_CACHE.stats()}")
+                print(f"⚡ FAQ fast path: {FAQS.stats()}")
+
+                if session.recorder:
+                    path = await session.recorder.close()
+                    print(f"🎧 Call recording saved: {path} ({session.recorder.duration:.0f}s)")
+                    session.recorder = None
+                    await publish_recording(session.call_sid, path)
+                else:
+                    # Download + greeting merge happen in the background once Twilio finalizes the recording
+                    RECORDINGS.submit(session.call_sid)
 
-                if buf:
-                    await process_audio(buf)
-
-                await make_report()
-
-                # Download Twilio recording
-                raw_recording = download_twilio_recording(CURRENT_CALL_SID)
-
-                # Merge with greeting.mp3
-                if raw_recording:
-                    greeting_path = "static/tts/greeting.mp3"
-                    final_path = f"static/recordings/final_{CURRENT_CALL_SID}.mp3"
-                    merge_recordings(greeting_path, raw_recording, final_path)
-
-                CURRENT_CALL_SID = None
                 break
 
+            elif evt == "mark":
+                if session:
+                    session.pending_marks.discard(data.get("mark", {}).get("name"))
+
             else:
                 print(f"ℹ Event: {evt}")
 
     except Exception as e:
         print("⚠ WebSocket error:", e)
+    finally:
+        if session:
+            TRANSCRIPTS.save(session.transcript)
+            await close_session(session)
+            publish_load()
+            print(f"🧹 Session closed: {session.call_sid}")
 
 # ===== MAIN =====
-async def main():
-    print(f"🧩 Restaurant Receptionist server running at ws://0.0.0.0:{PORT}/stream")
-    
+def cleanup_files():
     cleanup_tts()
     cleanup_recordings()
-    
-    await warm_up_models()
 
-    async with websockets.serve(handle_twilio, "0.0.0.0", PORT, ping_interval=20, ping_timeout=20):
-        await asyncio.Future()
+async def prepare_shared():
+    """
+    Startup work done once before the workers fork: clean old files and fill
+    the on-disk TTS cache, so workers only load FAQ audio. Only the first
+    start after a cache wipe pays for synthesis.
+    """
+    cleanup_files()
+    if FAQ_FAST_PATH:
+        await synthesize_faqs()
+    await synthesize_fillers()
+
+def prepare():
+    async def run():
+        try:
+            await prepare_shared()
+        finally:
+            await close_clients()
+    asyncio.run(run())
+
+async def drain(server, timeout=DRAIN_SECONDS):
+    """Stop taking new calls and give the ones in progress up to timeout to hang up."""
+    server.close(close_connections=False)
+    deadline = time.monotonic() + timeout
+    if SESSIONS:
+        print(f"⏳ Draining {len(SESSIONS)} active call(s)...")
+    while SESSIONS and time.monotonic() < deadline:
+        await asyncio.sleep(0.5)
+    if SESSIONS:
+        print(f"⚠ {len(SESSIONS)} call(s) still active after {timeout:.0f}s, closing them.")
+    # the server is already closing, so the remaining connections are closed directly
+    await asyncio.gather(*(ws.close(1001) for ws in list(server.websockets)), return_exceptions=True)
+    await server.wait_closed()
+
+async def warm_up_in_background():
+    try:
+        await warm_up_models()
+    finally:
+        READY.set()
+        COLD_START.set(time.monotonic() - STARTED_AT, phase="ready")
+        print(f"✅ Ready in {time.monotonic() - STARTED_AT:.2f}s")
 
-if __name__ == "__main__":
+async def serve(worker: int = 0, shared_ready: bool = False):
+    """
+    One worker: its own event loop, clients and background queues. Worker N
+    serves metrics on METRICS_PORT + N; only worker 0 resumes report jobs
+    left over from a previous run.
+
+    The listener binds first and warm-up runs behind it, so a restart can
+    take calls straight away; /ready on the metrics port answers 503 until
+    warm-up has finished.
+    """
+    if not shared_ready:
+        cleanup_files()
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    metrics = None
+    background = []
     try:
-        asyncio.run(main())
-    except (KeyboardInterrupt, asyncio.CancelledError):
-        print("🛑 Server stopped gracefully.")
+        server = await websockets.serve(handle_twilio, "0.0.0.0", PORT, ping_interval=20, ping_timeout=20,
+                                        reuse_port=STREAM_WORKERS > 1)
+        COLD_START.set(time.monotonic() - STARTED_AT, phase="listening")
+        print(f"👂 Worker {worker} listening after {time.monotonic() - STARTED_AT:.2f}s")
+
+        metrics = await serve_metrics(METRICS_PORT + worker, ready=READY.is_set)
+        print(f"📈 Worker {worker} metrics at http://0.0.0.0:{METRICS_PORT + worker}/metrics")
+        background = [asyncio.create_task(t) for t in
+                      (warm_up_in_background(), keep_warm(), watch_loop_lag(), report_load())]
+        await REPORTS.start(recover=worker == 0)
+
+        await stop.wait()
+        await drain(server)
+    finally:
+        for task in background:
+            task.cancel()
+        await asyncio.gather(*background, return_exceptions=True)
+        if metrics:
+            await metrics.cleanup()
+        await TRANSCRIPTS.close()
+        await RECORDINGS.close()
+        await REPORTS.close()
+        await DASHBOARD.close()
+        await close_clients()
+
+def run_worker(worker: int):
+    asyncio.run(serve(worker, shared_ready=True))
+
+if __name__ == "__main__":
+    print(f"🧩 Restaurant Receptionist server running at ws://0.0.0.0:{PORT}/stream")
+    if STREAM_WORKERS > 1:
+        supervise(STREAM_WORKERS, run_worker, prepare)
+    else:
+        asyncio.run(serve())
+    print("🛑 Server stopped gracefully.")
@@ -0,0 +1,92 @@
+import os, json, asyncio, websockets
+from urllib.parse import urlencode
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+DEEPGRAM_WS_URL = os.getenv("DEEPGRAM_WS_URL", "wss://api.deepgram.com/v1/listen")
+STT_ENDPOINTING_MS = int(os.getenv("STT_ENDPOINTING_MS", 300))
+
+STREAM_PARAMS = {
+    "model": "nova-3",
+    "language": "en-US",
+    "smart_format": "true",
+    "encoding": "mulaw",       # Twilio media frames are sent as-is
+    "sample_rate": 8000,
+    "channels": 1,
+    "interim_results": "true",
+    "endpointing": STT_ENDPOINTING_MS,
+}
+
+
+# ===== DEEPGRAM LIVE TRANSCRIPTION =====
+class DeepgramStream:
+    """
+    One long-lived Deepgram WebSocket per call. Raw mulaw frames go in,
+    interim transcripts are passed to on_interim and finished utterances to on_final.
+    """
+
+    def __init__(self, on_final, on_interim=None, url=None, api_key=None):
+        self.on_final = on_final
+        self.on_interim = on_interim
+        self.url = f"{url or DEEPGRAM_WS_URL}?{urlencode(STREAM_PARAMS)}"
+        self.api_key = api_key if api_key is not None else DEEPGRAM_API_KEY
+        self.ws = None
+        self.reader = None
+        self.finals = []
+
+    @property
+    def open(self):
+        return self.ws is not None and self.reader is not None and not self.reader.done()
+
+    async def start(self):
+        headers = {"Authorization": f"Token {self.api_key}"} if self.api_key else {}
+        self.ws = await websockets.connect(self.url, extra_headers=headers, ping_interval=10)
+        self.reader = asyncio.create_task(self._read())
+
+    async def send(self, mulaw_bytes: bytes):
+        await self.ws.send(mulaw_bytes)
+
+    async def close(self):
+        if not self.ws:
+            return
+        try:
+            await self.ws.send(json.dumps({"type": "CloseStream"}))
+            await asyncio.wait_for(self.reader, timeout=2)
+        except Exception:
+            pass
+        finally:
+            if self.reader and not self.reader.done():
+                self.reader.cancel()
+            await self.ws.close()
+
+    async def _read(self):
+        async for msg in self.ws:
+            data = json.loads(msg)
+            kind = data.get("type")
+
+            if kind == "Results":
+                alt = data.get("channel", {}).get("alternatives", [{}])[0]
+                text = alt.get("transcript", "").strip()
+                if data.get("is_final"):
+                    if text:
+                        self.finals.append(text)
+                    if data.get("speech_final"):
+                        await self._flush()
+                elif text and self.on_interim:
+                    await self.on_interim(" ".join(self.finals + [text]))
+
+            elif kind == "UtteranceEnd":
+                await self._flush()
+
+        # flush whatever was finalized before the socket closed
+        await self._flush()
+
+    async def _flush(self):
+        if not self.finals:
+            return
+        text = " ".join(self.finals)
+        self.finals = []
+        await self.on_final(text)
@@ -0,0 +1,84 @@
+import os, time, signal, multiprocessing
+from multiprocessing.connection import wait
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+STREAM_WORKERS = int(os.getenv("STREAM_WORKERS", 1))               # processes accepting media streams
+DRAIN_SECONDS = float(os.getenv("DRAIN_SECONDS", 300))             # how long a stopping worker waits for live calls
+RESTART_BACKOFF_SECONDS = float(os.getenv("RESTART_BACKOFF_SECONDS", 1))
+
+
+def _run(target, *args):
+    # a restarted worker is forked after the supervisor installed its handlers; it must not inherit them
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    target(*args)
+
+
+def supervise(n_workers: int, worker, prepare=None, drain_seconds=DRAIN_SECONDS):
+    """
+    Run worker(index) in n_workers forked processes and keep them running.
+
+    Each worker binds the same port with SO_REUSEPORT and the kernel spreads
+    new connections across them. A Twilio media stream is one WebSocket
+    connection, so a call stays on the worker that accepted it for its whole
+    life without any routing. prepare(), if given, runs once in its own
+    process before the workers start, for setup they all share (disk caches,
+    cleanup); workers that exit unexpectedly are restarted.
+
+    SIGTERM/SIGINT are passed on to the workers, which stop accepting calls
+    and drain the ones in progress; anything still running after
+    drain_seconds (plus a margin) is killed.
+    """
+    ctx = multiprocessing.get_context("fork")   # workers inherit the imported modules; nothing is re-imported
+
+    if prepare:
+        p = ctx.Process(target=_run, args=(prepare,), name="prepare")
+        p.start()
+        p.join()
+        if p.exitcode:
+            print(f"⚠ Shared warm-up exited with {p.exitcode}; starting workers anyway.")
+
+    def start(index):
+        proc = ctx.Process(target=_run, args=(worker, index), name=f"worker-{index}")
+        proc.start()
+        print(f"🧵 Worker {index} started (pid {proc.pid})")
+        return proc
+
+    procs = {i: start(i) for i in range(n_workers)}
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        if not stopping:
+            print(f"🛑 Draining {len(procs)} worker(s)...")
+        stopping = True
+        for proc in procs.values():
+            if proc.is_alive():
+                os.kill(proc.pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    deadline = None
+    while procs:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + drain_seconds + 10
+        wait([p.sentinel for p in procs.values()], timeout=1)
+        for index, proc in list(procs.items()):
+            if proc.is_alive():
+                continue
+            proc.join()
+            del procs[index]
+            if not stopping:
+                print(f"⚠ Worker {index} exited with {proc.exitcode}, restarting.")
+                time.sleep(RESTART_BACKOFF_SECONDS)
+                procs[index] = start(index)
+        if deadline and time.monotonic() > deadline:
+            for proc in procs.values():
+                print(f"⚠ Worker {proc.name} still running after drain, killing.")
+                proc.kill()
+                proc.join()
+            procs.clear()
@@ -0,0 +1,179 @@
+import os, time, asyncio, contextlib
+from collections import defaultdict
+from aiohttp import web
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+METRICS_PORT = int(os.getenv("METRICS_PORT", 9100))
+TRACE_SPANS = os.getenv("TRACE_SPANS", "0") == "1"        # print every span as it finishes
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# ===== METRIC TYPES =====
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, values)) + "}"
+
+
+class Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        REGISTRY.append(self)
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(n, "")) for n in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(Metric):
+    """
+    A running total. Pass fn to read the value at scrape time instead; with
+    labels, fn returns {label values tuple: value}.
+    """
+    kind = "counter"
+
+    def __init__(self, name, help, labels=(), fn=None):
+        super().__init__(name, help, labels)
+        self.values = defaultdict(float)
+        self.fn = fn
+
+    def inc(self, amount=1, **labels):
+        self.values[self._key(labels)] += amount
+
+    def render(self):
+        if self.fn:
+            value = self.fn()
+            if isinstance(value, dict):
+                self.values.update(value)
+            else:
+                self.values[()] = value
+        return self.header() + [f"{self.name}{_labels(self.label_names, k)} {v:g}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.values[self._key(labels)] -= amount
+
+    def set(self, value, **labels):
+        self.values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = buckets
+        self.counts = defaultdict(lambda: [0] * len(self.buckets))
+        self.sums = defaultdict(float)
+        self.totals = defaultdict(int)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self.counts[key]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self.sums[key] += value
+        self.totals[key] += 1
+
+    def render(self):
+        lines = self.header()
+        for key, counts in self.counts.items():
+            for bound, n in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + (f'{bound:g}',))} {n}")
+            lines.append(f"{self.name}_bucket{_labels(self.label_names + ('le',), key + ('+Inf',))} {self.totals[key]}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {self.sums[key]:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {self.totals[key]}")
+        return lines
+
+
+REGISTRY = []
+
+
+def render_metrics() -> str:
+    return "\n".join(line for m in REGISTRY for line in m.render()) + "\n"
+
+
+# ===== STAGE SPANS =====
+STAGE_SECONDS = Histogram("voice_stage_seconds", "Time spent in one turn stage.", ["stage"])
+STAGE_IN_FLIGHT = Gauge("voice_stage_in_flight", "Stage operations currently running.", ["stage"])
+STAGE_ERRORS = Counter("voice_stage_errors_total", "Stage operations that raised.", ["stage"])
+LOOP_LAG = Histogram("voice_event_loop_lag_seconds", "How late the event loop ran a timer.",
+                     buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0))
+
+
+@contextlib.contextmanager
+def span(stage: str, session=None, **attrs):
+    """
+    Time one stage of a turn. The finished span goes into the stage histogram
+    and, when a session is given, onto its transcript tagged with the call and
+    turn it belongs to. Extra attributes can be added to the yielded dict.
+    """
+    turn = session.turn if session else None
+    start = time.time()
+    record = dict(attrs)
+    STAGE_IN_FLIGHT.inc(stage=stage)
+    try:
+        yield record
+    except asyncio.CancelledError:
+        record["error"] = "cancelled"
+        raise
+    except Exception as e:
+        record["error"] = type(e).__name__
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        elapsed = time.time() - start
+        STAGE_IN_FLIGHT.dec(stage=stage)
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if session:
+            session.transcript.spans.append({"stage": stage, "turn": turn, "start": start,
+                                             "ms": round(elapsed * 1000, 1), **record})
+        if TRACE_SPANS:
+            call = session.call_sid if session else "-"
+            print(f"⏱ {call} turn {turn} {stage}: {elapsed * 1000:.0f} ms {record or ''}")
+
+
+# ===== EVENT LOOP LAG =====
+async def watch_loop_lag(interval=LOOP_LAG_INTERVAL):
+    """Sleep on a fixed interval and record how much later than asked the loop woke us."""
+    loop = asyncio.get_running_loop()
+    while True:
+        t0 = loop.time()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, loop.time() - t0 - interval))
+
+
+# ===== HTTP ENDPOINT =====
+async def serve_metrics(port=METRICS_PORT, ready=None) -> web.AppRunner:
+    """/metrics, plus /ready (200 or 503) when a ready() callable is given."""
+    async def metrics(request):
+        return web.Response(body=render_metrics().encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def readiness(request):
+        ok = ready()
+        return web.Response(text="ready\n" if ok else "warming up\n", status=200 if ok else 503)
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    if ready:
+        app.router.add_get("/ready", readiness)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "0.0.0.0", port).start()
+    return runner
@@ -0,0 +1,131 @@
+import asyncio
+import pytest
+from admission import ProviderLimit, CallAdmission, Overloaded, LIVE, SPECULATIVE, BACKGROUND
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+# ---- ProviderLimit ----
+def test_free_slots_are_taken_at_once():
+    async def main():
+        limit = ProviderLimit("chat", 2)
+        await limit.acquire()
+        await limit.acquire()
+        return limit.active, limit.busy()
+
+    assert run(main()) == (2, True)
+
+
+def test_waiters_are_served_by_priority_then_arrival():
+    async def main():
+        limit = ProviderLimit("chat", 1)
+        await limit.acquire()
+        order = []
+
+        async def request(name, priority):
+            async with limit.slot(priority):
+                order.append(name)
+
+        tasks = [asyncio.create_task(request(name, p)) for name, p in
+                 (("report", BACKGROUND), ("speculation", SPECULATIVE), ("turn-1", LIVE), ("turn-2", LIVE))]
+        await asyncio.sleep(0)
+        assert limit.waiting() == 4
+        limit.release()
+        await asyncio.gather(*tasks)
+        return order, limit.active
+
+    assert run(main()) == (["turn-1", "turn-2", "speculation", "report"], 0)
+
+
+def test_full_queue_sheds_new_request_of_equal_or_lower_priority():
+    async def main():
+        limit = ProviderLimit("tts", 1, max_waiting=1)
+        await limit.acquire()
+        waiter = asyncio.create_task(limit.acquire(LIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await limit.acquire(LIVE)
+        waiter.cancel()
+        return limit.shed
+
+    assert run(main()) == 1
+
+
+def test_live_request_pushes_out_a_queued_report():
+    async def main():
+        limit = ProviderLimit("chat", 1, max_waiting=1)
+        await limit.acquire()
+        report = asyncio.create_task(limit.acquire(BACKGROUND))
+        await asyncio.sleep(0)
+        turn = asyncio.create_task(limit.acquire(LIVE))
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await report
+        limit.release()
+        await turn
+        return limit.active, limit.waiting()
+
+    assert run(main()) == (1, 0)
+
+
+def test_timeout_raises_overloaded_and_leaves_the_queue():
+    async def main():
+        limit = ProviderLimit("deepgram", 1)
+        await limit.acquire()
+        with pytest.raises(Overloaded):
+            await limit.acquire(LIVE, timeout=0.01)
+        return limit.waiting()
+
+    assert run(main()) == 0
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def main():
+        limit = ProviderLimit("chat", 1)
+        await limit.acquire()
+        waiter = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+        limit.release()          # the slot is handed to the waiter...
+        waiter.cancel()          # ...which is abandoned before it runs
+        await asyncio.gather(waiter, return_exceptions=True)
+        return limit.active, limit.waiting()
+
+    assert run(main()) == (0, 0)
+
+
+# ---- CallAdmission ----
+def test_admission_counts_admitted_and_reported_calls():
+    admission = CallAdmission(max_calls=3, grace=30)
+    assert admission.admit("CA1")
+    admission.report("worker-0", ["CA1", "CA2"])
+    assert admission.active() == 2
+    assert admission.calls() == ["CA1", "CA2"]
+    assert admission.admit("CA3")
+    assert not admission.admit("CA4")
+    assert admission.admit("CA3")            # a retried webhook for an admitted call is not a new call
+    assert admission.rejected == 1
+
+
+def test_admission_refuses_while_a_worker_is_overloaded():
+    admission = CallAdmission(max_calls=0)
+    admission.report("worker-0", [], overloaded=True)
+    assert not admission.admit("CA1")
+    admission.report("worker-0", [], overloaded=False)
+    assert admission.admit("CA1")
+
+
+def test_admitted_call_stops_counting_after_grace():
+    admission = CallAdmission(max_calls=1, grace=0)
+    assert admission.admit("CA1")
+    assert admission.active() == 0           # its stream never reached a worker
+    assert admission.admit("CA2")
+
+
+def test_forgotten_worker_frees_its_calls():
+    admission = CallAdmission(max_calls=1, grace=0)
+    admission.report("worker-0", ["CA1"])
+    assert not admission.admit("CA2")
+    admission.forget("worker-0")
+    assert admission.admit("CA2")
@@ -0,0 +1,128 @@
+from contact_extractor import ContactExtractor
+
+
+def feed(*chunks):
+    extractor = ContactExtractor()
+    for chunk in chunks:
+        extractor.feed(chunk)
+    return extractor
+
+
+def slot(extractor, kind):
+    capture = extractor.slots.get(kind)
+    return capture.value if capture else None
+
+
+# ---- happy paths ----
+def test_spelled_email_across_chunks():
+    x = feed("My email is j o h n d o e", "at gmail dot com.")
+    assert slot(x, "email") == "johndoe@gmail.com"
+    assert x.in_progress() == {}
+
+
+def test_spelled_letters_with_periods():
+    # smart_format writes spelling as "J. O. H. N."; those periods are not "dot"
+    x = feed("J. O. H. N.", "D O E at gmail.com")
+    assert slot(x, "email") == "johndoe@gmail.com"
+
+
+def test_at_and_dot_words():
+    assert slot(feed("my email is john dot doe at gmail dot com"), "email") == "john.doe@gmail.com"
+    assert slot(feed("My email is", "john at gmail dot com"), "email") == "john@gmail.com"
+    assert slot(feed("my email is j o h n underscore", "s m i t h at yahoo dot com"), "email") == "john_smith@yahoo.com"
+
+
+def test_formatted_email_with_full_stop():
+    assert slot(feed("It's john.doe@example.com."), "email") == "john.doe@example.com"
+
+
+def test_question_for_email_is_a_cue():
+    x = ContactExtractor()
+    x.asked("Could I get your email address, please?")
+    x.feed("Sure. John at gmail dot com.")
+    assert slot(x, "email") == "john@gmail.com"
+
+
+def test_spelled_name_then_spoken_surname():
+    assert slot(feed("j o h n", "smith at gmail dot com"), "email") == "johnsmith@gmail.com"
+
+
+def test_correction_and_reset():
+    x = feed("j o h m sorry n at gmail dot com")
+    assert slot(x, "email") == "john@gmail.com"
+    assert x.slots["email"].corrections == 1
+    assert slot(feed("c a t", "scratch that", "d o g at aol dot com"), "email") == "dog@aol.com"
+
+
+def test_phone_in_digit_groups_across_chunks():
+    x = feed("My number is 415", "555", "0132.")
+    assert slot(x, "phone") == "4155550132"
+    assert x.slots["phone"].spoken() == "415-555-0132"
+
+
+def test_phone_digit_words_and_double():
+    assert slot(feed("double five five, one two three, four five six seven"), "phone") == "5551234567"
+
+
+def test_question_for_phone_makes_loose_digits_a_partial():
+    x = ContactExtractor()
+    x.asked("And what's the best phone number to reach you?")
+    x.feed("It's 415 555")
+    assert x.in_progress() == {"phone": "415555"}
+
+
+# ---- ordinary speech is not contact details ----
+def test_full_stop_is_not_a_spelled_dot():
+    x = feed("Sure.")
+    assert x.in_progress() == {}
+    assert x.prompt_note() == ""
+
+
+def test_sentences_do_not_start_an_email():
+    x = feed("Hi, I'd like to book a table. My name is Sam.", "What time do you close?", "Four people.")
+    assert x.slots == {}
+    assert x.prompt_note() == ""
+
+
+def test_time_after_at_is_not_an_address():
+    x = feed("table for four at 7 tonight.")
+    assert x.slots == {}
+    assert x.in_progress() == {}
+
+
+def test_times_and_dates_are_not_phone_numbers():
+    for text in ("Can I book a table for 2 people at 7:45?", "Reservation for Friday, 10/24 at 7:30.",
+                 "party of 12 at 8 p.m. please"):
+        x = feed(text)
+        assert x.in_progress() == {}, text
+        assert x.prompt_note() == "", text
+
+
+def test_plain_word_before_at_needs_an_email_cue():
+    for text in ("Sure. At gmail dot com.", "john at gmail dot com", "table for four at seven"):
+        x = feed(text)
+        assert x.slots == {}, text
+        assert x.in_progress() == {}, text
+
+
+def test_partial_expires_after_unrelated_turn():
+    x = feed("j o h n")
+    assert x.in_progress() == {"email": "john"}
+    x.feed("what time do you close?")
+    assert x.in_progress() == {}
+    x.feed("four people.")
+    assert x.prompt_note() == ""
+
+
+def test_partial_phone_expires_after_unrelated_turn():
+    x = feed("my number is four one five")
+    assert x.in_progress() == {"phone": "415"}
+    x.feed("do you have vegetarian options?")
+    assert x.in_progress() == {}
+
+
+def test_prompt_note_lists_slots_and_partials():
+    x = feed("My number is 415 555 0132.", "my email is j o h n")
+    note = x.prompt_note()
+    assert "- phone: 415-555-0132 (confidence 0.90)" in note
+    assert "- email still being spelled, heard so far: john" in note
@@ -0,0 +1,37 @@
+import asyncio
+import conversation
+from conversation import ConversationContext
+
+
+def turn(i):
+    return {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "x" * 200}
+
+
+def test_compact_keeps_recent_turns():
+    ctx = ConversationContext(budget=100, keep_recent=2)
+    for i in range(6):
+        ctx.append(turn(i))
+
+    async def summarize(summary, turns):
+        return f"{len(turns)} turns"
+
+    asyncio.run(ctx.compact(summarize))
+    assert ctx.summary == "4 turns"
+    assert [m["content"][:6] for m in ctx] == ["turn 4", "turn 5"]
+
+
+def test_compact_survives_trimming_while_summarizing(monkeypatch):
+    monkeypatch.setattr(conversation, "MAX_CONTEXT_MESSAGES", 6)
+    ctx = ConversationContext(budget=100, keep_recent=2)
+    for i in range(6):
+        ctx.append(turn(i))
+
+    async def summarize(summary, turns):
+        # two turns arrive mid-summary and push the two oldest out of the capped history
+        ctx.append(turn(6))
+        ctx.append(turn(7))
+        return "summary"
+
+    asyncio.run(ctx.compact(summarize))
+    # turns 0-3 were summarized; 4-7 were not and must all still be there
+    assert [m["content"][:6] for m in ctx] == ["turn 4", "turn 5", "turn 6", "turn 7"]
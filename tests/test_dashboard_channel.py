@@ -0,0 +1,34 @@
+import asyncio
+from dashboard_channel import DashboardChannel
+
+
+class FlakyClient:
+    """Socket.IO client stand-in whose first emit fails."""
+    connected = True
+
+    def __init__(self):
+        self.failures = 1
+        self.batches = []
+
+    async def emit(self, event, batch, namespace):
+        await asyncio.sleep(0.05)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("dashboard down")
+        self.batches.append([e["data"]["text"] for e in batch])
+
+
+def test_failed_batch_is_requeued_under_its_coalescing_keys():
+    async def run():
+        channel = DashboardChannel(url="http://dashboard.test", flush_ms=1)
+        channel.client = FlakyClient()
+        channel.send("update", "CA1", {"text": "four"}, coalesce="interim")
+        channel.send("update", "CA1", {"text": "Hello."})
+        await asyncio.sleep(0.02)      # the first emit is in flight and will fail
+        channel.send("update", "CA1", {"text": "four people"}, coalesce="interim")
+        await asyncio.sleep(0.3)
+        channel.task.cancel()
+        return channel.client.batches
+
+    # the stale interim from the failed batch is replaced, not sent after its newer version
+    assert asyncio.run(run()) == [["Hello.", "four people"]]
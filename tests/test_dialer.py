@@ -0,0 +1,125 @@
+import time, json, asyncio
+from dialer import TokenBucket, Campaign, Dial, load_numbers
+
+
+class Refused(Exception):
+    status = 429
+
+
+def test_token_bucket_paces_to_its_rate():
+    async def main():
+        bucket = TokenBucket(rate=50, burst=1)
+        t0 = time.monotonic()
+        for _ in range(6):
+            await bucket.take()
+        return time.monotonic() - t0
+
+    # the first token is free, the other five come 20 ms apart
+    assert 0.09 <= asyncio.run(main()) < 0.5
+
+
+def test_token_bucket_burst_is_available_at_once():
+    async def main():
+        bucket = TokenBucket(rate=1, burst=3)
+        t0 = time.monotonic()
+        for _ in range(3):
+            await bucket.take()
+        return time.monotonic() - t0
+
+    assert asyncio.run(main()) < 0.05
+
+
+def campaign(tmp_path, numbers, place, **kwargs):
+    kwargs = {"calls_per_second": 100, "max_concurrent": 2, "retry_seconds": 0.01, "call_timeout": 1, **kwargs}
+    return Campaign("test", [Dial(n) for n in numbers], place, path=str(tmp_path), **kwargs)
+
+
+def test_campaign_respects_max_concurrent_and_records_outcomes(tmp_path):
+    live, peak = set(), []
+
+    async def main():
+        c = None
+
+        async def place(dial):
+            sid = f"CA{dial.number}"
+            live.add(sid)
+            peak.append(len(live))
+
+            async def hang_up():
+                await asyncio.sleep(0.02)
+                live.discard(sid)
+                c.status(sid, "in-progress")
+                c.status(sid, "busy" if dial.number.endswith("7") else "completed", "1")
+            asyncio.create_task(hang_up())
+            return sid
+
+        c = campaign(tmp_path, ["+15550001", "+15550002", "+15550007", "+15550004"], place)
+        await c.run()
+        return c
+
+    c = asyncio.run(main())
+    assert max(peak) <= 2
+    assert c.report()["outcomes"] == {"completed": 3, "busy": 1}
+    lines = [json.loads(line) for line in (tmp_path / "test.jsonl").read_text().splitlines()]
+    assert sorted(d["number"] for d in lines) == ["+15550001", "+15550002", "+15550004", "+15550007"]
+
+
+def test_status_arriving_before_create_returns_is_kept(tmp_path):
+    async def main():
+        c = None
+
+        async def place(dial):
+            c.status("CA1", "completed", "3")        # Twilio can call back before the create response lands
+            return "CA1"
+
+        c = campaign(tmp_path, ["+15550001"], place)
+        await c.run()
+        return c.dials[0]
+
+    dial = asyncio.run(main())
+    assert (dial.status, dial.duration) == ("completed", 3)
+
+
+def test_refused_create_is_retried(tmp_path):
+    attempts = []
+
+    async def main():
+        c = None
+
+        async def place(dial):
+            attempts.append(dial.number)
+            if len(attempts) == 1:
+                raise Refused("Too Many Requests")
+            asyncio.get_running_loop().call_soon(c.status, "CA1", "completed", "1")
+            return "CA1"
+
+        c = campaign(tmp_path, ["+15550001"], place)
+        await c.run()
+        return c
+
+    c = asyncio.run(main())
+    assert len(attempts) == 2
+    assert c.refused == 1
+    assert c.dials[0].status == "completed"
+
+
+def test_missing_final_status_times_out_as_unknown(tmp_path):
+    async def place(dial):
+        return "CA1"
+
+    c = campaign(tmp_path, ["+15550001"], place, call_timeout=0.05)
+    asyncio.run(c.run())
+    assert c.dials[0].status == "unknown"
+
+
+def test_finished_numbers_are_skipped_on_restart(tmp_path):
+    (tmp_path / "test.jsonl").write_text(json.dumps({"number": "+15550001", "status": "completed"}) + "\n")
+    c = campaign(tmp_path, ["+15550001", "+15550002"], None)
+    assert [d.number for d in c.dials] == ["+15550002"]
+    assert c.skipped == 1
+
+
+def test_load_numbers_skips_header_and_blank_rows(tmp_path):
+    path = tmp_path / "campaign.csv"
+    path.write_text("number,greeting\n+15550001,Hi there\n\n+15550002\n")
+    assert [(d.number, d.greeting) for d in load_numbers(str(path))] == [("+15550001", "Hi there"), ("+15550002", "")]
@@ -0,0 +1,83 @@
+import pytest
+from faq import FAQIndex, build_faqs, parse_info
+
+# same shape as stream_server.RESTAURANT_INFO (importing the server would pull in every client)
+INFO = """
+Restaurant Name: The Restaurant
+Cuisine: Italian & Continental
+Timings: 10:00 AM – 10:00 PM
+Location: 123 Main Street, Austin, TX
+Contact: +1 (507) 554-1673
+Menu Highlights:
+  - Starters: Garlic Bread, Caesar Salad, Bruschetta
+  - Main Course: Alfredo Pasta, Margherita Pizza, Lasagna
+  - Desserts: Tiramisu, Chocolate Mousse
+  - Beverages: Coffee, Wine, Fresh Juice
+Policies:
+  - Accepts reservations up to 10 people.
+  - Takeout and curbside pickup available.
+  - No home delivery.
+"""
+
+
+@pytest.fixture
+def index():
+    return FAQIndex(build_faqs(INFO))
+
+
+def intent(index, text):
+    faq = index.match(text)
+    return faq.intent if faq else None
+
+
+def test_parse_info_sections():
+    fields = parse_info(INFO)
+    assert fields["Timings"] == "10:00 AM – 10:00 PM"
+    assert fields["Menu Highlights"]["Desserts"] == ["Tiramisu", "Chocolate Mousse"]
+    assert "No home delivery" in fields["Policies"]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("What are your opening hours?", "hours"),
+    ("When do you close?", "hours"),
+    ("Where are you located?", "location"),
+    ("What's your address?", "location"),
+    ("Do you deliver?", "delivery"),
+    ("What desserts do you have?", "desserts"),
+    ("What kind of food do you serve?", "menu"),
+])
+def test_plain_questions_get_a_canned_answer(index, text, expected):
+    assert intent(index, text) == expected
+
+
+def test_hours_answer_only_states_the_timings(index):
+    assert index.match("What are your hours?").answer == "Our timings are 10:00 AM to 10:00 PM."
+
+
+def test_delivery_answer_follows_policies(index):
+    assert index.match("Do you deliver?").answer.startswith("Sorry, we don't offer home delivery")
+
+
+@pytest.mark.parametrize("text", [
+    "Are you open on Christmas day?",
+    "Is the kitchen closed on Mondays?",
+    "Are you open on weekends?",
+    "Do you have a location in Dallas?",
+    "Is there parking near your location?",
+    "I'd like to book a table for four.",
+    "What time do you open and where are you located?",
+    "Do you have vegetarian options?",
+])
+def test_questions_the_info_doesnt_settle_go_to_gpt(index, text):
+    assert index.match(text) is None
+
+
+def test_long_turns_go_to_gpt(index):
+    assert index.match("so I was wondering, before anything else, if you could tell me what hours you keep") is None
+
+
+def test_stats_count_hits_and_fallbacks(index):
+    index.match("Where are you located?")
+    index.match("Do you have a location in Dallas?")
+    index.match("Where are you located?", record=False)
+    assert index.stats() == {"hits": 1, "fallbacks": 1, "hit_rate": 0.5, "by_intent": {"location": 1}}
@@ -0,0 +1,39 @@
+import pytest
+from recording_jobs import mp3_format, concat_mp3
+
+
+def frame(header: bytes, size=104):
+    return header + bytes(size - len(header))
+
+
+MPEG1_44K_STEREO = frame(b"\xff\xfb\x90\x00")
+MPEG2_24K_MONO = frame(b"\xff\xf3\x84\xc4")
+MPEG25_8K_MONO = frame(b"\xff\xe3\x18\xc4")
+
+
+def write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_format_comes_from_the_first_frame_after_the_tag(tmp_path):
+    id3 = b"ID3\x04\x00\x00\x00\x00\x00\x04" + b"\xff\xfb\x00\x00"   # a frame-like sync inside the tag is skipped
+    assert mp3_format(write(tmp_path / "a.mp3", id3 + MPEG2_24K_MONO * 2)) == (24000, 1)
+    assert mp3_format(write(tmp_path / "b.mp3", MPEG1_44K_STEREO)) == (44100, 2)
+    assert mp3_format(write(tmp_path / "c.mp3", MPEG25_8K_MONO)) == (8000, 1)
+    assert mp3_format(write(tmp_path / "d.mp3", b"not audio")) is None
+
+
+def test_concat_copies_frames_of_matching_files(tmp_path):
+    a = write(tmp_path / "a.mp3", MPEG2_24K_MONO)
+    b = write(tmp_path / "b.mp3", MPEG2_24K_MONO * 2 + b"TAG" + bytes(125))
+    out = concat_mp3([a, b], str(tmp_path / "out.mp3"))
+    assert open(out, "rb").read() == MPEG2_24K_MONO * 3
+
+
+def test_concat_refuses_mixed_formats(tmp_path):
+    a = write(tmp_path / "a.mp3", MPEG2_24K_MONO)
+    b = write(tmp_path / "b.mp3", MPEG25_8K_MONO)
+    with pytest.raises(ValueError):
+        concat_mp3([a, b], str(tmp_path / "out.mp3"))
+    assert not (tmp_path / "out.mp3").exists()
@@ -0,0 +1,22 @@
+import pytest
+from speculation import same_request
+
+
+@pytest.mark.parametrize("interim, final", [
+    ("what time do you close", "What time do you close?"),
+    ("um what time do you close", "What time do you close?"),
+    ("uh can i book a table for four at seven tonight", "Can I book a table for four, at seven tonight?"),
+])
+def test_same_request(interim, final):
+    assert same_request(interim, final)
+
+
+@pytest.mark.parametrize("interim, final", [
+    ("a table for four at seven", "A table for four at eight."),              # numbers must match
+    ("do you have any vegetarian", "Do you have any vegetarian pasta?"),      # caller went on
+    ("what time do you close", "Where are you located?"),
+    ("can i book a table for four", "Can I book the table for four?"),        # short turns must match word for word
+    ("", "What time do you close?"),
+])
+def test_different_request(interim, final):
+    assert not same_request(interim, final)
@@ -0,0 +1,40 @@
+from speech_pipeline import SentenceSplitter
+
+
+def split(tokens, min_chars=20):
+    splitter = SentenceSplitter(min_chars)
+    sentences = []
+    for token in tokens:
+        sentences += splitter.feed(token)
+    return sentences, splitter.flush()
+
+
+def test_sentence_is_released_once_complete():
+    splitter = SentenceSplitter()
+    assert splitter.feed("We're open until ten tonight.") == []     # the end isn't certain until whitespace
+    assert splitter.feed(" Would you") == ["We're open until ten tonight."]
+    assert splitter.flush() == ["Would you"]
+
+
+def test_tokens_split_across_words():
+    sentences, rest = split(["Your table", " for four is", " booked! See", " you at", " seven."])
+    assert sentences == ["Your table for four is booked!"]
+    assert rest == ["See you at seven."]
+
+
+def test_short_pieces_merge_with_the_next_sentence():
+    sentences, rest = split(["Sure. ", "What time would you like to come in? ", "Great."])
+    assert sentences == ["Sure. What time would you like to come in?"]
+    assert rest == ["Great."]
+
+
+def test_abbreviations_and_inline_dots_do_not_split():
+    sentences, rest = split(["See you at 7 p.m. tomorrow, Dr. Smith. ",
+                             "I have john.doe@gmail.com and 10.30 noted. "])
+    assert sentences == ["See you at 7 p.m. tomorrow, Dr. Smith.", "I have john.doe@gmail.com and 10.30 noted."]
+    assert rest == []
+
+
+def test_closing_quote_stays_with_its_sentence():
+    sentences, _ = split(['She said "we loved the tiramisu." ', "Anything else?"])
+    assert sentences == ['She said "we loved the tiramisu."']
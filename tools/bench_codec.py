@@ -0,0 +1,64 @@
+"""
+Micro-benchmark: audio conversion cost per utterance, audioop vs audio_codec.
+
+Inbound is the STT path (8 kHz mulaw -> 16 kHz WAV bytes), outbound is the
+playback path (24 kHz TTS PCM -> 8 kHz mulaw). Needs a Python that still ships
+audioop (3.12 or older) for the baseline column. Run from the repo root:
+
+    python -m tools.bench_codec
+"""
+import io, time, wave, argparse
+import numpy as np
+import audioop
+import audio_codec
+
+
+def audioop_inbound(mulaw):
+    pcm8k = audioop.ulaw2lin(mulaw, 2)
+    pcm16k, _ = audioop.ratecv(pcm8k, 2, 1, 8000, 16000, None)
+    pcm16k = audioop.mul(pcm16k, 2, 0.95)
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16000)
+        wf.writeframes(pcm16k)
+    return buf.getvalue()
+
+
+def audioop_outbound(pcm):
+    pcm8k, _ = audioop.ratecv(pcm, 2, 1, 24000, 8000, None)
+    return audioop.lin2ulaw(pcm8k, 2)
+
+
+def speech_like(seconds, rate):
+    """Noise shaped by a slow envelope, so mulaw uses its whole range."""
+    rng = np.random.default_rng(0)
+    n = int(seconds * rate)
+    envelope = 0.5 + 0.5 * np.sin(np.linspace(0, 6 * np.pi, n))
+    return (rng.normal(0, 6000, n) * envelope).clip(-32768, 32767).astype(np.int16)
+
+
+def best_ms(fn, arg, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        times.append(time.perf_counter() - t0)
+    return min(times) * 1000
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="audioop vs audio_codec conversion cost")
+    ap.add_argument("--seconds", type=float, nargs="+", default=[1, 5, 15])
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    print(f"{'audio':>6} {'path':>9} {'audioop':>11} {'audio_codec':>12}")
+    for secs in args.seconds:
+        mulaw = audio_codec.ulaw_encode(speech_like(secs, 8000))
+        pcm24k = speech_like(secs, 24000).tobytes()
+        for name, old, new, arg in (("inbound", audioop_inbound, audio_codec.mulaw_to_wav16k, mulaw),
+                                    ("outbound", audioop_outbound, audio_codec.pcm24k_to_mulaw8k, pcm24k)):
+            print(f"{secs:>5.0f}s {name:>9} {best_ms(old, arg, args.repeat):>8.2f} ms "
+                  f"{best_ms(new, arg, args.repeat):>9.2f} ms")
@@ -0,0 +1,92 @@
+"""
+Throughput benchmark for outbound campaigns: calls placed per minute against the dialer's budgets.
+
+Starts the Twilio stand-in with its outbound CPS enforced (creates beyond
+--twilio-cps in any second get 429, as Twilio does per account), runs a
+dialer.Campaign against it with the dialer's real status-callback server,
+and reports sustained calls/min, queue wait, peak concurrency and refusals.
+
+    python -m tools.bench_dialer --numbers 60 --cps 5 --max-concurrent 20
+    python -m tools.bench_dialer --numbers 30 --cps 5 --max-concurrent 5 --call-s 3
+
+Exits non-zero when the campaign went over its concurrency budget, was
+refused for rate, or didn't sustain its target calls/min (when the
+concurrency budget, not the rate, is what limits it, that is reported).
+"""
+import os, sys, json, asyncio, argparse, tempfile
+
+from tools.fake_twilio import FakeTwilio
+from tools.bench_latency import start_app, free_port
+
+
+async def run(args):
+    fake_tw = FakeTwilio(delay_ms=args.twilio_delay_ms, max_cps=args.twilio_cps or args.cps,
+                         ring_s=args.ring_s, call_s=args.call_s)
+    tw_runner, tw_port = await start_app(fake_tw.app())
+    status_port = free_port()
+    work_dir = tempfile.mkdtemp(prefix="bench_dialer_")
+    # clients and dialer read their settings at import time
+    os.environ.update(TWILIO_ACCOUNT_SID="ACbench",
+                      TWILIO_AUTH_TOKEN="fake",
+                      TWILIO_API_BASE_URL=f"http://127.0.0.1:{tw_port}",
+                      TWILIO_NUMBER="+15550100000",
+                      PUBLIC_BASE_URL=f"http://127.0.0.1:{tw_port}",
+                      DIALER_PUBLIC_URL=f"http://127.0.0.1:{status_port}",
+                      STATUS_CALLBACK_URL="")
+    import dialer
+    from clients import close_clients
+
+    # numbers ending 7, 8 and 9 come back busy, no-answer and failed from the fake
+    dials = [dialer.Dial(f"+1555010{n:04d}", f"Hi, this is a reminder for booking {n}.")
+             for n in range(args.numbers)]
+    campaign = dialer.Campaign("bench", dials, dialer.place_call, calls_per_second=args.cps, burst=args.burst,
+                               max_concurrent=args.max_concurrent, retry_seconds=0.5,
+                               call_timeout=args.ring_s + args.call_s + 10, path=work_dir)
+    status_runner = await dialer.serve_status(campaign, status_port)
+    print(f"📣 Dialing {args.numbers} number(s) at {args.cps:g}/s, {args.max_concurrent} at once "
+          f"(Twilio allows {args.twilio_cps or args.cps:g}/s; results: {campaign.results_path})")
+    try:
+        await campaign.run()
+    finally:
+        await status_runner.cleanup()
+        await close_clients()
+        await tw_runner.cleanup()
+
+    report = campaign.report()
+    print(json.dumps(report, indent=2))
+    print(f"\nfake Twilio: {len(fake_tw.outbound)} call(s) created, {fake_tw.refused} refused (429), "
+          f"peak live {fake_tw.peak_live}")
+
+    failed = []
+    if fake_tw.peak_live > args.max_concurrent:
+        failed.append(f"{fake_tw.peak_live} calls live at once > max concurrent {args.max_concurrent}")
+    if fake_tw.refused:
+        failed.append(f"{fake_tw.refused} create request(s) refused for rate")
+    if report["placed"] < report["numbers"]:
+        failed.append(f"only {report['placed']}/{report['numbers']} calls placed")
+    # with calls lasting ring_s + call_s, max_concurrent slots can't start more than this many per minute
+    slot_bound = args.max_concurrent / (args.ring_s + args.call_s) * 60
+    expected = min(report["target_calls_per_min"], slot_bound)
+    rate = report["calls_per_min"] or 0
+    if slot_bound < report["target_calls_per_min"]:
+        print(f"concurrency-bound: {args.max_concurrent} slots sustain at most ~{slot_bound:.0f} calls/min")
+    if rate > report["target_calls_per_min"] * 1.05:
+        failed.append(f"{rate:g} calls/min is over the {report['target_calls_per_min']:g} target")
+    elif rate < expected * 0.8:
+        failed.append(f"{rate:g} calls/min is well under the {expected:.0f} expected")
+    for f in failed:
+        print(f"❌ {f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--numbers", type=int, default=40)
+    ap.add_argument("--cps", type=float, default=5, help="dialer calls per second")
+    ap.add_argument("--burst", type=int, default=1)
+    ap.add_argument("--max-concurrent", type=int, default=20)
+    ap.add_argument("--twilio-cps", type=float, help="CPS the fake enforces (default: same as --cps)")
+    ap.add_argument("--ring-s", type=float, default=0.5, help="fake ring time before answer")
+    ap.add_argument("--call-s", type=float, default=2.0, help="fake answered-call length")
+    ap.add_argument("--twilio-delay-ms", type=int, default=50)
+    sys.exit(asyncio.run(run(ap.parse_args())))
@@ -0,0 +1,333 @@
+"""
+Replay benchmark for the turn pipeline: end of caller speech -> transcript -> LLM reply -> first AI audio.
+
+Starts local stand-ins for Deepgram, OpenAI and Twilio (with configurable
+injected latency), launches stream_server.py against them, and replays a
+mulaw call fixture over a real WebSocket exactly as Twilio would: one 20 ms
+media frame every 20 ms. Timings per turn are taken from what the stream
+server itself emits: the caller/suggestion dashboard events and the first
+outbound media frame.
+
+    python -m tools.bench_latency --calls 10 --concurrency 5
+    python -m tools.bench_latency --fixture call.wav --threshold first_audio=1200
+
+Exits non-zero when a p95 is above its --threshold, so it can gate CI.
+"""
+import os, re, sys, json, math, time, wave, base64, asyncio, argparse, tempfile, subprocess
+import numpy as np
+import websockets
+import aiohttp
+from aiohttp import web
+
+from vad import frame_energies, FRAME_BYTES, FRAME_MS
+from audio_codec import ulaw_encode
+from tools.fake_deepgram import FakeDeepgram, DEFAULT_SCRIPT, load_script
+from tools.fake_openai import FakeOpenAI
+from tools.fake_twilio import FakeTwilio
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SILENCE = b"\xff" * FRAME_BYTES
+STAGES = ["transcript", "llm_reply", "first_audio"]
+
+
+# ===== FIXTURES =====
+def load_fixture(path: str) -> bytes:
+    """8 kHz mono mulaw from a .wav (16-bit PCM) or raw .ulaw/.raw file."""
+    if path.endswith(".wav"):
+        with wave.open(path, "rb") as wf:
+            if wf.getframerate() != 8000 or wf.getnchannels() != 1 or wf.getsampwidth() != 2:
+                raise SystemExit(f"{path}: expected 8 kHz mono 16-bit PCM")
+            return ulaw_encode(np.frombuffer(wf.readframes(wf.getnframes()), dtype="<i2"))
+    return open(path, "rb").read()
+
+
+def synthetic_fixture(utterances=3, speech_s=1.5, gap_s=3.0) -> bytes:
+    """Voiced bursts (a modulated tone) separated by silence long enough for the AI to answer."""
+    out = bytearray()
+    n = int(speech_s * 8000)
+    for _ in range(utterances):
+        pcm = np.array([6000 * math.sin(2 * math.pi * 300 * i / 8000) * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * i / 8000))
+                        for i in range(n)], dtype=np.int16)
+        out += ulaw_encode(pcm)
+        out += SILENCE * int(gap_s * 1000 / FRAME_MS)
+    return bytes(out)
+
+
+def speech_ends(mulaw: bytes, threshold_db=-40, min_gap_ms=300):
+    """Frame indices just after each utterance's last voiced frame."""
+    voiced = frame_energies(mulaw) > threshold_db
+    ends, last, gap = [], None, 0
+    for i, v in enumerate(voiced):
+        if v:
+            last, gap = i, 0
+        elif last is not None:
+            gap += FRAME_MS
+            if gap >= min_gap_ms:
+                ends.append(last + 1)
+                last = None
+    if last is not None:
+        ends.append(last + 1)
+    return ends
+
+
+# ===== ONE CALL =====
+async def replay_call(url, call_no, mulaw, ends, tail_s):
+    call_sid = f"CAbench{call_no:06d}"
+    stream_sid = f"MZbench{call_no:06d}"
+    frames = [mulaw[i:i + FRAME_BYTES] for i in range(0, len(mulaw), FRAME_BYTES)]
+    frames += [SILENCE] * int(tail_s * 1000 / FRAME_MS)
+    eos_times = {}
+    media_times = []
+    clears = []
+
+    async with websockets.connect(url, max_size=None) as ws:
+        # like Twilio: outbound audio plays out in real time, a mark is echoed once the
+        # audio before it has played, and "clear" drops what's left and echoes marks at once
+        playout = {"until": 0.0, "marks": []}
+        echoes = set()
+
+        async def echo_mark(name, at):
+            await asyncio.sleep(max(0.0, at - time.time()))
+            if name in playout["marks"]:
+                playout["marks"].remove(name)
+                try:
+                    await ws.send(json.dumps({"event": "mark", "streamSid": stream_sid, "mark": {"name": name}}))
+                except websockets.ConnectionClosed:
+                    pass     # the server hung up first; Twilio drops the mark too
+
+        def schedule_echo(name, at):
+            task = asyncio.create_task(echo_mark(name, at))
+            echoes.add(task)
+            task.add_done_callback(echoes.discard)
+
+        async def receive():
+            async for msg in ws:
+                data = json.loads(msg)
+                evt = data.get("event")
+                if evt == "media":
+                    now = time.time()
+                    media_times.append(now)
+                    playout["until"] = max(playout["until"], now) + FRAME_MS / 1000
+                elif evt == "mark":
+                    name = data["mark"]["name"]
+                    playout["marks"].append(name)
+                    schedule_echo(name, playout["until"])
+                elif evt == "clear":
+                    clears.append(time.time())
+                    playout["until"] = 0.0
+                    for name in list(playout["marks"]):
+                        schedule_echo(name, 0)
+
+        receiver = asyncio.create_task(receive())
+        await ws.send(json.dumps({"event": "connected", "protocol": "Call", "version": "1.0.0"}))
+        await ws.send(json.dumps({
+            "event": "start",
+            "streamSid": stream_sid,
+            "start": {"streamSid": stream_sid, "callSid": call_sid, "tracks": ["inbound"],
+                      "mediaFormat": {"encoding": "audio/x-mulaw", "sampleRate": 8000, "channels": 1}},
+        }))
+
+        t0 = time.time()
+        end_set = set(ends)
+        for i, frame in enumerate(frames):
+            delay = t0 + i * FRAME_MS / 1000 - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await ws.send(json.dumps({"event": "media", "streamSid": stream_sid,
+                                      "media": {"payload": base64.b64encode(frame).decode()}}))
+            if i + 1 in end_set:
+                eos_times[i + 1] = time.time()
+
+        await ws.send(json.dumps({"event": "stop", "streamSid": stream_sid}))
+        try:
+            await asyncio.wait_for(receiver, timeout=15)
+        except asyncio.TimeoutError:
+            receiver.cancel()
+        for task in echoes:
+            task.cancel()
+        await asyncio.gather(*echoes, return_exceptions=True)
+
+    return call_sid, [eos_times[e] for e in ends if e in eos_times], media_times, len(clears)
+
+
+def turn_latencies(eos_list, media_times, events):
+    """Match each end of speech to the first transcript, reply and audio that follow it."""
+    callers = [t for t, kind, d in events if kind == "dashboard" and d.get("caller")]
+    replies = [t for t, kind, d in events if kind == "dashboard" and d.get("suggestion")]
+    rows = []
+    for n, eos in enumerate(eos_list):
+        nxt = eos_list[n + 1] if n + 1 < len(eos_list) else float("inf")
+        first = lambda ts: next((t for t in ts if eos <= t < nxt), None)
+        row = {"transcript": first(callers), "llm_reply": first(replies), "first_audio": first(media_times)}
+        rows.append({k: (v - eos) * 1000 for k, v in row.items() if v is not None})
+    return rows
+
+
+# ===== HARNESS =====
+async def start_app(app):
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, site._server.sockets[0].getsockname()[1]
+
+
+async def wait_for_port(port, proc, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"stream_server exited with code {proc.returncode}")
+        try:
+            _, w = await asyncio.open_connection("127.0.0.1", port)
+            w.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise SystemExit("stream_server did not start listening in time")
+
+
+def free_port():
+    import socket
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def report(rows, thresholds):
+    print(f"\n{'stage':<14}{'n':>5}{'p50':>10}{'p95':>10}{'p99':>10}   (ms from end of speech)")
+    failed = []
+    for stage in STAGES:
+        vals = np.array([r[stage] for r in rows if stage in r])
+        if not len(vals):
+            print(f"{stage:<14}{0:>5}{'-':>10}{'-':>10}{'-':>10}")
+            continue
+        p50, p95, p99 = np.percentile(vals, [50, 95, 99])
+        print(f"{stage:<14}{len(vals):>5}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}")
+        if stage in thresholds and p95 > thresholds[stage]:
+            failed.append(f"{stage} p95 {p95:.0f} ms > {thresholds[stage]:.0f} ms")
+    missing = sum(1 for r in rows if "first_audio" not in r)
+    if missing:
+        failed.append(f"{missing} turn(s) got no audio back")
+    return failed
+
+
+async def run(args):
+    mulaw = load_fixture(args.fixture) if args.fixture else synthetic_fixture(args.utterances)
+    ends = speech_ends(mulaw)
+    if not ends:
+        raise SystemExit("fixture contains no speech")
+
+    fake_dg = FakeDeepgram(load_script(args.script) if args.script else DEFAULT_SCRIPT, delay_ms=args.stt_delay_ms,
+                           interim_words=args.interim_words)
+    fake_ai = FakeOpenAI(ttft_ms=args.llm_ttft_ms, token_ms=args.llm_token_ms, tts_ms=args.tts_ms)
+    fake_tw = FakeTwilio(delay_ms=args.twilio_delay_ms)
+    runners = []
+    ports = {}
+    for name, fake in (("dg", fake_dg), ("ai", fake_ai), ("tw", fake_tw)):
+        runner, ports[name] = await start_app(fake.app())
+        runners.append(runner)
+
+    work_dir = tempfile.mkdtemp(prefix="bench_latency_")
+    port, metrics_port = free_port(), free_port()
+    env = dict(os.environ,
+               PYTHONUNBUFFERED="1",
+               STREAM_PORT=str(port),
+               METRICS_PORT=str(metrics_port),
+               STREAM_WORKERS=str(args.workers),
+               DRAIN_SECONDS="5",
+               TRANSCRIPT_FLUSH_SECONDS="0.2",
+               RECORDING_RETRY_SECONDS="0.5",
+               STT_MODE=args.stt_mode,
+               SPECULATIVE_LLM="1" if args.speculative else "0",
+               PLAYBACK_MODE="stream",
+               OPENAI_API_KEY="fake",
+               OPENAI_BASE_URL=f"http://127.0.0.1:{ports['ai']}/v1",
+               DEEPGRAM_API_KEY="fake",
+               DEEPGRAM_WS_URL=f"ws://127.0.0.1:{ports['dg']}/v1/listen",
+               DEEPGRAM_LISTEN_URL=f"http://127.0.0.1:{ports['dg']}/v1/listen",
+               TWILIO_ACCOUNT_SID="ACbench",
+               TWILIO_AUTH_TOKEN="fake",
+               TWILIO_API_BASE_URL=f"http://127.0.0.1:{ports['tw']}",
+               DASHBOARD_URL=f"http://127.0.0.1:{ports['tw']}",
+               PUBLIC_BASE_URL=f"http://127.0.0.1:{ports['tw']}",
+               TTS_CACHE_DIR=os.path.join(work_dir, "tts_cache"),
+               TRANSCRIPT_PATH=os.path.join(work_dir, "transcripts.jsonl"))
+    log_path = os.path.join(work_dir, "stream_server.log")
+    log = open(log_path, "w")
+    # run from a scratch directory so the server's startup cleanup and output files stay out of the repo
+    proc = subprocess.Popen([sys.executable, os.path.join(REPO_DIR, "stream_server.py")],
+                            cwd=work_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    try:
+        await wait_for_port(port, proc)
+        print(f"⏱ Replaying {args.calls} call(s), {len(ends)} turn(s) each, {args.concurrency} at a time "
+              f"(server log: {log_path})")
+
+        sem = asyncio.Semaphore(args.concurrency)
+
+        async def one(n):
+            async with sem:
+                return await replay_call(f"ws://127.0.0.1:{port}/stream", n, mulaw, ends, args.tail_s)
+
+        results = await asyncio.gather(*(one(n) for n in range(args.calls)))
+        # quality reports are generated by a background queue after each call ends
+        deadline = time.time() + 10
+        while time.time() < deadline and not all(
+                any(kind == "report" for _, kind, _ in fake_tw.events.get(r[0], [])) for r in results):
+            await asyncio.sleep(0.2)
+        # keep the server's own stage histograms next to its log for a closer look
+        speculations = {}
+        async with aiohttp.ClientSession() as http:
+            with open(os.path.join(work_dir, "metrics.txt"), "w") as f:
+                for worker in range(args.workers):
+                    async with http.get(f"http://127.0.0.1:{metrics_port + worker}/metrics") as r:
+                        text = await r.text()
+                    f.write(f"# worker {worker}\n{text}")
+                    for m in re.finditer(r'^voice_speculations_total\{result="(\w+)"\} (\S+)$', text, re.M):
+                        speculations[m[1]] = speculations.get(m[1], 0) + int(float(m[2]))
+
+        rows = []
+        for call_sid, eos_list, media_times, _ in results:
+            rows += turn_latencies(eos_list, media_times, fake_tw.events.get(call_sid, []))
+        barge_ins = sum(r[3] for r in results)
+        reports = sum(any(kind == "report" for _, kind, _ in fake_tw.events.get(r[0], [])) for r in results)
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        log.close()
+        for runner in runners:
+            await runner.cleanup()
+
+    thresholds = dict((k, float(v)) for k, v in (t.split("=", 1) for t in args.threshold))
+    failed = report(rows, thresholds)
+    print(f"\nupstream requests: {fake_ai.requests}, barge-ins (clear sent): {barge_ins}, "
+          f"reports received: {reports}/{len(results)}, dashboard batches: {fake_tw.batches}")
+    if args.speculative:
+        print(f"speculative replies: {speculations or 'none started'}")
+    for f in failed:
+        print(f"❌ {f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--fixture", help="8 kHz mono call audio (.wav 16-bit PCM or raw mulaw); default is synthetic")
+    ap.add_argument("--utterances", type=int, default=3, help="turns in the synthetic fixture")
+    ap.add_argument("--script", help="text file with the caller's line for each turn (default: fake_deepgram's)")
+    ap.add_argument("--calls", type=int, default=5)
+    ap.add_argument("--concurrency", type=int, default=5)
+    ap.add_argument("--tail-s", type=float, default=4.0, help="silence sent after the fixture before hanging up")
+    ap.add_argument("--stt-mode", default="stream", choices=["stream", "batch"])
+    ap.add_argument("--workers", type=int, default=1, help="stream server worker processes (STREAM_WORKERS)")
+    ap.add_argument("--stt-delay-ms", type=int, default=150)
+    ap.add_argument("--interim-words", type=int, default=1, help="words the fake STT reveals per interim result")
+    ap.add_argument("--speculative", action="store_true", help="run with SPECULATIVE_LLM=1")
+    ap.add_argument("--llm-ttft-ms", type=int, default=300)
+    ap.add_argument("--llm-token-ms", type=int, default=15)
+    ap.add_argument("--tts-ms", type=int, default=250)
+    ap.add_argument("--twilio-delay-ms", type=int, default=100)
+    ap.add_argument("--threshold", action="append", default=[], metavar="STAGE=MS",
+                    help=f"fail when a stage's p95 exceeds MS; stages: {', '.join(STAGES)}")
+    sys.exit(asyncio.run(run(ap.parse_args())))
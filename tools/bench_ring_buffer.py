@@ -0,0 +1,54 @@
+"""
+Micro-benchmark: per-frame cost of buffering inbound audio as an utterance grows.
+
+Compares the old `session.audio_buffer += frame` on immutable bytes with
+AudioRingBuffer.append(). Run from the repo root:
+
+    python -m tools.bench_ring_buffer
+"""
+import time, argparse
+from audio_buffer import AudioRingBuffer
+from call_session import AUDIO_BUFFER_BYTES
+
+FRAME = b"\x7f" * 160   # one 20 ms Twilio mulaw frame
+
+
+class BytesSession:
+    audio_buffer = b""
+
+
+def ingest_bytes(n_frames):
+    s = BytesSession()
+    s.audio_buffer = b""
+    t0 = time.perf_counter()
+    for _ in range(n_frames):
+        s.audio_buffer += FRAME
+    return time.perf_counter() - t0
+
+
+def ingest_ring(n_frames):
+    # sized like the server's buffer, or larger when benchmarking past MAX_UTTERANCE_SECONDS
+    ring = AudioRingBuffer(max(AUDIO_BUFFER_BYTES, 2 * n_frames * len(FRAME)))
+    t0 = time.perf_counter()
+    for _ in range(n_frames):
+        ring.append(FRAME)
+    ring.take()
+    return time.perf_counter() - t0
+
+
+def per_frame_us(fn, n_frames, repeat):
+    return min(fn(n_frames) for _ in range(repeat)) / n_frames * 1e6
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Per-frame ingest cost vs utterance length")
+    ap.add_argument("--seconds", type=float, nargs="+", default=[1, 5, 15, 60, 300])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'utterance':>10} {'bytes +=':>14} {'ring buffer':>14}")
+    for secs in args.seconds:
+        n = int(secs * 50)  # 50 frames per second
+        b = per_frame_us(ingest_bytes, n, args.repeat)
+        r = per_frame_us(ingest_ring, n, args.repeat)
+        print(f"{secs:>9.0f}s {b:>11.2f} µs {r:>11.2f} µs")
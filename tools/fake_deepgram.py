@@ -0,0 +1,122 @@
+"""
+Offline stand-in for Deepgram's /v1/listen (live WebSocket and batch REST).
+
+It does no real recognition: it detects speech by frame energy and, when an
+utterance ends, replies with the next line of a scripted transcript. Point the
+stream server at it with:
+
+    python -m tools.fake_deepgram --port 8081
+    DEEPGRAM_WS_URL=ws://127.0.0.1:8081/v1/listen DEEPGRAM_LISTEN_URL=http://127.0.0.1:8081/v1/listen \\
+        DEEPGRAM_API_KEY=fake python stream_server.py
+"""
+import json, asyncio, argparse, itertools
+import numpy as np
+from aiohttp import web, WSMsgType
+from audio_codec import ulaw_decode
+
+FRAME_BYTES = 160   # 20 ms of 8 kHz mulaw
+FRAME_MS = 20
+
+DEFAULT_SCRIPT = [
+    "Hi, I would like to make a reservation for four people tomorrow at seven.",
+    "What time do you close tonight?",
+    "Do you have any vegetarian pasta?",
+]
+
+
+def result(text, is_final=False, speech_final=False):
+    return json.dumps({
+        "type": "Results",
+        "is_final": is_final,
+        "speech_final": speech_final,
+        "channel": {"alternatives": [{"transcript": text, "confidence": 0.99}]},
+    })
+
+
+class FakeDeepgram:
+    def __init__(self, script=DEFAULT_SCRIPT, threshold=200, interim_ms=400, delay_ms=0, interim_words=1):
+        self.script = script
+        self.rest_lines = itertools.cycle(script)
+        self.threshold = threshold
+        self.interim_ms = interim_ms
+        self.delay_ms = delay_ms
+        self.interim_words = interim_words   # words of the line revealed per interim result
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/v1/listen", self.live)
+        app.router.add_post("/v1/listen", self.batch)
+        return app
+
+    # ---- batch REST: one scripted line per request ----
+    async def batch(self, request):
+        await request.read()
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+        text = next(self.rest_lines)
+        return web.json_response({"results": {"channels": [{"alternatives": [{"transcript": text}]}]}})
+
+    # ---- live WebSocket: energy endpointing over the streamed frames ----
+    async def live(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        endpointing = int(request.query.get("endpointing", "300"))
+        lines = itertools.cycle(self.script)
+        pending = b""
+        speech_ms = silence_ms = 0
+        line = next(lines)
+
+        async def finish():
+            nonlocal speech_ms, silence_ms, line
+            if self.delay_ms:
+                await asyncio.sleep(self.delay_ms / 1000)
+            await ws.send_str(result(line, is_final=True, speech_final=True))
+            speech_ms = silence_ms = 0
+            line = next(lines)
+
+        async for msg in ws:
+            if msg.type == WSMsgType.TEXT:
+                if json.loads(msg.data).get("type") == "CloseStream":
+                    if speech_ms:
+                        await finish()
+                    break
+                continue
+            if msg.type != WSMsgType.BINARY:
+                continue
+
+            pending += msg.data
+            while len(pending) >= FRAME_BYTES:
+                frame, pending = pending[:FRAME_BYTES], pending[FRAME_BYTES:]
+                voiced = np.sqrt(np.mean(np.square(ulaw_decode(frame).astype(np.float32)))) > self.threshold
+                if voiced:
+                    speech_ms += FRAME_MS
+                    silence_ms = 0
+                    if speech_ms % self.interim_ms == 0:
+                        words = line.split()
+                        shown = max(1, min(len(words), speech_ms // self.interim_ms * self.interim_words))
+                        await ws.send_str(result(" ".join(words[:shown])))
+                elif speech_ms:
+                    silence_ms += FRAME_MS
+                    if silence_ms >= endpointing:
+                        await finish()
+        await ws.close()
+        return ws
+
+
+def load_script(path):
+    return [l.strip() for l in open(path, encoding="utf-8") if l.strip()]
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8081)
+    ap.add_argument("--script", help="text file with one caller utterance per line")
+    ap.add_argument("--threshold", type=int, default=200, help="RMS level counted as speech")
+    ap.add_argument("--delay-ms", type=int, default=0, help="extra latency before each final result")
+    args = ap.parse_args()
+
+    fake = FakeDeepgram(load_script(args.script) if args.script else DEFAULT_SCRIPT,
+                        threshold=args.threshold, delay_ms=args.delay_ms)
+    print(f"🧪 Fake Deepgram listening at ws://{args.host}:{args.port}/v1/listen")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None)
@@ -0,0 +1,130 @@
+"""
+Offline stand-in for the OpenAI chat completions and speech endpoints.
+
+Replies are canned text streamed token by token; speech is a quiet tone whose
+length follows the text. Latency of every stage can be injected:
+
+    python -m tools.fake_openai --port 8082 --ttft-ms 300 --token-ms 15 --tts-ms 250
+    OPENAI_BASE_URL=http://127.0.0.1:8082/v1 OPENAI_API_KEY=fake python stream_server.py
+"""
+import json, math, time, array, asyncio, argparse
+from aiohttp import web
+
+TTS_SAMPLE_RATE = 24000
+CHARS_PER_SECOND = 15   # roughly conversational speaking rate
+
+DEFAULT_REPLY = (
+    "Of course! I can book a table for four tomorrow at seven. "
+    "May I have your name, email and phone number to confirm the reservation?"
+)
+# returned when the request asks for a JSON object (quality reports)
+REPORT_JSON = {
+    "overall_score": 86,
+    "scores": {"greeting_politeness": 9, "active_listening": 8, "clarity_conciseness": 9,
+               "empathy_tone": 8, "accuracy": 9},
+    "summary": "The receptionist handled the booking politely and efficiently.",
+    "detailed_analysis": "Details were confirmed promptly. The caller was not offered alternatives.",
+    "strengths": ["Polite greeting", "Quick confirmation", "Clear wording"],
+    "improvements": ["Offer alternatives", "Repeat the booking back", "Ask about allergies"],
+    "recommendations": ["Read the booking back before ending the call"],
+}
+
+
+def tone_pcm(seconds: float, freq=220, level=2000) -> bytes:
+    n = int(seconds * TTS_SAMPLE_RATE)
+    step = 2 * math.pi * freq / TTS_SAMPLE_RATE
+    return array.array("h", (int(level * math.sin(i * step)) for i in range(n))).tobytes()
+
+
+class FakeOpenAI:
+    def __init__(self, reply=DEFAULT_REPLY, ttft_ms=300, token_ms=15, tts_ms=250):
+        self.reply = reply
+        self.ttft_ms = ttft_ms
+        self.token_ms = token_ms
+        self.tts_ms = tts_ms
+        self.requests = {"chat": 0, "speech": 0}
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", self.chat)
+        app.router.add_post("/v1/audio/speech", self.speech)
+        app.router.add_get("/v1/models", self.models)
+        return app
+
+    def _chunk(self, delta=None, usage=None):
+        body = {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": "gpt-4o-mini",
+            "choices": [] if delta is None else [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        if usage:
+            body["usage"] = usage
+        return f"data: {json.dumps(body)}\n\n".encode()
+
+    def _usage(self, body):
+        prompt = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 4
+        return {"prompt_tokens": prompt, "completion_tokens": len(self.reply) // 4,
+                "total_tokens": prompt + len(self.reply) // 4}
+
+    async def chat(self, request):
+        body = await request.json()
+        self.requests["chat"] += 1
+        await asyncio.sleep(self.ttft_ms / 1000)
+
+        if not body.get("stream"):
+            await asyncio.sleep(self.token_ms * len(self.reply.split()) / 1000)
+            content = self.reply
+            if (body.get("response_format") or {}).get("type") == "json_object":
+                prompt = body["messages"][-1]["content"]
+                calls = prompt.count("=== CALL ")
+                content = json.dumps({"reports": [REPORT_JSON] * calls} if calls else REPORT_JSON)
+            return web.json_response({
+                "id": "chatcmpl-fake",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": "gpt-4o-mini",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": self._usage(body),
+            })
+
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        try:
+            await resp.prepare(request)
+            await resp.write(self._chunk({"role": "assistant", "content": ""}))
+            for i, word in enumerate(self.reply.split(" ")):
+                await resp.write(self._chunk({"content": word if i == 0 else " " + word}))
+                await asyncio.sleep(self.token_ms / 1000)
+            if (body.get("stream_options") or {}).get("include_usage"):
+                await resp.write(self._chunk(usage=self._usage(body)))
+            await resp.write(b"data: [DONE]\n\n")
+            await resp.write_eof()
+        except ConnectionResetError:
+            pass   # the client cancelled the reply (barge-in, discarded speculation)
+        return resp
+
+    async def models(self, request):
+        return web.json_response({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model",
+                                                               "created": 0, "owned_by": "openai"}]})
+
+    async def speech(self, request):
+        body = await request.json()
+        self.requests["speech"] += 1
+        await asyncio.sleep(self.tts_ms / 1000)
+        pcm = tone_pcm(max(0.3, len(body.get("input", "")) / CHARS_PER_SECOND))
+        return web.Response(body=pcm, content_type="application/octet-stream")
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8082)
+    ap.add_argument("--ttft-ms", type=int, default=300, help="delay before the first token")
+    ap.add_argument("--token-ms", type=int, default=15, help="delay between streamed tokens")
+    ap.add_argument("--tts-ms", type=int, default=250, help="delay before speech audio is returned")
+    args = ap.parse_args()
+
+    fake = FakeOpenAI(ttft_ms=args.ttft_ms, token_ms=args.token_ms, tts_ms=args.tts_ms)
+    print(f"🧪 Fake OpenAI listening at http://{args.host}:{args.port}/v1")
+    web.run_app(fake.app(), host=args.host, port=args.port, print=None)
@@ -0,0 +1,178 @@
+"""
+Offline stand-in for the parts of Twilio's REST API the stream server and
+dialer call (call updates, recordings, outbound calls), plus the dashboard's
+Socket.IO /ingest event channel and its /update, /report and /recording
+routes. A recording reports "processing" for recording_ready_s after it is
+created, like Twilio finalizing it after hang-up.
+
+Outbound calls post status callbacks through a ring/answer/hang-up cycle;
+the number's last digit picks the outcome (7 busy, 8 no-answer, 9 failed,
+anything else answered for call_s). With max_cps set, creates beyond that
+many per second are refused with 429, so a dialer that outpaces its
+budget shows up as refusals.
+
+    python -m tools.fake_twilio --port 8083
+    TWILIO_API_BASE_URL=http://127.0.0.1:8083 DASHBOARD_URL=http://127.0.0.1:8083 \\
+        PUBLIC_BASE_URL=http://127.0.0.1:8083 python stream_server.py
+"""
+import time, uuid, asyncio, argparse
+from collections import deque, defaultdict
+import aiohttp
+from aiohttp import web
+import socketio
+
+# dashboard channel event -> the kind recorded for it (same kinds as the HTTP routes)
+INGEST_KINDS = {"update": "dashboard", "call_report": "report", "call_recording": "recording_ready"}
+OUTCOMES = {"7": "busy", "8": "no-answer", "9": "failed"}
+
+
+class FakeTwilio:
+    def __init__(self, delay_ms=0, recording_ready_s=1.0, max_cps=None, ring_s=0.5, call_s=2.0):
+        self.delay_ms = delay_ms
+        self.recording_ready_s = recording_ready_s
+        self.max_cps = max_cps
+        self.ring_s = ring_s
+        self.call_s = call_s
+        self.created = deque()             # outbound create times within the last second
+        self.outbound = {}                 # call sid -> final status once it has ended (None while live)
+        self.refused = 0
+        self.live = 0
+        self.peak_live = 0
+        self.lifecycles = set()
+        self.events = defaultdict(list)   # call sid -> [(timestamp, kind, payload)]
+        self.recordings = {}               # recording sid -> (call sid, created at)
+        self.batches = 0                   # event batches received on the dashboard channel
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        sio = socketio.AsyncServer(async_mode="aiohttp")
+        sio.on("events", self.dashboard_events, namespace="/ingest")
+        sio.on("connect", lambda sid, environ, auth=None: None, namespace="/ingest")
+        sio.attach(app)
+        base = "/2010-04-01/Accounts/{account}"
+        app.router.add_post(base + "/Calls.json", self.create_call)
+        app.router.add_post(base + "/Calls/{call}.json", self.update_call)
+        app.router.add_post(base + "/Calls/{call}/Recordings.json", self.create_recording)
+        app.router.add_get(base + "/Recordings.json", self.list_recordings)
+        app.router.add_get(base + "/Recordings/{sid}.mp3", self.recording_media)
+        app.router.add_post("/update", self.dashboard_update)
+        app.router.add_post("/report", self.dashboard_report)
+        app.router.add_post("/recording", self.dashboard_recording)
+        return app
+
+    async def _delay(self):
+        if self.delay_ms:
+            await asyncio.sleep(self.delay_ms / 1000)
+
+    async def update_call(self, request):
+        await self._delay()
+        call = request.match_info["call"]
+        self.events[call].append((time.time(), "update", dict(await request.post())))
+        return web.json_response({"sid": call, "status": "in-progress"})
+
+    async def create_call(self, request):
+        await self._delay()
+        now = time.time()
+        while self.created and now - self.created[0] >= 1:
+            self.created.popleft()
+        if self.max_cps and len(self.created) >= self.max_cps:
+            self.refused += 1
+            return web.json_response({"code": 20429, "message": "Too Many Requests", "status": 429}, status=429)
+        self.created.append(now)
+        form = dict(await request.post())
+        sid = "CA" + uuid.uuid4().hex
+        self.outbound[sid] = None
+        task = asyncio.create_task(self._lifecycle(sid, form))
+        self.lifecycles.add(task)
+        task.add_done_callback(self.lifecycles.discard)
+        return web.json_response({"sid": sid, "status": "queued", "to": form.get("To"), "from": form.get("From")},
+                                 status=201)
+
+    async def _lifecycle(self, sid, form):
+        self.live += 1
+        self.peak_live = max(self.peak_live, self.live)
+        outcome = OUTCOMES.get(form.get("To", "")[-1:], "completed")
+        url = form.get("StatusCallback")
+        async with aiohttp.ClientSession() as http:
+            async def status(value, **extra):
+                if value == outcome:
+                    # the call is over before Twilio reports it, so the dialer may reuse its slot right away
+                    self.live -= 1
+                    self.outbound[sid] = outcome
+                if url:
+                    async with http.post(url, data={"CallSid": sid, "CallStatus": value, "To": form.get("To", ""),
+                                                    **extra}) as r:
+                        await r.read()
+
+            await status("initiated")
+            if outcome == "failed":
+                return await status("failed")
+            await status("ringing")
+            await asyncio.sleep(self.ring_s)
+            if outcome != "completed":
+                return await status(outcome)
+            await status("in-progress")
+            await asyncio.sleep(self.call_s)
+            await status("completed", CallDuration=str(round(self.call_s)))
+
+    async def create_recording(self, request):
+        await self._delay()
+        call = request.match_info["call"]
+        sid = f"RE{call[2:]}"
+        self.recordings[sid] = (call, time.time())
+        self.events[call].append((time.time(), "recording", {}))
+        return web.json_response(self._recording(request, sid), status=201)
+
+    def _recording(self, request, sid):
+        call, created = self.recordings[sid]
+        status = "completed" if time.time() - created >= self.recording_ready_s else "processing"
+        account = request.match_info["account"]
+        return {"sid": sid, "call_sid": call, "status": status,
+                "uri": f"/2010-04-01/Accounts/{account}/Recordings/{sid}.json"}
+
+    async def list_recordings(self, request):
+        await self._delay()
+        call = request.query.get("CallSid")
+        recs = [self._recording(request, sid) for sid, (c, _) in self.recordings.items() if call in (None, c)]
+        return web.json_response({"recordings": recs, "next_page_uri": None})
+
+    async def recording_media(self, request):
+        await self._delay()
+        if request.match_info["sid"] not in self.recordings:
+            raise web.HTTPNotFound()
+        # silent MPEG-1 Layer III frames: 32 kbps at 44.1 kHz is 104 bytes per frame
+        frame = bytes([0xFF, 0xFB, 0x10, 0xC4]) + bytes(100)
+        return web.Response(body=frame * 50, content_type="audio/mpeg")
+
+    async def dashboard_events(self, sid, events):
+        self.batches += 1
+        now = time.time()
+        for ev in events:
+            kind = INGEST_KINDS.get(ev["event"], ev["event"])
+            self.events[ev.get("callSid")].append((now, kind, ev.get("data") or {}))
+
+    async def dashboard_update(self, request):
+        data = await request.json()
+        self.events[data.get("callSid")].append((time.time(), "dashboard", data))
+        return web.json_response({"status": "ok"})
+
+    async def dashboard_recording(self, request):
+        data = await request.json()
+        self.events[data.get("callSid")].append((time.time(), "recording_ready", data))
+        return web.json_response({"status": "received"})
+
+    async def dashboard_report(self, request):
+        data = await request.json()
+        self.events[data.get("callSid")].append((time.time(), "report", data))
+        return web.json_response({"status": "received"})
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8083)
+    ap.add_argument("--delay-ms", type=int, default=0, help="latency added to every REST call")
+    args = ap.parse_args()
+
+    print(f"🧪 Fake Twilio listening at http://{args.host}:{args.port}")
+    web.run_app(FakeTwilio(delay_ms=args.delay_ms).app(), host=args.host, port=args.port, print=None)
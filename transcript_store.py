@@ -0,0 +1,122 @@
+import os, json, time, asyncio
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+TRANSCRIPT_PATH = os.getenv("TRANSCRIPT_PATH", os.path.join("logs", "transcripts.jsonl"))
+TRANSCRIPT_FLUSH_SECONDS = float(os.getenv("TRANSCRIPT_FLUSH_SECONDS", 5))
+TRANSCRIPT_BATCH_SIZE = int(os.getenv("TRANSCRIPT_BATCH_SIZE", 20))
+
+
+def _clock(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%H:%M:%S")
+
+
+# ===== TURN RECORDS =====
+@dataclass
+class Turn:
+    role: str                       # "Caller" or "AI"
+    text: str
+    started_at: float
+    ended_at: float
+    latency: dict = field(default_factory=dict)   # stage name -> milliseconds
+    usage: dict = None                             # LLM token usage for AI turns
+
+
+class Transcript:
+    """In-memory transcript of one call; nothing touches disk until the call is saved."""
+
+    def __init__(self, call_sid: str, stream_sid: str):
+        self.call_sid = call_sid
+        self.stream_sid = stream_sid
+        self.started_at = time.time()
+        self.ended_at = None
+        self.turns = []
+        self.spans = []   # timed pipeline stages, see telemetry.span
+        self.contacts = {}   # kind -> latest validated contact capture, see contact_extractor
+
+    def add(self, role: str, text: str, started_at: float = None, usage: dict = None, **latency) -> Turn:
+        now = time.time()
+        turn = Turn(role, text, started_at or now, now, {k: round(v, 1) for k, v in latency.items()}, usage)
+        self.turns.append(turn)
+        return turn
+
+    def as_text(self) -> str:
+        """Plain-text rendering used for the quality report prompt."""
+        lines = [f"[{_clock(self.started_at)}] --- Call Started ---"]
+        lines += [f"[{_clock(t.ended_at)}] [{t.role}] {t.text}" for t in self.turns]
+        return "\n".join(lines) + "\n"
+
+    def to_record(self) -> dict:
+        return {
+            "call_sid": self.call_sid,
+            "stream_sid": self.stream_sid,
+            "started_at": self.started_at,
+            "ended_at": self.ended_at or time.time(),
+            "turns": [asdict(t) for t in self.turns],
+            "spans": self.spans,
+            "contacts": self.contacts,
+        }
+
+
+# ===== APPEND-ONLY STORE =====
+class TranscriptStore:
+    """
+    Collects finished call records and appends them to a JSONL file (one line
+    per call) in batches from a background task, so calls never wait on disk.
+    """
+
+    def __init__(self, path=TRANSCRIPT_PATH, flush_seconds=TRANSCRIPT_FLUSH_SECONDS, batch_size=TRANSCRIPT_BATCH_SIZE):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.pending = []
+        self.worker = None
+        self.wakeup = None
+
+    def save(self, transcript: Transcript):
+        transcript.ended_at = transcript.ended_at or time.time()
+        self.pending.append(transcript.to_record())
+        if self.worker is None or self.worker.done():
+            self.wakeup = asyncio.Event()
+            self.worker = asyncio.create_task(self._run())
+        if len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        batch, self.pending = self.pending, []
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self._write, batch)
+        except Exception as e:
+            print("⚠ Transcript flush failed:", e)
+            self.pending = batch + self.pending
+
+    def _write(self, batch):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in batch).encode("utf-8")
+        # one O_APPEND write per batch, so stream workers sharing the file never interleave lines
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+    async def close(self):
+        if self.worker and not self.worker.done():
+            self.worker.cancel()
+            await asyncio.gather(self.worker, return_exceptions=True)
+        await self.flush()
@@ -0,0 +1,181 @@
+import os, time, hashlib, threading, asyncio
+from collections import OrderedDict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ===== SETTINGS =====
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(BASE_DIR, "static", "tts", "cache"))
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", 32))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", 512))
+TTS_CACHE_MAX_AGE_HOURS = float(os.getenv("TTS_CACHE_MAX_AGE_HOURS", 24 * 7))
+
+
+def cache_key(text: str, voice: str, model: str, fmt: str) -> str:
+    text = " ".join(text.split())
+    return hashlib.sha256(f"{model}\x00{voice}\x00{fmt}\x00{text}".encode("utf-8")).hexdigest()
+
+
+# ===== TTS CACHE =====
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech with an in-memory LRU tier
+    in front of an on-disk tier. Both tiers evict least-recently-used entries
+    past their size budget and anything older than max_age. Safe to use from
+    executor threads.
+    """
+
+    def __init__(self, cache_dir=TTS_CACHE_DIR, memory_bytes=TTS_CACHE_MEMORY_MB * 1024 * 1024,
+                 disk_bytes=TTS_CACHE_DISK_MB * 1024 * 1024, max_age=TTS_CACHE_MAX_AGE_HOURS * 3600):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.max_age = max_age
+        self.memory = OrderedDict()   # key -> (created_at, audio)
+        self.memory_size = 0
+        self.lock = threading.Lock()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def get_or_create(self, text: str, synth, voice: str, model: str, fmt: str) -> bytes:
+        """Return cached audio for text, calling synth(text) only on a miss."""
+        key = cache_key(text, voice, model, fmt)
+        audio = self._get_memory(key)
+        if audio is not None:
+            return audio
+        audio = self._get_disk(key, fmt)
+        if audio is not None:
+            return audio
+
+        with self.lock:
+            self.misses += 1
+        audio = synth(text)
+        if audio:
+            self._put_memory(key, audio, time.time())
+            self._put_disk(key, fmt, audio)
+        return audio
+
+    async def fetch(self, text: str, synth, voice: str, model: str, fmt: str) -> bytes:
+        """Async get_or_create: synth is a coroutine function and disk I/O stays off the event loop."""
+        key = cache_key(text, voice, model, fmt)
+        audio = self._get_memory(key)
+        if audio is not None:
+            return audio
+        loop = asyncio.get_running_loop()
+        audio = await loop.run_in_executor(None, self._get_disk, key, fmt)
+        if audio is not None:
+            return audio
+
+        with self.lock:
+            self.misses += 1
+        audio = await synth(text)
+        if audio:
+            self._put_memory(key, audio, time.time())
+            loop.run_in_executor(None, self._put_disk, key, fmt, audio)
+        return audio
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_rate": round((self.hits_memory + self.hits_disk) / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_bytes": self.memory_size,
+            }
+
+    # ---- memory tier ----
+    def _get_memory(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            created_at, audio = entry
+            if time.time() - created_at > self.max_age:
+                del self.memory[key]
+                self.memory_size -= len(audio)
+                return None
+            self.memory.move_to_end(key)
+            self.hits_memory += 1
+            return audio
+
+    def _put_memory(self, key, audio, created_at):
+        if len(audio) > self.memory_bytes:
+            return
+        with self.lock:
+            old = self.memory.pop(key, None)
+            if old:
+                self.memory_size -= len(old[1])
+            self.memory[key] = (created_at, audio)
+            self.memory_size += len(audio)
+            while self.memory_size > self.memory_bytes:
+                _, (_, evicted) = self.memory.popitem(last=False)
+                self.memory_size -= len(evicted)
+
+    # ---- disk tier ----
+    def _path(self, key, fmt):
+        return os.path.join(self.cache_dir, f"{key}.{fmt}")
+
+    def _get_disk(self, key, fmt):
+        path = self._path(key, fmt)
+        try:
+            created_at = os.path.getmtime(path)
+            if time.time() - created_at > self.max_age:
+                os.remove(path)
+                return None
+            with open(path, "rb") as f:
+                audio = f.read()
+            os.utime(path, (time.time(), created_at))   # atime marks recent use for LRU
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print("⚠ TTS cache read failed:", e)
+            return None
+        with self.lock:
+            self.hits_disk += 1
+        self._put_memory(key, audio, created_at)
+        return audio
+
+    def _put_disk(self, key, fmt, audio):
+        path = self._path(key, fmt)
+        # thread ids repeat across the forked workers sharing this directory; the pid keeps names apart
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(audio)
+            os.replace(tmp, path)
+            self.evict()
+        except Exception as e:
+            print("⚠ TTS cache write failed:", e)
+
+    def evict(self):
+        """Drop expired disk entries, then least-recently-used ones until under the size budget."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if name.endswith(".tmp"):
+                continue
+            if now - st.st_mtime > self.max_age:
+                os.remove(path)
+                continue
+            entries.append((st.st_atime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
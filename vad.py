@@ -0,0 +1,87 @@
+import os
+from collections import deque
+import numpy as np
+from dotenv import load_dotenv
+from audio_codec import ulaw_decode
+
+load_dotenv()
+
+# ===== SETTINGS =====
+SAMPLE_RATE = 8000
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000   # mulaw: one byte per sample
+
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", -45))   # absolute floor for speech
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", 12))          # how far above the noise floor speech must be
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", 100))    # voiced run needed to open an utterance
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", 600))        # silence needed to close it
+VAD_PREROLL_MS = int(os.getenv("VAD_PREROLL_MS", 200))          # audio kept from before the onset
+
+
+def frame_energies(mulaw_bytes: bytes, frame_bytes: int = FRAME_BYTES) -> np.ndarray:
+    """Per-frame energy in dBFS for a run of mulaw audio (a trailing partial frame counts as its own frame)."""
+    samples = ulaw_decode(mulaw_bytes).astype(np.float32)
+    if not len(samples):
+        return np.empty(0, dtype=np.float32)
+    starts = np.arange(0, len(samples), frame_bytes)
+    power = np.add.reduceat(np.square(samples), starts) / np.diff(np.append(starts, len(samples)))
+    return 10 * np.log10(power / (32768.0 ** 2) + 1e-12)
+
+
+# ===== ENDPOINTER =====
+class Endpointer:
+    """
+    Energy-based speech/silence tracker for 8 kHz mulaw.
+    push() returns "start" when an utterance opens, "end" when the caller
+    has been silent for the hangover period, and None otherwise.
+    """
+
+    def __init__(self, threshold_db=VAD_THRESHOLD_DB, margin_db=VAD_MARGIN_DB,
+                 min_speech_ms=VAD_MIN_SPEECH_MS, hangover_ms=VAD_HANGOVER_MS, preroll_ms=VAD_PREROLL_MS):
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.min_speech_ms = min_speech_ms
+        self.hangover_ms = hangover_ms
+        self.noise_db = threshold_db - margin_db
+        self.in_speech = False
+        self.voiced_ms = 0
+        self.silent_ms = 0
+        self.preroll = deque(maxlen=max(1, preroll_ms // FRAME_MS))
+
+    def is_voiced(self, db: float) -> bool:
+        return db > max(self.threshold_db, self.noise_db + self.margin_db)
+
+    def push(self, mulaw_bytes: bytes):
+        event = None
+        for db in frame_energies(mulaw_bytes):
+            voiced = self.is_voiced(db)
+            if not voiced:
+                # slow-moving noise floor so steady line hiss doesn't count as speech
+                self.noise_db = 0.95 * self.noise_db + 0.05 * db
+
+            if not self.in_speech:
+                self.voiced_ms = self.voiced_ms + FRAME_MS if voiced else 0
+                if self.voiced_ms >= self.min_speech_ms:
+                    self.in_speech = True
+                    self.silent_ms = 0
+                    event = "start"
+            else:
+                self.silent_ms = 0 if voiced else self.silent_ms + FRAME_MS
+                if self.silent_ms >= self.hangover_ms:
+                    self.in_speech = False
+                    self.voiced_ms = 0
+                    event = "end"
+        return event
+
+    def quiet_ms(self) -> int:
+        """How long the caller has been silent (0 while voiced audio is arriving)."""
+        return self.silent_ms if self.in_speech else (0 if self.voiced_ms else self.hangover_ms)
+
+    def remember(self, mulaw_bytes: bytes):
+        """Keep recent pre-speech audio so the first syllable isn't clipped."""
+        self.preroll.append(mulaw_bytes)
+
+    def take_preroll(self) -> bytes:
+        audio = b"".join(self.preroll)
+        self.preroll.clear()
+        return audio